@@ -47,10 +47,12 @@ class Agent:
 
 		response: Response | None
 
-	def __init__(self, server, server_type="Server"):
+	def __init__(self, server, server_type="Server", session: requests.Session | None = None):
 		self.server_type = server_type
 		self.server = server
 		self.port = 443 if self.server not in servers_using_alternative_port_for_communication() else 8443
+		# Optional keep-alive session, requests are made without connection reuse otherwise
+		self.session = session
 
 	def new_bench(self, bench):
 		settings = frappe.db.get_value(
@@ -878,16 +880,25 @@ class Agent:
 	def post(self, path, data=None, raises=True):
 		return self.request("POST", path, data, raises=raises)
 
-	def _make_req(self, method, path, data, files, agent_job_id):
-		password = get_decrypted_password(self.server_type, self.server, "agent_password")
-		headers = {"Authorization": f"bearer {password}", "X-Agent-Job-Id": agent_job_id}
-		url = f"https://{self.server}:{self.port}/agent/{path}"
+	def get_url(self, path: str) -> str:
+		return f"https://{self.server}:{self.port}/agent/{path}"
+
+	def get_headers(self, agent_job_id: str | None = None, password: str | None = None) -> dict:
+		password = password or get_decrypted_password(self.server_type, self.server, "agent_password")
+		return {"Authorization": f"bearer {password}", "X-Agent-Job-Id": agent_job_id}
+
+	def get_verify(self) -> bool | str:
 		intermediate_ca = frappe.db.get_value("Press Settings", "Press Settings", "backbone_intermediate_ca")
 		if frappe.conf.developer_mode and intermediate_ca:
 			root_ca = frappe.db.get_value("Certificate Authority", intermediate_ca, "parent_authority")
-			verify = frappe.get_doc("Certificate Authority", root_ca).certificate_file
-		else:
-			verify = True
+			return frappe.get_doc("Certificate Authority", root_ca).certificate_file
+		return True
+
+	def _make_req(self, method, path, data, files, agent_job_id):
+		headers = self.get_headers(agent_job_id)
+		url = self.get_url(path)
+		verify = self.get_verify()
+		requester = self.session or requests
 		if files:
 			file_objects = {
 				key: value
@@ -896,8 +907,8 @@ class Agent:
 				for key, value in files.items()
 			}
 			file_objects["json"] = json.dumps(data).encode()
-			return requests.request(method, url, headers=headers, files=file_objects, verify=verify)
-		return requests.request(method, url, headers=headers, json=data, verify=verify, timeout=(10, 30))
+			return requester.request(method, url, headers=headers, files=file_objects, verify=verify)
+		return requester.request(method, url, headers=headers, json=data, verify=verify, timeout=(10, 30))
 
 	def request(self, method, path, data=None, files=None, agent_job=None, raises=True):
 		self.raise_if_past_requests_have_failed()
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import time
 from contextlib import suppress
 from datetime import datetime, timedelta
 from enum import Enum
@@ -11,8 +12,8 @@ from typing import TYPE_CHECKING, ClassVar, Final, TypedDict
 import frappe
 import requests
 import sqlparse
-from elasticsearch import Elasticsearch
 from elasticsearch_dsl import A, Search
+from elasticsearch_dsl.response import Response
 from frappe.utils import (
 	convert_utc_to_timezone,
 	flt,
@@ -29,6 +30,8 @@ from press.press.report.binary_log_browser.binary_log_browser import (
 	get_data as get_binary_log_data,
 )
 from press.press.report.mariadb_slow_queries.mariadb_slow_queries import execute, normalize_query
+from press.utils import log_error
+from press.utils.log_server import INDEX, get_log_server_client
 
 if TYPE_CHECKING:
 	from collections.abc import Callable
@@ -85,6 +88,9 @@ TIMESPAN_TIMEGRAIN_MAP: Final[dict[str, tuple[int, int]]] = {
 
 MAX_NO_OF_PATHS: Final[int] = 10
 MAX_MAX_NO_OF_PATHS: Final[int] = 50
+CHART_TIMEOUT: Final[int] = 120
+CHART_CACHE_MIN_REFRESH: Final[int] = 10 * 60
+CHART_CACHE_REFRESH_FRACTION: Final[int] = 24
 
 
 class StackedGroupByChart:
@@ -104,13 +110,10 @@ class StackedGroupByChart:
 		resource_type: ResourceType,
 		max_no_of_paths: int = MAX_NO_OF_PATHS,
 	):
-		self.log_server = frappe.db.get_single_value("Press Settings", "log_server")
-		if not self.log_server:
+		self.client = get_log_server_client(timeout=CHART_TIMEOUT)
+		if not self.client:
 			return
 
-		self.url = f"https://{self.log_server}/elasticsearch"
-		self.password = str(get_decrypted_password("Log Server", self.log_server, "kibana_password"))
-
 		self.name = name
 		self.agg_type = agg_type
 		self.resource_type = resource_type
@@ -123,12 +126,11 @@ class StackedGroupByChart:
 		self.setup_search_aggs()
 
 	def setup_search_filters(self):
-		es = Elasticsearch(self.url, basic_auth=("frappe", self.password), request_timeout=120)
 		self.start, self.end = get_rounded_boundaries(
 			self.timespan, self.timegrain, self.timezone
 		)  # we pass timezone to ES query in get_histogram_chart
 		self.search = (
-			Search(using=es, index="filebeat-*")
+			Search(using=self.client.es, index=INDEX)
 			.filter(
 				"range",
 				**{
@@ -199,10 +201,11 @@ class StackedGroupByChart:
 	def exclude_top_k_data(self, datasets: list[Dataset]):
 		raise NotImplementedError
 
-	def get_other_bucket(self, datasets: list[Dataset], labels):
+	def setup_other_bucket_search(self, datasets: list[Dataset]):
 		# filters present in search already, clear out aggs and response
 		self.search.aggs._params = {}
-		del self.search._response
+		with suppress(AttributeError):
+			del self.search._response
 
 		self.exclude_top_k_data(datasets)
 		self.search.aggs.bucket("histogram_of_method", self.histogram_of_method())
@@ -214,8 +217,8 @@ class StackedGroupByChart:
 		elif AggType(self.agg_type) is AggType.AVERAGE_DURATION:
 			self.search.aggs["histogram_of_method"].bucket("avg_of_duration", self.avg_of_duration())
 
-		aggs = self.search.execute().aggregations
-
+	def get_other_bucket_chart(self, response: Response, labels: list[datetime]):
+		aggs = response.aggregations
 		aggs.key = "Other"  # Set custom key Other bucket
 		return self.get_histogram_chart(aggs, labels)
 
@@ -248,22 +251,90 @@ class StackedGroupByChart:
 		return path_data
 
 	def get_stacked_histogram_chart(self):
-		aggs: AggResponse = self.search.execute().aggregations
+		responses = self.client.msearch(self.get_queries())
+		while queries := self.handle_responses(responses):
+			responses = self.client.msearch(queries)
+		return self.format_chart(self.datasets, self.labels)
+
+	def get_queries(self) -> dict[str, dict]:
+		"""Queries to run first, only the open buckets if closed ones are cached"""
+		self.labels = self.get_labels()
+		self.datasets = []
+		self.has_query_error = False
+		self.cache = ChartBucketCache(self)
+		if self.cache.is_fresh:
+			return self.cache.get_tail_queries()
+		return {"top": self.search.to_dict()}
+
+	def handle_responses(self, responses: dict[str, dict]) -> dict[str, dict]:
+		"""Collect datasets from responses of `get_queries`, returns queries that still need to be run"""
+		if self.cache.is_fresh:
+			self.datasets = self.cache.merge_tail(responses)
+			return {}
+
+		if "top" in responses:
+			self.datasets = self.parse_response(responses["top"])
+			if self.has_other_bucket(self.datasets):
+				self.setup_other_bucket_search(self.datasets)
+				return {"other": self.search.to_dict()}
+		else:
+			self.datasets.extend(self.parse_response(responses["other"], other_bucket=True))
+
+		# Datasets missing from a failed query would be cached against the wrong paths
+		if not self.has_query_error:
+			self.cache.set(self.datasets, other_bucket="other" in responses)
+		return {}
+
+	def parse_response(
+		self, response: dict, other_bucket: bool = False, search: Search | None = None
+	) -> list[Dataset]:
+		if "error" in response:
+			log_error("Log Server Query Error", chart=self.cache_key, response=response)
+			self.has_query_error = True
+			return []
+
+		response = Response(search or self.search, response)
+		if other_bucket:
+			return [self.get_other_bucket_chart(response, self.labels)]
+		return self.get_top_datasets(response, self.labels)
 
+	@property
+	def cache_key(self) -> str:
+		return "|".join(
+			str(part)
+			for part in (
+				"analytics_chart",
+				type(self).__name__,
+				self.name,
+				AggType(self.agg_type).value,
+				ResourceType(self.resource_type).value,
+				self.timezone,
+				self.timespan,
+				self.timegrain,
+				self.max_no_of_paths,
+			)
+		)
+
+	def get_labels(self) -> list[datetime]:
 		timegrain_delta = timedelta(seconds=self.timegrain)
-		labels = [
+		return [
 			self.start + i * timegrain_delta for i in range((self.end - self.start) // timegrain_delta + 1)
 		]
+
+	def get_top_datasets(self, response: Response, labels: list[datetime]) -> list[Dataset]:
+		aggs: AggResponse = response.aggregations
 		# method_path has buckets of timestamps with method(eg: avg) of that duration
 		datasets = []
 
 		path_bucket: PathBucket
 		for path_bucket in aggs.method_path.buckets:
 			datasets.append(self.get_histogram_chart(path_bucket, labels))
+		return datasets
 
-		if len(datasets) >= self.max_no_of_paths:
-			datasets.append(self.get_other_bucket(datasets, labels))
+	def has_other_bucket(self, datasets: list[Dataset]) -> bool:
+		return len(datasets) >= self.max_no_of_paths
 
+	def format_chart(self, datasets: list[Dataset], labels: list[datetime]):
 		if self.normalize_slow_logs:
 			datasets = normalize_datasets(datasets)
 
@@ -277,12 +348,110 @@ class StackedGroupByChart:
 		return True
 
 	def run(self):
-		log_server = frappe.db.get_single_value("Press Settings", "log_server")
-		if not log_server:
+		if not self.client:
 			return {"datasets": [], "labels": []}
 		return self.get_stacked_histogram_chart()
 
 
+class ChartBucketCache:
+	"""
+	Closed histogram buckets of a stacked chart, kept for as long as they are in
+	the chart's window.
+
+	A closed bucket doesn't change as long as the top paths of the chart stay
+	the same, so only buckets that are still open are queried again, for the
+	cached top paths and the "Other" bucket. Top paths are recomputed with a
+	full query every `timespan / 24`, but not more often than every 10 minutes.
+	"""
+
+	def __init__(self, chart: StackedGroupByChart):
+		self.chart = chart
+		self.labels = chart.labels
+		self.entry = frappe.cache.get_value(chart.cache_key)
+
+		timegrain = timedelta(seconds=chart.timegrain)
+		now = datetime.now(pytz_timezone(chart.timezone))
+		self.closed_labels = [label for label in self.labels if label + timegrain <= now]
+
+		self.is_fresh = self.get_is_fresh()
+		if self.is_fresh:
+			closed_until = self.entry["closed_until"]
+			self.tail_labels = [label for label in self.labels if label.timestamp() > closed_until]
+
+	def get_is_fresh(self) -> bool:
+		if not self.entry or not self.labels:
+			return False
+
+		max_age = max(CHART_CACHE_MIN_REFRESH, self.chart.timespan / CHART_CACHE_REFRESH_FRACTION)
+		if time.time() - self.entry["refreshed_at"] > max_age:
+			return False
+
+		# Cached buckets must reach into the current window
+		return self.entry["closed_until"] >= self.labels[0].timestamp()
+
+	def get_tail_queries(self) -> dict[str, dict]:
+		if not self.tail_labels:
+			return {}
+
+		chart = self.chart
+		tail_start = int(self.tail_labels[0].timestamp() * 1000)
+		chart.search = chart.search.filter("range", **{"@timestamp": {"gte": tail_start}})
+
+		queries = {}
+		if self.entry["paths"]:
+			chart.search.aggs["method_path"].include = self.entry["paths"]
+			queries["tail"] = chart.search.to_dict()
+		self.tail_search = chart.search
+
+		if self.entry["other_bucket"]:
+			chart.search = chart.search.extra(size=0)  # copy, tail search is needed to parse its response
+			chart.setup_other_bucket_search([{"path": path} for path in self.entry["paths"]])
+			queries["tail_other"] = chart.search.to_dict()
+		return queries
+
+	def merge_tail(self, responses: dict[str, dict]) -> list[Dataset]:
+		tail = {}
+		if "tail" in responses:
+			tail.update(
+				(data["path"], data)
+				for data in self.chart.parse_response(responses["tail"], search=self.tail_search)
+			)
+		if "tail_other" in responses:
+			tail.update(
+				(data["path"], data)
+				for data in self.chart.parse_response(responses["tail_other"], other_bucket=True)
+			)
+
+		tail_labels = set(self.tail_labels)
+		datasets = []
+		for path, cached in self.entry["values"].items():
+			tail_values = tail.get(path, {}).get("values") or [None] * len(self.labels)
+			values = [
+				tail_values[index] if label in tail_labels else cached.get(label.timestamp())
+				for index, label in enumerate(self.labels)
+			]
+			datasets.append({"path": path, "values": values, "stack": "path"})
+
+		if not self.chart.has_query_error:
+			self.set(datasets, self.entry["other_bucket"], refreshed_at=self.entry["refreshed_at"])
+		return datasets
+
+	def set(self, datasets: list[Dataset], other_bucket: bool, refreshed_at: float | None = None):
+		closed = [(index, label) for index, label in enumerate(self.labels) if label in self.closed_labels]
+		entry = {
+			"paths": [data["path"] for data in (datasets[:-1] if other_bucket else datasets)],
+			"other_bucket": other_bucket,
+			"refreshed_at": refreshed_at or time.time(),
+			"closed_until": closed[-1][1].timestamp() if closed else 0,
+			# Insertion ordered, "Other" comes last
+			"values": {
+				data["path"]: {label.timestamp(): data["values"][index] for index, label in closed}
+				for data in datasets
+			},
+		}
+		frappe.cache.set_value(self.chart.cache_key, entry, expires_in_sec=self.chart.timespan)
+
+
 class RequestGroupByChart(StackedGroupByChart):
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
@@ -645,32 +814,46 @@ def get(name, timezone, duration="7d"):
 	}
 
 
-def add_commonly_slow_path_to_reports(
-	reports: dict, path: str, name: str, timezone, timespan, timegrain, max_no_of_paths
-):
-	for slow_path in COMMONLY_SLOW_PATHS + COMMONLY_SLOW_JOBS:
-		if slow_path["path"] == path:
-			reports[slow_path["id"]] = slow_path["function"](
-				name, "duration", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths
-			)
-			break
+def run_charts(
+	charts: dict[str, StackedGroupByChart], queries: dict[str, dict] | None = None
+) -> tuple[dict[str, dict], dict[str, dict]]:
+	"""
+	Run charts and raw queries together in one multi-search, followed by one
+	more for the "Other" buckets of charts that have them. Returns chart data
+	and raw query responses by name.
+	"""
+	queries = queries or {}
+	client = get_log_server_client(timeout=CHART_TIMEOUT)
+	if not client:
+		return {key: {"datasets": [], "labels": []} for key in charts}, {key: {} for key in queries}
+
+	pending = {key: chart.get_queries() for key, chart in charts.items()}
+	responses = client.msearch(get_chart_queries(pending) | queries)
+	query_responses = {key: responses[key] for key in queries}
+	while pending:
+		pending = {
+			key: charts[key].handle_responses({name: responses[f"{key}:{name}"] for name in names})
+			for key, names in pending.items()
+		}
+		pending = {key: names for key, names in pending.items() if names}
+		responses = client.msearch(get_chart_queries(pending))
 
+	results = {key: chart.format_chart(chart.datasets, chart.labels) for key, chart in charts.items()}
+	return results, query_responses
 
-def get_additional_duration_reports(
-	request_duration_by_path, name: str, timezone, timespan, timegrain, max_no_of_paths
-):
-	"""Get additional reports for the request duration by path"""
+
+def get_chart_queries(pending: dict[str, dict[str, dict]]) -> dict[str, dict]:
+	return {f"{key}:{name}": query for key, names in pending.items() for name, query in names.items()}
+
+
+def get_additional_duration_reports(duration_by_path: dict, charts: dict[str, dict]) -> dict[str, dict]:
+	"""Reports of commonly slow paths that are among the top 4 paths by duration"""
 	reports = {}
-	for path_data in request_duration_by_path["datasets"][:4]:  # top 4 paths
-		add_commonly_slow_path_to_reports(
-			reports,
-			path_data["path"],
-			name,
-			timezone,
-			timespan,
-			timegrain,
-			max_no_of_paths,
-		)
+	for path_data in duration_by_path["datasets"][:4]:  # top 4 paths
+		for slow_path in COMMONLY_SLOW_PATHS + COMMONLY_SLOW_JOBS:
+			if slow_path["path"] == path_data["path"]:
+				reports[slow_path["id"]] = charts[slow_path["id"]]
+				break
 
 	return reports
 
@@ -678,55 +861,43 @@ def get_additional_duration_reports(
 @frappe.whitelist()
 def get_advanced_analytics(name, timezone, duration="7d", max_no_of_paths=MAX_NO_OF_PATHS):
 	timespan, timegrain = TIMESPAN_TIMEGRAIN_MAP[duration]
-
-	job_data = get_usage(name, "job", timezone, timespan, timegrain)
-
-	request_duration_by_path = get_request_by_(
-		name, "duration", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths
+	args = (name, "duration", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths)
+	count_args = (name, "count", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths)
+	average_args = (
+		name,
+		"average_duration",
+		timezone,
+		timespan,
+		timegrain,
+		ResourceType.SITE,
+		max_no_of_paths,
 	)
 
-	background_job_duration_by_method = get_background_job_by_method(
-		name, "duration", timezone, timespan, timegrain, max_no_of_paths
+	# Reports of commonly slow paths are fetched along with everything else,
+	# and only returned if their path turns out to be among the slowest
+	charts, responses = run_charts(
+		{
+			"request_count_by_path": RequestGroupByChart(*count_args),
+			"request_duration_by_path": RequestGroupByChart(*args),
+			"average_request_duration_by_path": RequestGroupByChart(*average_args),
+			"request_count_by_ip": NginxRequestGroupByChart(*count_args),
+			"background_job_count_by_method": BackgroundJobGroupByChart(*count_args),
+			"background_job_duration_by_method": BackgroundJobGroupByChart(*args),
+			"average_background_job_duration_by_method": BackgroundJobGroupByChart(*average_args),
+		}
+		| {key: chart(*args) for key, chart in COMMONLY_SLOW_PATH_CHARTS.items()},
+		{"job_usage": get_usage_query(name, "job", timespan, timegrain)},
 	)
+	job_data = parse_usage(responses["job_usage"], timezone)
 
 	return (
-		{
-			"request_count_by_path": get_request_by_(
-				name, "count", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths
-			),
-			"request_duration_by_path": request_duration_by_path,
-			"average_request_duration_by_path": get_request_by_(
-				name, "average_duration", timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths
-			),
-			"request_count_by_ip": get_nginx_request_by_(
-				name, "count", timezone, timespan, timegrain, max_no_of_paths
-			),
-			"background_job_count_by_method": get_background_job_by_method(
-				name, "count", timezone, timespan, timegrain, max_no_of_paths
-			),
-			"background_job_duration_by_method": background_job_duration_by_method,
-			"average_background_job_duration_by_method": get_background_job_by_method(
-				name, "average_duration", timezone, timespan, timegrain, max_no_of_paths
-			),
+		{key: charts[key] for key in charts if key not in COMMONLY_SLOW_PATH_CHARTS}
+		| {
 			"job_count": [{"value": r.count, "date": r.date} for r in job_data],
 			"job_cpu_time": [{"value": r.duration, "date": r.date} for r in job_data],
 		}
-		| get_additional_duration_reports(
-			request_duration_by_path,
-			name,
-			timezone,
-			timespan,
-			timegrain,
-			max_no_of_paths,
-		)
-		| get_additional_duration_reports(
-			background_job_duration_by_method,
-			name,
-			timezone,
-			timespan,
-			timegrain,
-			max_no_of_paths,
-		)
+		| get_additional_duration_reports(charts["request_duration_by_path"], charts)
+		| get_additional_duration_reports(charts["background_job_duration_by_method"], charts)
 	)
 
 
@@ -821,7 +992,6 @@ def normalize_datasets(datasets: list[Dataset]) -> list[Dataset]:
 	return list(n_datasets.values())
 
 
-@redis_cache(ttl=10 * 60)
 def get_request_by_(
 	name,
 	agg_type: AggType,
@@ -844,7 +1014,6 @@ def get_request_by_(
 	).run()
 
 
-@redis_cache(ttl=10 * 60)
 def get_nginx_request_by_(
 	name, agg_type: AggType, timezone: str, timespan: int, timegrain: int, max_no_of_paths
 ):
@@ -853,7 +1022,6 @@ def get_nginx_request_by_(
 	).run()
 
 
-@redis_cache(ttl=10 * 60)
 def get_background_job_by_method(site, agg_type, timezone, timespan, timegrain, max_no_of_paths):
 	return BackgroundJobGroupByChart(
 		site, agg_type, timezone, timespan, timegrain, ResourceType.SITE, max_no_of_paths
@@ -876,7 +1044,6 @@ def get_slow_logs_by_query(
 	)
 
 
-@redis_cache(ttl=10 * 60)
 def get_slow_logs(
 	name,
 	agg_type,
@@ -997,15 +1164,24 @@ class GenerateReportReports(BackgroundJobGroupByChart):
 				self.search = self.search.exclude("match_phrase", json__site=path)
 
 
+COMMONLY_SLOW_PATH_CHARTS: dict[str, type[StackedGroupByChart]] = {
+	"run_doc_method_methodnames": RunDocMethodMethodNames,
+	"query_report_run_reports": QueryReportRunReports,
+	"generate_report_reports": GenerateReportReports,
+}
+
+
 def get_usage(site, type, timezone, timespan, timegrain):
-	log_server = frappe.db.get_single_value("Press Settings", "log_server")
-	if not log_server:
+	client = get_log_server_client()
+	if not client:
 		return {"datasets": [], "labels": []}
 
-	url = f"https://{log_server}/elasticsearch/filebeat-*/_search"
-	password = get_decrypted_password("Log Server", log_server, "kibana_password")
+	response = client.search(get_usage_query(site, type, timespan, timegrain), name=f"{type}_usage")
+	return parse_usage(response, timezone)
 
-	query = {
+
+def get_usage_query(site, type, timespan, timegrain) -> dict:
+	return {
 		"aggs": {
 			"date_histogram": {
 				"date_histogram": {
@@ -1031,8 +1207,8 @@ def get_usage(site, type, timezone, timespan, timegrain):
 		},
 	}
 
-	response = requests.post(url, json=query, auth=("frappe", password)).json()
 
+def parse_usage(response: dict, timezone: str):
 	buckets = []
 
 	if not response.get("aggregations"):
@@ -1057,13 +1233,10 @@ def get_usage(site, type, timezone, timespan, timegrain):
 
 def get_current_cpu_usage(site):
 	try:
-		log_server = frappe.db.get_single_value("Press Settings", "log_server")
-		if not log_server:
+		client = get_log_server_client()
+		if not client:
 			return 0
 
-		url = f"https://{log_server}/elasticsearch/filebeat-*/_search"
-		password = get_decrypted_password("Log Server", log_server, "kibana_password")
-
 		query = {
 			"query": {
 				"bool": {
@@ -1077,7 +1250,7 @@ def get_current_cpu_usage(site):
 			"size": 1,
 		}
 
-		response = requests.post(url, json=query, auth=("frappe", password)).json()
+		response = client.search(query, name="current_cpu_usage")
 		hits = response["hits"]["hits"]
 		if hits:
 			return hits[0]["_source"]["json"]["request"].get("counter", 0)
@@ -1087,19 +1260,21 @@ def get_current_cpu_usage(site):
 
 
 def get_current_cpu_usage_for_sites_on_server(server):
+	return get_current_cpu_usage_for_sites([server])
+
+
+def get_current_cpu_usage_for_sites(servers: list[str]) -> dict[str, int]:
+	"""Latest request counter of sites on the servers, all sites are paged through one aggregation"""
 	result = {}
 	with suppress(Exception):
-		log_server = frappe.db.get_single_value("Press Settings", "log_server")
-		if not log_server:
+		client = get_log_server_client()
+		if not client or not servers:
 			return result
 
-		url = f"https://{log_server}/elasticsearch/filebeat-*/_search"
-		password = get_decrypted_password("Log Server", log_server, "kibana_password")
-
 		query = {
 			"aggs": {
 				"0": {
-					"terms": {"field": "json.site", "size": 1000},
+					"composite": {"size": 1000, "sources": [{"site": {"terms": {"field": "json.site"}}}]},
 					"aggs": {
 						"usage": {
 							"filter": {"exists": {"field": "json.request.counter"}},
@@ -1120,51 +1295,35 @@ def get_current_cpu_usage_for_sites_on_server(server):
 			"query": {
 				"bool": {
 					"filter": [
-						{
-							"bool": {
-								"filter": [
-									{
-										"bool": {
-											"should": [
-												{"term": {"json.transaction_type": {"value": "request"}}}
-											],
-											"minimum_should_match": 1,
-										}
-									},
-									{
-										"bool": {
-											"should": [{"term": {"agent.name": {"value": server}}}],
-											"minimum_should_match": 1,
-										}
-									},
-								]
-							}
-						},
+						{"term": {"json.transaction_type": "request"}},
+						{"terms": {"agent.name": servers}},
 						{"range": {"@timestamp": {"gte": "now-1d"}}},
 					]
 				}
 			},
 		}
 
-		response = requests.post(url, json=query, auth=("frappe", password)).json()
-		for row in response["aggregations"]["0"]["buckets"]:
-			site = row["key"]
-			metric = row["usage"]["counter"]["top"]
-			if metric:
-				result[site] = metric[0]["metrics"]["json.request.counter"]
+		while True:
+			response = client.search(query, name="current_cpu_usage_for_sites")
+			aggregation = response["aggregations"]["0"]
+			for row in aggregation["buckets"]:
+				metric = row["usage"]["counter"]["top"]
+				if metric:
+					result[row["key"]["site"]] = metric[0]["metrics"]["json.request.counter"]
+
+			if not aggregation["buckets"] or "after_key" not in aggregation:
+				break
+			query["aggs"]["0"]["composite"]["after"] = aggregation["after_key"]
 	return result
 
 
 @frappe.whitelist()
 @protected("Site")
 def request_logs(name, timezone, date, sort=None, start=0):
-	log_server = frappe.db.get_single_value("Press Settings", "log_server")
-	if not log_server:
+	client = get_log_server_client()
+	if not client:
 		return []
 
-	url = f"https://{log_server}/elasticsearch/filebeat-*/_search"
-	password = get_decrypted_password("Log Server", log_server, "kibana_password")
-
 	sort_value = {
 		"Time (Ascending)": {"@timestamp": "asc"},
 		"Time (Descending)": {"@timestamp": "desc"},
@@ -1187,7 +1346,7 @@ def request_logs(name, timezone, date, sort=None, start=0):
 		"size": 10,
 	}
 
-	response = requests.post(url, json=query, auth=("frappe", password)).json()
+	response = client.search(query, name="request_logs")
 	out = []
 	for d in response["hits"]["hits"]:
 		data = d["_source"]["json"]
@@ -2,14 +2,19 @@
 # For license information, please see license.txt
 from __future__ import annotations
 
+import hmac
 import ipaddress
+import json
 
 import frappe
+from frappe.utils.password import get_decrypted_password
 
 from press.agent import Agent
-from press.press.doctype.agent_job.agent_job import handle_polled_job
+from press.press.doctype.agent_job.agent_job import handle_polled_job, record_job_push
 from press.utils import log_error
 
+AGENT_SERVER_TYPES = ("Server", "Database Server", "Proxy Server")
+
 
 def check_ip_version(remote_addr: str):
 	try:
@@ -114,3 +119,44 @@ def callback(job_id: str):
 		frappe.throw("Invalid Job Id", frappe.ValidationError)
 
 	frappe.enqueue(handle_job_updates, server=server, job_identifier=job_id)
+
+
+def validate_agent_token(server: str, server_type: str) -> bool:
+	if server_type not in AGENT_SERVER_TYPES or not frappe.db.exists(server_type, server):
+		return False
+
+	authorization = frappe.get_request_header("Authorization") or ""
+	scheme, _, token = authorization.partition(" ")
+	if scheme.lower() != "bearer" or not token:
+		return False
+
+	password = get_decrypted_password(server_type, server, "agent_password", raise_exception=False)
+	return bool(password) and hmac.compare_digest(token, password)
+
+
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def push_job_updates(server: str, jobs: list | str, server_type: str = "Server"):
+	"""
+	Receive a batch of agent job status deltas pushed by agent.
+
+	Each item has the job level fields of `/agent/jobs/<id>` (`id`, `status`, `start`,
+	`end`, `duration` and `data`) but only the steps whose status or output changed
+	since the last push. Agent authenticates with its own agent password.
+	Polling of pushing servers continues at a lower rate to catch lost updates.
+	"""
+	if not validate_agent_token(server, server_type):
+		frappe.throw("Not permitted", frappe.PermissionError)
+
+	if isinstance(jobs, str):
+		jobs = json.loads(jobs)
+
+	jobs = [job for job in jobs if isinstance(job, dict) and job.get("id")]
+	record_job_push(server)
+	if jobs:
+		frappe.enqueue(
+			"press.press.doctype.agent_job.agent_job.handle_pushed_jobs",
+			queue="short",
+			server=server,
+			pushed_jobs=jobs,
+		)
+	return {"accepted": len(jobs)}
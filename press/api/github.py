@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import re
 from base64 import b64decode
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -16,9 +16,11 @@ import requests
 from press.utils import get_current_team, log_error
 
 if TYPE_CHECKING:
-
 	from press.press.doctype.github_webhook_log.github_webhook_log import GitHubWebhookLog
 
+# Seconds before expiry after which a cached installation token is not used
+ACCESS_TOKEN_EXPIRY_MARGIN = 10 * 60
+
 
 @frappe.whitelist(allow_guest=True, xss_safe=True)
 def hook(*args, **kwargs):
@@ -69,6 +71,10 @@ def get_access_token(installation_id: str | None = None):
 			"github_access_token",
 		)
 
+	key = get_access_token_cache_key(installation_id)
+	if token := frappe.cache.get_value(key):
+		return token
+
 	token = get_jwt_token()
 	headers = {
 		"Authorization": f"Bearer {token}",
@@ -78,7 +84,25 @@ def get_access_token(installation_id: str | None = None):
 		f"https://api.github.com/app/installations/{installation_id}/access_tokens",
 		headers=headers,
 	).json()
-	return response.get("token")
+
+	token = response.get("token")
+	if token and (expires_at := response.get("expires_at")):
+		# Installation tokens are valid for an hour, keep them until shortly
+		# before that so that callers (e.g. git clone) get a usable token
+		expires_in = datetime.fromisoformat(expires_at.replace("Z", "+00:00")) - datetime.now(timezone.utc)
+		expires_in_sec = int(expires_in.total_seconds()) - ACCESS_TOKEN_EXPIRY_MARGIN
+		if expires_in_sec > 0:
+			frappe.cache.set_value(key, token, expires_in_sec=expires_in_sec)
+	return token
+
+
+def get_access_token_cache_key(installation_id: str) -> str:
+	return f"github_installation_access_token:{installation_id}"
+
+
+def clear_access_token_cache(installation_id: str | None):
+	if installation_id:
+		frappe.cache.delete_value(get_access_token_cache_key(installation_id))
 
 
 @frappe.whitelist()
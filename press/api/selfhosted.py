@@ -5,9 +5,9 @@ from dns.resolver import Resolver
 from frappe.utils import strip
 
 from press.api.server import plans
-from press.api.site import NAMESERVERS
 from press.runner import Ansible
 from press.utils import get_current_team
+from press.utils.dns_resolver import NAMESERVERS
 
 
 @frappe.whitelist()
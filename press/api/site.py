@@ -3,15 +3,14 @@
 from __future__ import annotations
 
 import json
+from collections import defaultdict
 from typing import TYPE_CHECKING
 
-import dns.exception
 import frappe
 import requests
 import wrapt
 from boto3 import client
 from botocore.exceptions import ClientError
-from dns.resolver import Resolver
 from frappe.core.utils import find
 from frappe.desk.doctype.tag.tag import add_tag
 from frappe.rate_limiter import rate_limit
@@ -44,6 +43,7 @@ from press.utils import (
 	log_error,
 	unique,
 )
+from press.utils.dns_resolver import DNSAnswer, resolve
 
 if TYPE_CHECKING:
 	from frappe.types import DF
@@ -60,9 +60,6 @@ if TYPE_CHECKING:
 	from press.press.doctype.site.site import Site
 
 
-NAMESERVERS = ["1.1.1.1", "1.0.0.1", "8.8.8.8", "8.8.4.4"]
-
-
 def protected(doctypes):
 	"""
 	This decorator is stupid. It works in magical ways. It checks whether the
@@ -1007,26 +1004,42 @@ def all(site_filter=None):
 	if site_filter is None:
 		site_filter = {"status": "", "tag": ""}
 
-	benches_with_updates = tuple(benches_with_available_update())
+	sites = get_sites_query(site_filter).run(as_dict=True)
+	if not sites:
+		return sites
 
-	sites = get_sites_query(site_filter, benches_with_updates).run(as_dict=True)
+	# Only look for updates of benches that have the listed sites
+	benches_with_updates = set(benches_with_available_update(benches=list({site.bench for site in sites})))
+	if site_filter["status"] == "Update Available":
+		sites = [site for site in sites if site.bench in benches_with_updates]
 
+	tags = get_site_tags([site.name for site in sites])
 	for site in sites:
-		site.server_region_info = get_server_region_info(site)
-		site_plan_name = frappe.get_value("Site", site.name, "plan")
-		site.plan = frappe.get_doc("Site Plan", site_plan_name) if site_plan_name else None
-		site.tags = frappe.get_all(
-			"Resource Tag",
-			{"parent": site.name},
-			pluck="tag_name",
-		)
+		site.server_region_info = get_cached_server_region_info(site.cluster)
+		site.plan = frappe.get_cached_doc("Site Plan", site.plan) if site.plan else None
+		site.tags = tags.get(site.name, [])
 		if site.bench in benches_with_updates:
 			site.update_available = True
 
 	return sites
 
 
-def get_sites_query(site_filter, benches_with_updates):
+def get_site_tags(sites: list[str]) -> dict[str, list[str]]:
+	tags = defaultdict(list)
+	if not sites:
+		return tags
+
+	for tag in frappe.get_all(
+		"Resource Tag",
+		{"parenttype": "Site", "parent": ("in", sites)},
+		["parent", "tag_name"],
+		order_by="idx",
+	):
+		tags[tag.parent].append(tag.tag_name)
+	return tags
+
+
+def get_sites_query(site_filter):
 	Site = frappe.qb.DocType("Site")
 	ReleaseGroup = frappe.qb.DocType("Release Group")
 
@@ -1050,6 +1063,7 @@ def get_sites_query(site_filter, benches_with_updates):
 			Site.team,
 			Site.cluster,
 			Site.group,
+			Site.plan,
 			ReleaseGroup.title,
 			ReleaseGroup.version,
 			ReleaseGroup.public,
@@ -1071,9 +1085,8 @@ def get_sites_query(site_filter, benches_with_updates):
 		sites_query = sites_query.where(Site.status == "Inactive")
 	elif site_filter["status"] == "Trial":
 		sites_query = sites_query.where((Site.trial_end_date != "") & (Site.status != "Archived"))
-	elif site_filter["status"] == "Update Available":
-		sites_query = sites_query.where(Site.bench.isin(benches_with_updates) & (Site.status != "Archived"))
 	else:
+		# Sites with an update available are filtered by `all`
 		sites_query = sites_query.where(Site.status != "Archived")
 
 	if site_filter["tag"]:
@@ -1393,6 +1406,12 @@ def get_server_region_info(site) -> dict:
 	return frappe.db.get_value("Cluster", site.cluster, ["title", "image"], as_dict=True)
 
 
+def get_cached_server_region_info(cluster: str | None) -> dict | None:
+	if not cluster:
+		return None
+	return frappe.get_cached_value("Cluster", cluster, ["title", "image"], as_dict=True)
+
+
 @frappe.whitelist()
 @protected("Site")
 def available_apps(name):
@@ -1665,53 +1684,53 @@ def setup_wizard_complete(name):
 def check_domain_allows_letsencrypt_certs(domain):
 	# Check if domain is allowed to get letsencrypt certificates
 	# This is a security measure to prevent unauthorized certificate issuance
+	naked_domain = get_naked_domain(domain)
+	answer = resolve(naked_domain, "CAA")
+	if answer.error:
+		return  # no CAA record (anything goes) or we have other problems
+
+	for record in answer.records:
+		if "letsencrypt.org" in record:
+			return
+	frappe.throw(
+		f"Domain {naked_domain} does not allow Let's Encrypt certificates. Please review CAA record for the same.",
+		ConflictingCAARecord,
+	)
+
+
+def get_naked_domain(domain: str) -> str:
 	from tldextract import extract
 
-	naked_domain = extract(domain).registered_domain
-	resolver = Resolver(configure=False)
-	resolver.nameservers = NAMESERVERS
-	try:
-		answer = resolver.query(naked_domain, "CAA")
-		for rdata in answer:
-			if "letsencrypt.org" in rdata.to_text():
-				return True
-	except dns.resolver.NoAnswer:
-		pass  # no CAA record. Anything goes
-	except dns.exception.DNSException:
-		pass  # We have other probems
-	else:
-		frappe.throw(
-			f"Domain {naked_domain} does not allow Let's Encrypt certificates. Please review CAA record for the same.",
-			ConflictingCAARecord,
-		)
+	return extract(domain).registered_domain
+
+
+def set_dns_error(result: dict, answer: DNSAnswer):
+	result["exists"] = not answer.no_answer
+	result["answer"] = answer.error
 
 
 def check_dns_cname(name, domain):
 	result = {"type": "CNAME", "exists": True, "matched": False, "answer": ""}
 	try:
-		resolver = Resolver(configure=False)
-		resolver.nameservers = NAMESERVERS
-		answer = resolver.query(domain, "CNAME")
-		if len(answer) > 1:
+		answer = resolve(domain, "CNAME")
+		if answer.error:
+			set_dns_error(result, answer)
+			return result
+		if len(answer.records) > 1:
 			raise MultipleCNAMERecords
-		mapped_domain = answer[0].to_text().rsplit(".", 1)[0]
-		result["answer"] = answer.rrset.to_text()
+		mapped_domain = answer.records[0].rsplit(".", 1)[0]
+		result["answer"] = answer.rrset
 		other_domains = frappe.db.get_all(
 			"Site Domain", {"site": name, "status": "Active", "domain": ("!=", name)}, pluck="domain"
 		)
 		if mapped_domain == name or mapped_domain in other_domains:
 			result["matched"] = True
 	except MultipleCNAMERecords:
-		multiple_domains = ", ".join(part.to_text() for part in answer)
+		multiple_domains = ", ".join(answer.records)
 		frappe.throw(
 			f"Domain <b>{domain}</b> has multiple CNAME records: <b>{multiple_domains}</b>. Please keep only one.",
 			MultipleCNAMERecords,
 		)
-	except dns.resolver.NoAnswer as e:
-		result["exists"] = False
-		result["answer"] = str(e)
-	except dns.exception.DNSException as e:
-		result["answer"] = str(e)
 	except Exception as e:
 		result["answer"] = str(e)
 		log_error("DNS Query Exception - CNAME", site=name, domain=domain, exception=e)
@@ -1738,26 +1757,24 @@ def check_for_ip_match(site_name: str, site_ip: str | None, domain_ip: str | Non
 def check_dns_a(name, domain):
 	result = {"type": "A", "exists": True, "matched": False, "answer": ""}
 	try:
-		resolver = Resolver(configure=False)
-		resolver.nameservers = NAMESERVERS
-		answer = resolver.query(domain, "A")
-		if len(answer) > 1:
+		answer = resolve(domain, "A")
+		if answer.error:
+			set_dns_error(result, answer)
+			return result
+		if len(answer.records) > 1:
 			raise MultipleARecords
-		domain_ip = answer[0].to_text()
-		site_ip = resolver.query(name, "A")[0].to_text()
-		result["answer"] = answer.rrset.to_text()
-		result["matched"] = check_for_ip_match(name, site_ip, domain_ip)
+		site_answer = resolve(name, "A")
+		if site_answer.error:
+			set_dns_error(result, site_answer)
+			return result
+		result["answer"] = answer.rrset
+		result["matched"] = check_for_ip_match(name, site_answer.records[0], answer.records[0])
 	except MultipleARecords:
-		multiple_ips = ", ".join(part.to_text() for part in answer)
+		multiple_ips = ", ".join(answer.records)
 		frappe.throw(
 			f"Domain {domain} has multiple A records: {multiple_ips}. Please keep only one.",
 			MultipleARecords,
 		)
-	except dns.resolver.NoAnswer as e:
-		result["exists"] = False
-		result["answer"] = str(e)
-	except dns.exception.DNSException as e:
-		result["answer"] = str(e)
 	except Exception as e:
 		result["answer"] = str(e)
 		log_error("DNS Query Exception - A", site=name, domain=domain, exception=e)
@@ -1771,34 +1788,44 @@ def ensure_dns_aaaa_record_doesnt_exist(domain: str):
 	LetsEncrypt has issues with IPv6, so we need to ensure that the domain doesn't have an AAAA record
 	ref: https://letsencrypt.org/docs/ipv6-support/#incorrect-ipv6-addresses
 	"""
-	try:
-		resolver = Resolver(configure=False)
-		resolver.nameservers = NAMESERVERS
-		answer = resolver.query(domain, "AAAA")
-		if answer:
-			frappe.throw(
-				f"Domain {domain} has an AAAA record. This causes issues with https certificate generation. Please remove the same to proceed.",
-				AAAARecordExists,
-			)
-	except dns.resolver.NoAnswer:
-		pass
-	except dns.exception.DNSException:
-		pass  # We have other problems
+	if not resolve(domain, "AAAA").error:
+		frappe.throw(
+			f"Domain {domain} has an AAAA record. This causes issues with https certificate generation. Please remove the same to proceed.",
+			AAAARecordExists,
+		)
+
+
+def get_dns_queries(name: str, domain: str) -> list[tuple[str, str]]:
+	"""Lookups made by `check_dns_cname_a`, to prefetch them"""
+	return [
+		(get_naked_domain(domain), "CAA"),
+		(domain, "AAAA"),
+		(domain, "CNAME"),
+		(domain, "A"),
+		(name, "A"),
+	]
 
 
-def check_domain_proxied(domain) -> str | None:
+def get_domain_head(domain: str) -> requests.Response | requests.exceptions.RequestException:
 	try:
-		res = requests.head(f"http://{domain}", timeout=3)
+		return requests.head(f"http://{domain}", timeout=3)
 	except requests.exceptions.RequestException as e:
-		frappe.throw("Unable to connect to the domain. Is the DNS correct?\n\n" + str(e))
-	else:
-		if (server := res.headers.get("server")) not in ("Frappe Cloud", None):  # eg: cloudflare
-			return server
+		return e
+
+
+def check_domain_proxied(domain, head_response=None) -> str | None:
+	if head_response is None:
+		head_response = get_domain_head(domain)
+	if isinstance(head_response, requests.exceptions.RequestException):
+		frappe.throw("Unable to connect to the domain. Is the DNS correct?\n\n" + str(head_response))
+	if (server := head_response.headers.get("server")) not in ("Frappe Cloud", None):  # eg: cloudflare
+		return server
+	return None
 
 
-def check_dns_cname_a(name, domain, ignore_proxying=False):
+def check_dns_cname_a(name, domain, ignore_proxying=False, head_response=None):
 	check_domain_allows_letsencrypt_certs(domain)
-	proxy = check_domain_proxied(domain)
+	proxy = check_domain_proxied(domain, head_response)
 	if proxy:
 		if ignore_proxying:  # no point checking the rest if proxied
 			return {"CNAME": {}, "A": {}, "matched": True, "type": "A"}  # assume A
@@ -0,0 +1,85 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See license.txt
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from press.api.analytics import RequestGroupByChart, ResourceType
+
+
+def histogram_response(paths: dict[str, dict], aggregation="method_path"):
+	return {
+		"took": 1,
+		"aggregations": {
+			aggregation: {
+				"buckets": [
+					{
+						"key": path,
+						"doc_count": sum(counts.values()),
+						"path_count": {"value": sum(counts.values())},
+						"histogram_of_method": {
+							"buckets": [
+								{"key_as_string": label.isoformat(), "doc_count": count}
+								for label, count in counts.items()
+							]
+						},
+					}
+					for path, counts in paths.items()
+				]
+			}
+		},
+	}
+
+
+class TestAnalytics(FrappeTestCase):
+	def tearDown(self):
+		frappe.cache.delete_keys("analytics_chart")
+		super().tearDown()
+
+	def get_chart(self, client):
+		with patch("press.api.analytics.get_log_server_client", return_value=client):
+			return RequestGroupByChart(
+				"test.frappe.dev", "count", "UTC", 60 * 60, 60, ResourceType.SITE, max_no_of_paths=10
+			)
+
+	def test_closed_chart_buckets_are_not_queried_again(self):
+		client = MagicMock()
+		chart = self.get_chart(client)
+		labels = chart.get_labels()
+		client.msearch.return_value = {
+			"top": histogram_response({"/api/method/ping": dict.fromkeys(labels, 2)})
+		}
+		first = chart.run()
+		self.assertEqual(first["datasets"][0]["values"], [2] * len(labels))
+
+		chart = self.get_chart(client)
+		client.msearch.return_value = {
+			"tail": histogram_response({"/api/method/ping": dict.fromkeys(labels[-2:], 5)})
+		}
+		second = chart.run()
+
+		queries = client.msearch.call_args.args[0]
+		self.assertEqual(list(queries), ["tail"])
+		self.assertEqual(queries["tail"]["aggs"]["method_path"]["terms"]["include"], ["/api/method/ping"])
+		values = second["datasets"][0]["values"]
+		self.assertEqual(values[0], 2)
+		self.assertEqual(values[-1], 5)
+
+	def test_failed_other_bucket_query_is_not_cached(self):
+		client = MagicMock()
+		chart = self.get_chart(client)
+		labels = chart.get_labels()
+		paths = [f"/api/method/path_{index}" for index in range(10)]
+		client.msearch.side_effect = [
+			{"top": histogram_response({path: dict.fromkeys(labels, 2) for path in paths})},
+			{"other": {"error": {"type": "search_phase_execution_exception"}}},
+		]
+		with patch("press.api.analytics.log_error"):
+			result = chart.run()
+
+		self.assertEqual([data["path"] for data in result["datasets"]], paths)
+		self.assertIsNone(frappe.cache.get_value(chart.cache_key))
@@ -1052,3 +1052,22 @@ class TestAPISiteList(FrappeTestCase):
 
 	def test_list_tagged_sites(self):
 		self.assertEqual(all(site_filter={"status": "", "tag": "test_tag"}), [self.tagged_site_dict])
+
+	def test_list_sites_query_count_does_not_grow_with_sites(self):
+		from press.press.doctype.press_tag.test_press_tag import create_and_add_test_tag
+
+		def count_queries():
+			all()  # Warm up plan and cluster cache
+			with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+				all()
+			return sql.call_count
+
+		queries = count_queries()
+
+		bench = frappe.db.get_value("Site", self.broken_site_dict["name"], "bench")
+		plan = create_test_plan("Site")
+		for i in range(10):
+			site = create_test_site(bench=bench, plan=plan.name)
+			create_and_add_test_tag(site.name, "Site", tag=f"test_tag_{i}")
+
+		self.assertEqual(count_queries(), queries)
@@ -169,17 +169,35 @@ doc_events = {
 		],
 	},
 	"Address": {"validate": "press.api.billing.validate_gst"},
-	"Site": {"before_insert": "press.press.doctype.team.team.validate_site_creation"},
+	"Site": {
+		"before_insert": "press.press.doctype.team.team.validate_site_creation",
+		"on_update": "press.metrics.record_status_transition",
+	},
 	"Marketplace App Subscription": {
 		"on_update": "press.press.doctype.storage_integration_subscription.storage_integration_subscription.create_after_insert",
 	},
+	"Deploy Candidate": {"on_update": "press.metrics.record_status_transition"},
+	"Bench": {"on_update": "press.metrics.record_status_transition"},
+	"Server": {"on_update": "press.metrics.record_status_transition"},
+	"Database Server": {"on_update": "press.metrics.record_status_transition"},
+	"Virtual Machine": {"on_update": "press.metrics.record_status_transition"},
+	"Site Backup": {"on_update": "press.metrics.record_status_transition"},
+	"Site Update": {"on_update": "press.metrics.record_status_transition"},
+	"Site Migration": {"on_update": "press.metrics.record_status_transition"},
+	"Version Upgrade": {"on_update": "press.metrics.record_status_transition"},
+	"Press Job": {"on_update": "press.metrics.record_status_transition"},
+	"Ansible Play": {"on_update": "press.metrics.record_status_transition"},
+	"Agent Job": {"on_update": "press.metrics.record_status_transition"},
 }
 
 # Scheduled Tasks
 # ---------------
 
 scheduler_events = {
-	"weekly_long": ["press.press.doctype.marketplace_app.events.auto_review_for_missing_steps"],
+	"weekly_long": [
+		"press.press.doctype.marketplace_app.events.auto_review_for_missing_steps",
+		"press.press.audit.check_all_offsite_backups",
+	],
 	"daily": [
 		"press.experimental.doctype.referral_bonus.referral_bonus.credit_referral_bonuses",
 		"press.press.doctype.log_counter.log_counter.record_counts",
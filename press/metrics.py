@@ -1,5 +1,18 @@
 # Copyright (c) 2024, Frappe Technologies Pvt. Ltd. and Contributors
 # For license information, please see license.txt
+"""
+Prometheus metrics served at /metrics.
+
+Status counts are GROUP BY queries over large tables, so scrapes are served
+from a snapshot kept in redis. A scrape that finds the snapshot older than
+`metrics_refresh_interval` enqueues a refresh and serves the old snapshot.
+
+Status transitions and latencies are recorded by workers as they happen and
+rendered from redis as counters and histograms.
+"""
+
+import time
+from collections import defaultdict
 
 import frappe
 from frappe.utils import cint
@@ -8,65 +21,234 @@ from prometheus_client import (
 	Gauge,
 	generate_latest,
 )
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
 from werkzeug.wrappers import Response
 
+SNAPSHOT_KEY = "press_metrics_snapshot"
+TRANSITIONS_KEY = "press_metrics_status_transitions"
+DEFAULT_REFRESH_INTERVAL = 60
 
-class MetricsRenderer:
-	def __init__(self, path, status_code=None):
-		self.path = path
-		self.registry = CollectorRegistry(auto_describe=True)
+# Metric, doctype and filters of status counts
+STATUS_METRICS = (
+	("press_deploy_candidate_total", "Deploy Candidate", {"status": ("!=", "Success")}),
+	("press_site_total", "Site", {"status": ("!=", "Archived")}),
+	("press_bench_total", "Bench", {"status": ("!=", "Archived")}),
+	("press_server_total", "Server", {}),
+	("press_database_server_total", "Database Server", {}),
+	("press_virtual_machine_total", "Virtual Machine", {}),
+	("press_site_backup_total", "Site Backup", {"status": ("!=", "Success")}),
+	("press_site_update_total", "Site Update", {"status": ("!=", "Success")}),
+	("press_site_migration_total", "Site Migration", {}),
+	("press_site_upgrade_total", "Version Upgrade", {}),
+	("press_press_job_total", "Press Job", {}),
+	("press_ansible_play_total", "Ansible Play", {"status": ("!=", "Success")}),
+	("press_agent_job_total", "Agent Job", {"status": ("!=", "Success")}),
+)
 
-	def get_status(self, metric, doctype, status_field="status", filters=None):
-		if filters is None:
-			filters = {}
-		c = Gauge(metric, "", [status_field], registry=self.registry)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+class RedisHistogram:
+	"""Histogram observed by many workers, kept in a redis hash and collected on scrape"""
+
+	def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = labelnames
+		self.buckets = buckets
+
+	@property
+	def key(self):
+		return frappe.cache.make_key(f"press_metrics_histogram|{self.name}")
+
+	def observe(self, value, *labelvalues):
+		self.observe_many([(value, labelvalues)])
+
+	def observe_many(self, observations):
+		"""Record `(value, labelvalues)` pairs with a single round trip"""
+		try:
+			pipeline = frappe.cache.pipeline()
+			for value, labelvalues in observations:
+				series = "|".join(labelvalues)
+				bucket = next(bound for bound in self.buckets if value <= bound)
+				pipeline.hincrby(self.key, f"{series}|{bucket}", 1)
+				pipeline.hincrbyfloat(self.key, f"{series}|sum", value)
+			pipeline.execute()
+		except Exception:
+			# Metrics are best effort, never fail the observed code because of them
+			pass
+
+	def describe(self):
+		return [HistogramMetricFamily(self.name, self.documentation, labels=self.labelnames)]
+
+	def collect(self):
+		family = self.describe()[0]
+		series = defaultdict(lambda: {"counts": defaultdict(int), "sum": 0.0})
+		for field, value in (frappe.cache.execute_command("HGETALL", self.key) or {}).items():
+			name, _, bucket = frappe.safe_decode(field).rpartition("|")
+			if bucket == "sum":
+				series[name]["sum"] = float(value)
+			else:
+				series[name]["counts"][float(bucket)] += int(value)
+
+		for name, values in series.items():
+			cumulative, buckets = 0, []
+			for bound in self.buckets:
+				cumulative += values["counts"][bound]
+				buckets.append((floatToGoString(bound), cumulative))
+			labelvalues = name.split("|") if self.labelnames else []
+			family.add_metric(labelvalues, buckets, values["sum"])
+		yield family
+
+
+AGENT_JOB_POLL_DURATION = RedisHistogram(
+	"press_agent_job_poll_duration_seconds",
+	"Time taken by agents to respond to job status polls",
+)
+AGENT_JOB_CALLBACK_DURATION = RedisHistogram(
+	"press_agent_job_callback_duration_seconds",
+	"Time taken by callbacks of finished agent jobs",
+	labelnames=("method",),
+)
+WEBHOOK_DELIVERY_LAG = RedisHistogram(
+	"press_webhook_delivery_lag_seconds",
+	"Time from a webhook event to its first delivery attempt",
+	buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, float("inf")),
+)
+
+
+class StatusTransitionCollector:
+	def describe(self):
+		return [
+			CounterMetricFamily(
+				"press_status_transitions",
+				"Status changes of documents with exported status counts",
+				labels=["doctype", "from_status", "to_status"],
+			)
+		]
+
+	def collect(self):
+		family = self.describe()[0]
+		key = frappe.cache.make_key(TRANSITIONS_KEY)
+		for field, value in (frappe.cache.execute_command("HGETALL", key) or {}).items():
+			family.add_metric(frappe.safe_decode(field).split("|"), int(value))
+		yield family
+
+
+def record_status_transition(doc, method=None):
+	"""Runs on update of documents in `STATUS_METRICS`, new documents move from an empty status"""
+	before = doc.get_doc_before_save()
+	previous = before.status if before else ""
+	if previous != doc.status:
+		record_status_transitions(doc.doctype, [(previous, doc.status)])
+
+
+def record_status_transitions(doctype, transitions):
+	"""Count `(from, to)` status changes of documents written without hooks, e.g. in bulk"""
+	try:
+		key = frappe.cache.make_key(TRANSITIONS_KEY)
+		pipeline = frappe.cache.pipeline()
+		for previous, status in transitions:
+			pipeline.hincrby(key, f"{doctype}|{previous or ''}|{status}", 1)
+		pipeline.execute()
+	except Exception:
+		pass
+
+
+def get_refresh_interval():
+	return (
+		cint(frappe.db.get_single_value("Press Settings", "metrics_refresh_interval", cache=True))
+		or DEFAULT_REFRESH_INTERVAL
+	)
+
+
+def get_snapshot():
+	"""Latest status counts, stale ones are served while a refresh runs in the background"""
+	snapshot = frappe.cache.get_value(SNAPSHOT_KEY)
+	if not snapshot:
+		return refresh_snapshot()
+
+	if time.time() - snapshot["generated_at"] > get_refresh_interval():
+		frappe.enqueue(
+			"press.metrics.refresh_snapshot",
+			queue="short",
+			job_id="refresh_metrics_snapshot",
+			deduplicate=True,
+		)
+	return snapshot
+
+
+def refresh_snapshot():
+	start = time.monotonic()
+	statuses = {}
+	for metric, doctype, filters in STATUS_METRICS:
 		rows = frappe.get_all(
 			doctype,
-			fields=[status_field, "count(*) as count"],
+			fields=["status", "count(*) as count"],
 			filters=filters,
-			group_by=status_field,
-			order_by=f"{status_field} asc",
+			group_by="status",
+			order_by="status asc",
 			ignore_ifnull=True,
 		)
-		for row in rows:
-			c.labels(row[status_field]).set(row.count)
+		statuses[metric] = {row.status: row.count for row in rows}
+
+	snapshot = {
+		"suspend_builds": cint(frappe.db.get_value("Press Settings", None, "suspend_builds")),
+		"statuses": statuses,
+		"duration": time.monotonic() - start,
+		"generated_at": time.time(),
+	}
+	frappe.cache.set_value(SNAPSHOT_KEY, snapshot)
+	return snapshot
+
+
+class MetricsRenderer:
+	def __init__(self, path, status_code=None):
+		self.path = path
+		self.registry = CollectorRegistry(auto_describe=True)
+
+	def get_status(self, metric, counts, status_field="status"):
+		c = Gauge(metric, "", [status_field], registry=self.registry)
+		for status, count in counts.items():
+			c.labels(status).set(count)
 
 	def metrics(self):
+		start = time.monotonic()
+		snapshot = get_snapshot()
+
 		suspended_builds = Gauge(
 			"press_builds_suspended", "Are docker builds suspended", registry=self.registry
 		)
-		suspended_builds.set(
-			cint(frappe.db.get_value("Press Settings", None, "suspend_builds"))
-		)
-		self.get_status(
-			"press_deploy_candidate_total",
-			"Deploy Candidate",
-			filters={"status": ("!=", "Success")},
-		)
+		suspended_builds.set(snapshot["suspend_builds"])
 
-		self.get_status("press_site_total", "Site", filters={"status": ("!=", "Archived")})
-		self.get_status("press_bench_total", "Bench", filters={"status": ("!=", "Archived")})
-		self.get_status("press_server_total", "Server")
+		for metric, _, _ in STATUS_METRICS:
+			self.get_status(metric, snapshot["statuses"].get(metric, {}))
 
-		self.get_status("press_database_server_total", "Database Server")
-		self.get_status("press_virtual_machine_total", "Virtual Machine")
+		Gauge(
+			"press_metrics_snapshot_age_seconds",
+			"Time since status counts were computed",
+			registry=self.registry,
+		).set(time.time() - snapshot["generated_at"])
+		Gauge(
+			"press_metrics_snapshot_duration_seconds",
+			"Time taken to compute status counts",
+			registry=self.registry,
+		).set(snapshot["duration"])
 
-		self.get_status(
-			"press_site_backup_total", "Site Backup", filters={"status": ("!=", "Success")}
-		)
-		self.get_status(
-			"press_site_update_total", "Site Update", filters={"status": ("!=", "Success")}
-		)
-		self.get_status("press_site_migration_total", "Site Migration")
-		self.get_status("press_site_upgrade_total", "Version Upgrade")
+		for collector in (
+			StatusTransitionCollector(),
+			AGENT_JOB_POLL_DURATION,
+			AGENT_JOB_CALLBACK_DURATION,
+			WEBHOOK_DELIVERY_LAG,
+		):
+			self.registry.register(collector)
 
-		self.get_status("press_press_job_total", "Press Job")
-		self.get_status(
-			"press_ansible_play_total", "Ansible Play", filters={"status": ("!=", "Success")}
-		)
-		self.get_status(
-			"press_agent_job_total", "Agent Job", filters={"status": ("!=", "Success")}
-		)
+		Gauge(
+			"press_metrics_render_duration_seconds",
+			"Time taken to collect metrics for this scrape",
+			registry=self.registry,
+		).set(time.monotonic() - start)
 
 		return generate_latest(self.registry).decode("utf-8")
 
@@ -0,0 +1,29 @@
+import json
+
+import frappe
+from frappe.utils import add_to_date, now
+
+from press.press.doctype.alertmanager_alert_instance.alertmanager_alert_instance import (
+	get_repeat_interval,
+	update_alert_instances,
+)
+
+
+def execute():
+	"""Instances of alerts with ongoing incidents, from webhook logs within the alert's repeat interval"""
+	alerts = frappe.get_all(
+		"Incident",
+		filters={"status": ("in", ["Validating", "Confirmed", "Acknowledged"])},
+		pluck="alert",
+		distinct=True,
+	)
+	for alert in filter(None, alerts):
+		since = add_to_date(now(), hours=-get_repeat_interval(alert))
+		for log in frappe.get_all(
+			"Alertmanager Webhook Log",
+			filters={"alert": alert, "creation": (">", since)},
+			pluck="name",
+			order_by="creation asc",
+		):
+			log = frappe.get_doc("Alertmanager Webhook Log", log)
+			update_alert_instances(log, json.loads(log.payload)["alerts"])
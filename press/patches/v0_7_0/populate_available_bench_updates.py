@@ -0,0 +1,5 @@
+from press.press.doctype.available_bench_update.available_bench_update import rebuild_bench_updates
+
+
+def execute():
+	rebuild_bench_updates()
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 import json
+import os
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import ClassVar, TypedDict
 
 import frappe
-from frappe.utils import add_days, rounded, today
+from frappe.utils import add_days, get_datetime, now_datetime, rounded, today
 
 from press.agent import Agent
 from press.press.doctype.server.server import Server
@@ -277,45 +279,136 @@ class BackupRecordCheck(Audit):
 
 
 class OffsiteBackupCheck(Audit):
-	"""Check if files for offsite backup exists on the offsite backup provider."""
+	"""
+	Check if files for offsite backup exists on the offsite backup provider.
+
+	Daily runs only check backups created since the previous run started,
+	whether or not it found missing files, and weekly runs check all of them.
+	Remote files are checked site by site
+	against a listing of the site's prefix in the bucket the file was
+	uploaded to, so only keys of a few sites are held in memory at a time.
+	"""
 
 	audit_type = "Offsite Backup Check"
 	list_key = "Offsite Backup Remote Files unavailable in remote"
+	errors_key = "Bucket listings that failed"
+	sites_per_batch = 500
+
+	def __init__(self, full: bool = False):
+		log = {self.list_key: [], self.errors_key: []}
+		self.started = now_datetime()
+		self.settings = frappe.get_single("Press Settings")
+		self.session = self.settings.boto3_offsite_backup_session
+		self.clients = {}
+		self.since = None if full else self.get_last_check()
+
+		checked = 0
+		sites = self.get_sites()
+		for index in range(0, len(sites), self.sites_per_batch):
+			remote_files = self.get_remote_files(sites[index : index + self.sites_per_batch])
+			checked += len(remote_files)
+			unavailable, errors = self.get_unavailable_files(remote_files)
+			log[self.list_key].extend(unavailable)
+			log[self.errors_key].extend(errors)
 
-	def _get_all_files_in_s3(self) -> list[str]:
-		all_files = []
-		settings = frappe.get_single("Press Settings")
-		s3 = settings.boto3_offsite_backup_session.resource("s3")
-		for s3_object in s3.Bucket(settings.aws_s3_bucket).objects.all():
-			all_files.append(s3_object.key)
-		return all_files
+		log["Summary"] = {
+			"Since": str(self.since) if self.since else "All backups",
+			"Checked Until": str(self.started),
+			"Sites": len(sites),
+			"Checked Remote Files": checked,
+		}
+		self.log(log, "Failure" if log[self.list_key] or log[self.errors_key] else "Success")
 
-	def __init__(self):
-		log = {self.list_key: []}
-		status = "Success"
-		all_files = self._get_all_files_in_s3()
-		offsite_remote_files = frappe.db.sql(
-			"""
-			SELECT
-				remote_file.name, remote_file.file_path, site_backup.site
-			FROM
-				`tabRemote File` remote_file
-			JOIN
-				`tabSite Backup` site_backup
-			ON
-				site_backup.site = remote_file.site
-			WHERE
-				site_backup.status = "Success" and
-				site_backup.files_availability = "Available" and
-				site_backup.offsite = True
-			""",
-			as_dict=True,
+	def get_last_check(self) -> datetime | None:
+		"""Start of the previous run, so backups created while it ran are checked by this one"""
+		last_log = frappe.db.get_value(
+			"Audit Log", {"audit_type": self.audit_type}, "log", order_by="creation desc"
+		)
+		if not last_log:
+			return None
+		checked_until = json.loads(last_log).get("Summary", {}).get("Checked Until")
+		return get_datetime(checked_until) if checked_until else None
+
+	def get_backup_filters(self) -> dict:
+		filters = {"status": "Success", "files_availability": "Available", "offsite": True}
+		if self.since:
+			filters["creation"] = (">=", self.since)
+		return filters
+
+	def get_sites(self) -> list[str]:
+		return frappe.get_all(
+			"Site Backup", filters=self.get_backup_filters(), pluck="site", distinct=True, order_by="site asc"
 		)
-		for remote_file in offsite_remote_files:
-			if remote_file["file_path"] not in all_files:
-				status = "Failure"
-				log[self.list_key].append(remote_file)
-		self.log(log, status)
+
+	def get_remote_files(self, sites: list[str]) -> list[dict]:
+		"""Remote files of backups of `sites`, each joined to its own backup"""
+		site_backup = frappe.qb.DocType("Site Backup")
+		remote_file = frappe.qb.DocType("Remote File")
+		query = (
+			frappe.qb.from_(site_backup)
+			.join(remote_file)
+			.on(
+				remote_file.name.isin(
+					[
+						site_backup.remote_database_file,
+						site_backup.remote_public_file,
+						site_backup.remote_private_file,
+						site_backup.remote_config_file,
+					]
+				)
+			)
+			.select(
+				remote_file.name,
+				remote_file.file_path,
+				remote_file.bucket,
+				site_backup.site,
+				site_backup.name.as_("site_backup"),
+			)
+			.where(site_backup.site.isin(sites))
+			.where(site_backup.status == "Success")
+			.where(site_backup.files_availability == "Available")
+			.where(site_backup.offsite == 1)
+		)
+		if self.since:
+			query = query.where(site_backup.creation >= self.since)
+		return query.run(as_dict=True)
+
+	def get_unavailable_files(self, remote_files: list[dict]) -> tuple[list[dict], list[dict]]:
+		"""Files missing from their bucket, and listings that failed, so their files weren't checked"""
+		files_by_prefix = defaultdict(list)
+		for remote_file in remote_files:
+			bucket = remote_file.bucket or self.settings.aws_s3_bucket
+			files_by_prefix[(bucket, remote_file.site)].append(remote_file)
+
+		unavailable, errors = [], []
+		for (bucket, _), files in files_by_prefix.items():
+			# Backups of a site share a directory, per day, named after the site
+			prefix = os.path.commonpath([os.path.dirname(file.file_path or "") for file in files])
+			prefix = f"{prefix}/" if prefix else ""
+			try:
+				keys = self.get_keys(bucket, prefix)
+			except Exception as e:
+				errors.append({"bucket": bucket, "prefix": prefix, "files": len(files), "error": str(e)})
+				continue
+			unavailable.extend(file for file in files if file.file_path not in keys)
+		return unavailable, errors
+
+	def get_keys(self, bucket: str, prefix: str) -> set[str]:
+		keys = set()
+		paginator = self.get_client(bucket).get_paginator("list_objects_v2")
+		for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+			keys.update(s3_object["Key"] for s3_object in page.get("Contents", []))
+		return keys
+
+	def get_client(self, bucket: str):
+		if bucket not in self.clients:
+			region, endpoint_url = frappe.db.get_value(
+				"Backup Bucket", bucket, ["region", "endpoint_url"]
+			) or (None, None)
+			self.clients[bucket] = self.session.client(
+				"s3", region_name=region or None, endpoint_url=endpoint_url or None
+			)
+		return self.clients[bucket]
 
 
 def get_teams_with_paid_sites():
@@ -616,6 +709,10 @@ def check_offsite_backups():
 	OffsiteBackupCheck()
 
 
+def check_all_offsite_backups():
+	OffsiteBackupCheck(full=True)
+
+
 def check_app_server_replica_benches():
 	AppServerReplicaDirsCheck()
 
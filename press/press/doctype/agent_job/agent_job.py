@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import os
 import random
+import time
 import traceback
 from typing import TYPE_CHECKING
 
@@ -23,10 +24,11 @@ from frappe.utils import (
 
 from press.agent import Agent, AgentCallbackException, AgentRequestSkippedException
 from press.api.client import is_owned_by_team
+from press.metrics import AGENT_JOB_POLL_DURATION, record_status_transitions
+from press.press.doctype.agent_job.agent_job_callbacks import has_job_callbacks, run_job_callbacks
 from press.press.doctype.agent_job_type.agent_job_type import (
 	get_retryable_job_types_and_max_retry_count,
 )
-from press.press.doctype.site_database_user.site_database_user import SiteDatabaseUser
 from press.press.doctype.site_migration.site_migration import (
 	get_ongoing_migration,
 	process_site_migration_job_update,
@@ -34,6 +36,9 @@ from press.press.doctype.site_migration.site_migration import (
 from press.utils import log_error, timer
 
 AGENT_LOG_KEY = "agent-jobs"
+AGENT_PUSH_HEARTBEAT_KEY = "agent_job_push_heartbeat"
+# Servers pushing job updates are still polled this often, to catch lost pushes
+PUSH_FALLBACK_POLL_INTERVAL = 60
 
 
 class AgentJob(Document):
@@ -351,26 +356,24 @@ class AgentJob(Document):
 		return bool(frappe.db.get_value(self.server_type, self.server, "public"))
 
 
+JOB_DETAIL_STEP_FIELDS = ["name", "step_name", "status", "start", "end", "duration", "output"]
+
+
 def job_detail(job):
 	job = frappe.get_doc("Agent Job", job)
+	steps = frappe.get_all(
+		"Agent Job Step",
+		filters={"agent_job": job.name},
+		fields=JOB_DETAIL_STEP_FIELDS,
+		order_by="creation",
+	)
+	return build_job_detail(job, steps)
+
+
+def build_job_detail(job, job_steps):
 	steps = []
 	current = {}
-	for index, job_step in enumerate(
-		frappe.get_all(
-			"Agent Job Step",
-			filters={"agent_job": job.name},
-			fields=[
-				"name",
-				"step_name",
-				"status",
-				"start",
-				"end",
-				"duration",
-				"output",
-			],
-			order_by="creation",
-		)
-	):
+	for index, job_step in enumerate(job_steps):
 		step = {"name": job_step.step_name, "index": index, **job_step}
 		if job_step.status == "Running":
 			step["output"] = frappe.cache.hget("agent_job_step_output", job_step.name)
@@ -398,12 +401,49 @@ def job_detail(job):
 
 def publish_update(job):
 	message = job_detail(job)
+	publish_job_detail(message)
+	publish_site_update(message)
+
+
+def publish_updates(jobs: list[str]):
+	"""Same as `publish_update` for many jobs, with one site update per site"""
+	if not jobs:
+		return
+
+	steps_by_job = {}
+	for step in frappe.get_all(
+		"Agent Job Step",
+		filters={"agent_job": ("in", jobs)},
+		fields=[*JOB_DETAIL_STEP_FIELDS, "agent_job"],
+		order_by="creation",
+	):
+		steps_by_job.setdefault(step.pop("agent_job"), []).append(step)
+
+	site_messages = {}
+	for job in frappe.get_all(
+		"Agent Job",
+		filters={"name": ("in", jobs)},
+		fields=["name", "job_type", "server", "bench", "site", "status"],
+	):
+		message = build_job_detail(job, steps_by_job.get(job.name, []))
+		publish_job_detail(message)
+		if message["site"]:
+			site_messages[message["site"]] = message
+
+	for message in site_messages.values():
+		publish_site_update(message)
+
+
+def publish_job_detail(message):
+	job = message["id"]
 	frappe.publish_realtime(event="agent_job_update", doctype="Agent Job", docname=job, message=message)
 
 	# publish event for agent job list to update in dashboard
 	# we are doing this since process agent job doesn't emit list_update for job due to set_value
 	frappe.publish_realtime(event="list_update", message={"doctype": "Agent Job", "name": job})
 
+
+def publish_site_update(message):
 	# publish event for site to show job running on dashboard and update site
 	# we are doing this since process agent job doesn't emit doc_update for site due to set_value
 	if message["site"]:
@@ -424,15 +464,135 @@ def publish_update(job):
 @timer
 def poll_random_jobs(agent, pending_ids):
 	random_pending_ids = random.sample(pending_ids, k=min(100, len(pending_ids)))
-	return agent.get_jobs_status(random_pending_ids)
+	start = time.monotonic()
+	try:
+		return agent.get_jobs_status(random_pending_ids)
+	finally:
+		AGENT_JOB_POLL_DURATION.observe(time.monotonic() - start)
 
 
 @timer
 def handle_polled_jobs(polled_jobs, pending_jobs):
+	"""
+	Jobs that only progressed are written in bulk and then have their
+	callbacks run, finished jobs and jobs that need document locks go through
+	`handle_polled_job` one at a time since their callbacks must run (and roll
+	back) with their own update
+	"""
+	pending_jobs_by_id = {job.job_id: job for job in pending_jobs}
+	pair_jobs = get_pair_jobs()
+
+	progressed_jobs = []
 	for polled_job in polled_jobs:
 		if not polled_job:
 			continue
-		handle_polled_job(pending_jobs=pending_jobs, polled_job=polled_job)
+		job = pending_jobs_by_id.get(polled_job["id"])
+		if (
+			job
+			and job.get("job_type")
+			and job.job_type not in pair_jobs
+			and polled_job["status"] not in ("Success", "Failure", "Undelivered")
+		):
+			progressed_jobs.append((polled_job, job))
+		else:
+			handle_polled_job(pending_jobs=pending_jobs, polled_job=polled_job)
+
+	if progressed_jobs:
+		handle_progressed_jobs(progressed_jobs)
+
+
+def handle_progressed_jobs(jobs: list[tuple[dict, frappe._dict]]):
+	"""Write status changes of unfinished jobs and their steps with a few multi-row updates"""
+	job_names = [job.name for _, job in jobs]
+	try:
+		steps_by_job = get_unfinished_steps(job_names)
+		job_updates, step_updates = get_progressed_job_and_step_values(jobs, steps_by_job)
+		if job_updates:
+			frappe.db.bulk_update("Agent Job", job_updates)
+		if step_updates:
+			frappe.db.bulk_update("Agent Job Step", step_updates)
+
+		for polled_job, job in jobs:
+			running_steps = [
+				step
+				for step in steps_by_job.get(job.name, {}).values()
+				if step_updates.get(step.name, step)["status"] == "Running"
+			]
+			populate_output_cache(polled_job, job, running_steps)
+
+		frappe.db.commit()
+	except Exception:
+		log_error("Agent Job Poll Exception", jobs=job_names, polled=[polled for polled, _ in jobs])
+		frappe.db.rollback()
+		return
+
+	record_status_transitions(
+		"Agent Job",
+		[(job.status, polled_job["status"]) for polled_job, job in jobs if job.name in job_updates],
+	)
+
+	# Callbacks also act on running jobs (e.g. backup and build progress), so
+	# they run for every job whose status changed or whose job type has any
+	for polled_job, job in jobs:
+		if job.name in job_updates or has_job_callbacks(job.job_type):
+			process_progressed_job_updates(polled_job, job)
+
+	publish_updates(get_changed_jobs(job_names, job_updates, steps_by_job, step_updates))
+
+
+def get_changed_jobs(
+	job_names: list[str], job_updates: dict, steps_by_job: dict, step_updates: dict
+) -> list[str]:
+	if cint(frappe.get_cached_value("Press Settings", None, "realtime_job_updates")):
+		# Output of running steps is streamed even if no status changed
+		return job_names
+
+	changed_jobs = set(job_updates)
+	for job_name, steps in steps_by_job.items():
+		if any(step.name in step_updates for step in steps.values()):
+			changed_jobs.add(job_name)
+	return list(changed_jobs)
+
+
+def process_progressed_job_updates(polled_job: dict, job: frappe._dict):
+	try:
+		process_job_updates(job.name, polled_job)
+		frappe.db.commit()
+	except AgentCallbackException:
+		# Already logged, status and steps are written, so only count the failure
+		frappe.db.rollback()
+		frappe.db.set_value(
+			"Agent Job",
+			job.name,
+			"callback_failure_count",
+			job.callback_failure_count + 1,
+		)
+		frappe.db.commit()
+
+
+def get_unfinished_steps(job_names: list[str]) -> dict[str, dict[str, frappe._dict]]:
+	steps_by_job = {}
+	for step in frappe.get_all(
+		"Agent Job Step",
+		fields=["name", "status", "step_name", "agent_job"],
+		filters={"agent_job": ("in", job_names), "status": ("in", ["Pending", "Running"])},
+	):
+		steps_by_job.setdefault(step.agent_job, {})[step.step_name] = step
+	return steps_by_job
+
+
+def get_progressed_job_and_step_values(jobs, steps_by_job) -> tuple[dict, dict]:
+	job_updates, step_updates = {}, {}
+	for polled_job, job in jobs:
+		if job.status != polled_job["status"]:
+			job_updates[job.name] = get_job_values(polled_job, job)
+
+		steps = steps_by_job.get(job.name, {})
+		for polled_step in polled_job["steps"]:
+			step = steps.get(polled_step["name"])
+			if step and step.status != polled_step["status"]:
+				step_updates[step.name] = get_step_values(polled_step)
+	return job_updates, step_updates
 
 
 def add_timer_data_to_monitor(server):
@@ -452,7 +612,7 @@ def poll_pending_jobs_server(server):
 
 	pending_jobs = frappe.get_all(
 		"Agent Job",
-		fields=["name", "job_id", "status", "callback_failure_count"],
+		fields=["name", "job_id", "status", "callback_failure_count", "job_type"],
 		filters={
 			"status": ("in", ["Pending", "Running"]),
 			"job_id": ("!=", 0),
@@ -481,6 +641,53 @@ def poll_pending_jobs_server(server):
 	add_timer_data_to_monitor(server.server)
 
 
+def record_job_push(server: str):
+	frappe.cache.hset(AGENT_PUSH_HEARTBEAT_KEY, server, time.time())
+
+
+def merge_pushed_jobs(pushed_jobs: list[dict]) -> dict[int, dict]:
+	"""Squash deltas of the same job, later job fields and steps win"""
+	merged = {}
+	for pushed_job in pushed_jobs:
+		job = merged.setdefault(cint(pushed_job["id"]), {"steps": []})
+		steps = {step["name"]: step for step in job["steps"]}
+		for step in pushed_job.get("steps") or []:
+			steps[step["name"]] = step
+		job.update({key: value for key, value in pushed_job.items() if key != "steps"})
+		job["id"] = cint(pushed_job["id"])
+		job["steps"] = list(steps.values())
+	return merged
+
+
+def handle_pushed_jobs(server: str, pushed_jobs: list[dict]):
+	"""Apply job status deltas pushed by agent, see `press.api.callbacks.push_job_updates`"""
+	merged_jobs = merge_pushed_jobs(pushed_jobs)
+	pending_jobs = frappe.get_all(
+		"Agent Job",
+		# Job fields missing from a delta keep these values
+		fields=[
+			"name",
+			"job_id",
+			"status",
+			"callback_failure_count",
+			"job_type",
+			"start",
+			"end",
+			"duration",
+			"data",
+			"output",
+			"traceback",
+		],
+		filters={
+			"status": ("in", ["Pending", "Running"]),
+			"job_id": ("in", list(merged_jobs)),
+			"server": server,
+		},
+	)
+	# Deltas for jobs that are already finished (e.g. by a fallback poll) are dropped
+	handle_polled_jobs([merged_jobs[job.job_id] for job in pending_jobs], pending_jobs)
+
+
 def handle_polled_job(polled_job, pending_jobs=None, job=None):
 	job = job or find(pending_jobs, lambda x: x.job_id == polled_job["id"])
 	try:
@@ -488,7 +695,7 @@ def handle_polled_job(polled_job, pending_jobs=None, job=None):
 		# If it is worthy of an update
 		if job.status != polled_job["status"]:
 			lock_doc_updated_by_job(job.name)
-			update_job(job.name, polled_job)
+			update_job(job.name, polled_job, job)
 
 		# Update Steps' Status
 		update_steps(job.name, polled_job)
@@ -501,6 +708,8 @@ def handle_polled_job(polled_job, pending_jobs=None, job=None):
 		process_job_updates(job.name, polled_job)
 
 		frappe.db.commit()
+		if job.status != polled_job["status"]:
+			record_status_transitions("Agent Job", [(job.status, polled_job["status"])])
 		publish_update(job.name)
 	except AgentCallbackException:
 		# Don't log error for AgentCallbackException
@@ -525,15 +734,16 @@ def handle_polled_job(polled_job, pending_jobs=None, job=None):
 		frappe.db.rollback()
 
 
-def populate_output_cache(polled_job, job):
+def populate_output_cache(polled_job, job, running_steps=None):
 	if not cint(frappe.get_cached_value("Press Settings", None, "realtime_job_updates")):
 		return
-	steps = frappe.get_all(
-		"Agent Job Step",
-		filters={"agent_job": job.name, "status": "Running"},
-		fields=["name", "step_name"],
-	)
-	for step in steps:
+	if running_steps is None:
+		running_steps = frappe.get_all(
+			"Agent Job Step",
+			filters={"agent_job": job.name, "status": "Running"},
+			fields=["name", "step_name"],
+		)
+	for step in running_steps:
 		polled_step = find(polled_job["steps"], lambda x: x["name"] == step.step_name)
 		if polled_step:
 			lines = []
@@ -571,6 +781,26 @@ def filter_request_failures(servers):
 	return alive_servers
 
 
+def filter_pushing_servers(servers):
+	heartbeats = {
+		frappe.safe_decode(server): timestamp
+		for server, timestamp in (frappe.cache.hgetall(AGENT_PUSH_HEARTBEAT_KEY) or {}).items()
+	}
+	now = time.time()
+
+	servers_to_poll = []
+	for server in servers:
+		last_push = heartbeats.get(server.server)
+		if last_push and now - last_push < PUSH_FALLBACK_POLL_INTERVAL:
+			fallback_key = f"agent_job_fallback_poll:{server.server}"
+			if frappe.cache.get_value(fallback_key):
+				continue
+			frappe.cache.set_value(fallback_key, 1, expires_in_sec=PUSH_FALLBACK_POLL_INTERVAL)
+		servers_to_poll.append(server)
+
+	return servers_to_poll
+
+
 def poll_pending_jobs():
 	"""
 	Poll pending job fetches the status of Pending Jobs from all servers.
@@ -592,6 +822,16 @@ def poll_pending_jobs():
 
 	active_servers = filter_active_servers(servers)
 	alive_servers = filter_request_failures(active_servers)
+	alive_servers = filter_pushing_servers(alive_servers)
+
+	from press.press.doctype.agent_job.agent_job_poller import (
+		enqueue_concurrent_pollers,
+		is_concurrent_polling_enabled,
+	)
+
+	if is_concurrent_polling_enabled():
+		enqueue_concurrent_pollers(alive_servers)
+		return
 
 	for server in alive_servers:
 		frappe.enqueue(
@@ -685,21 +925,21 @@ def lock_doc_updated_by_job(job_name):
 	return None
 
 
-def update_job(job_name, job):
-	job_data = json.dumps(job["data"], indent=4, sort_keys=True)
-	frappe.db.set_value(
-		"Agent Job",
-		job_name,
-		{
-			"start": job["start"],
-			"end": job["end"],
-			"duration": job["duration"],
-			"status": job["status"],
-			"data": job_data,
-			"output": job["data"].get("output"),
-			"traceback": job["data"].get("traceback"),
-		},
-	)
+def update_job(job_name, job, current=None):
+	frappe.db.set_value("Agent Job", job_name, get_job_values(job, current))
+
+
+def get_job_values(job, current=None) -> dict:
+	"""Fields missing from a pushed delta keep their `current` value"""
+	current = current or {}
+	values = {field: job.get(field, current.get(field)) for field in ("start", "end", "duration", "status")}
+	if "data" in job:
+		values["data"] = json.dumps(job["data"], indent=4, sort_keys=True)
+		values["output"] = job["data"].get("output")
+		values["traceback"] = job["data"].get("traceback")
+	else:
+		values.update({field: current.get(field) for field in ("data", "output", "traceback")})
+	return values
 
 
 def update_steps(job_name, job):
@@ -726,27 +966,25 @@ def update_steps(job_name, job):
 
 
 def update_step(step_name, step):
-	step_data = json.dumps(step["data"], indent=4, sort_keys=True)
+	frappe.db.set_value("Agent Job Step", step_name, get_step_values(step))
 
+
+def get_step_values(step) -> dict:
 	output = None
 	traceback = None
 	if isinstance(step["data"], dict):
 		traceback = to_str(step["data"].get("traceback", ""))
 		output = to_str(step["data"].get("output", ""))
 
-	frappe.db.set_value(
-		"Agent Job Step",
-		step_name,
-		{
-			"start": step["start"],
-			"end": step["end"],
-			"duration": step["duration"],
-			"status": step["status"],
-			"data": step_data,
-			"output": output,
-			"traceback": traceback,
-		},
-	)
+	return {
+		"start": step["start"],
+		"end": step["end"],
+		"duration": step["duration"],
+		"status": step["status"],
+		"data": json.dumps(step["data"], indent=4, sort_keys=True),
+		"output": output,
+		"traceback": traceback,
+	}
 
 
 def skip_pending_steps(job_name):
@@ -915,210 +1153,23 @@ def update_job_ids_for_delivered_jobs(delivered_jobs):
 		)
 
 
-def process_job_updates(job_name: str, response_data: dict | None = None):  # noqa: C901
+def process_job_updates(job_name: str, response_data: dict | None = None):
 	job: "AgentJob" = frappe.get_doc("Agent Job", job_name)
 	start = now_datetime()
 
 	try:
-		from press.press.doctype.agent_job.agent_job_notifications import (
-			send_job_failure_notification,
-		)
-		from press.press.doctype.app_patch.app_patch import AppPatch
-		from press.press.doctype.bench.bench import (
-			Bench,
-			process_add_ssh_user_job_update,
-			process_archive_bench_job_update,
-			process_new_bench_job_update,
-			process_remove_ssh_user_job_update,
-		)
-		from press.press.doctype.code_server.code_server import (
-			process_archive_code_server_job_update,
-			process_new_code_server_job_update,
-			process_start_code_server_job_update,
-			process_stop_code_server_job_update,
-		)
-		from press.press.doctype.database_server.database_server import (
-			process_add_binlogs_to_indexer_agent_job_update,
-			process_remove_binlogs_from_indexer_agent_job_update,
-		)
-		from press.press.doctype.deploy_candidate_build.deploy_candidate_build import DeployCandidateBuild
-		from press.press.doctype.logical_replication_backup.logical_replication_backup import (
-			process_logical_replication_backup_activate_site_job_update,
-			process_logical_replication_backup_deactivate_site_job_update,
-			process_logical_replication_backup_update_database_host_job_update,
-		)
-		from press.press.doctype.mariadb_binlog.mariadb_binlog import (
-			process_upload_binlogs_to_s3_job_update,
-		)
-		from press.press.doctype.physical_backup_restoration.physical_backup_restoration import (
-			process_job_update as process_physical_backup_restoration_job_update,
-		)
-		from press.press.doctype.physical_backup_restoration.physical_backup_restoration import (
-			process_physical_backup_restoration_deactivate_site_job_update,
-		)
-		from press.press.doctype.proxy_server.proxy_server import (
-			process_update_nginx_job_update,
-		)
-		from press.press.doctype.server.server import process_new_server_job_update
-		from press.press.doctype.server_snapshot_recovery.server_snapshot_recovery import (
-			process_backup_database_from_snapshot_job_callback,
-			process_backup_files_from_snapshot_job_callback,
-			process_search_sites_in_snapshot_job_callback,
-		)
-		from press.press.doctype.site.erpnext_site import (
-			process_setup_erpnext_site_job_update,
-		)
-		from press.press.doctype.site.site import (
-			process_add_domain_job_update,
-			process_archive_site_job_update,
-			process_complete_setup_wizard_job_update,
-			process_create_user_job_update,
-			process_fetch_database_table_schema_job_update,
-			process_install_app_site_job_update,
-			process_migrate_site_job_update,
-			process_move_site_to_bench_job_update,
-			process_new_site_job_update,
-			process_reinstall_site_job_update,
-			process_rename_site_job_update,
-			process_restore_job_update,
-			process_restore_tables_job_update,
-			process_uninstall_app_site_job_update,
-		)
-		from press.press.doctype.site_backup.site_backup import process_backup_site_job_update
-		from press.press.doctype.site_backup.site_backup import (
-			process_deactivate_site_job_update as process_site_backup_deactivate_site_job_update,
-		)
-		from press.press.doctype.site_domain.site_domain import (
-			process_add_domain_to_upstream_job_update,
-			process_new_host_job_update,
-		)
-		from press.press.doctype.site_update.site_update import (
-			process_activate_site_job_update,
-			process_deactivate_site_job_update,
-			process_update_site_job_update,
-			process_update_site_recover_job_update,
-		)
-
-		site_migration = get_ongoing_migration(job.site)
+		site_migration = job.site and get_ongoing_migration(job.site)
 		if site_migration:
 			process_site_migration_job_update(job, site_migration)
-		elif job.job_type == "Add Upstream to Proxy":
-			process_new_server_job_update(job)
-		elif job.job_type == "New Bench":
-			process_new_bench_job_update(job)
-		elif job.job_type == "Archive Bench":
-			process_archive_bench_job_update(job)
-		elif job.job_type == "New Site":
-			process_new_site_job_update(job)
-		elif job.job_type == "New Site from Backup":
-			process_new_site_job_update(job)
-			process_restore_job_update(job, force=True)
-		elif job.job_type == "Restore Site":
-			process_restore_job_update(job)
-		elif job.job_type == "Reinstall Site":
-			process_reinstall_site_job_update(job)
-		elif job.job_type == "Migrate Site":
-			process_migrate_site_job_update(job)
-		elif job.job_type == "Install App on Site":
-			process_install_app_site_job_update(job)
-		elif job.job_type == "Uninstall App from Site":
-			process_uninstall_app_site_job_update(job)
-		elif job.job_type == "Add Site to Upstream":
-			process_new_site_job_update(job)
-		elif job.job_type == "Add Code Server to Upstream" or job.job_type == "Setup Code Server":
-			process_new_code_server_job_update(job)
-		elif job.job_type == "Start Code Server":
-			process_start_code_server_job_update(job)
-		elif job.job_type == "Stop Code Server":
-			process_stop_code_server_job_update(job)
-		elif job.job_type == "Archive Code Server" or job.job_type == "Remove Code Server from Upstream":
-			process_archive_code_server_job_update(job)
-		elif job.job_type in ["Backup Site", "Physical Backup Database"]:
-			process_backup_site_job_update(job)
-		elif job.job_type == "Archive Site" or job.job_type == "Remove Site from Upstream":
-			process_archive_site_job_update(job)
-		elif job.job_type == "Add Host to Proxy":
-			process_new_host_job_update(job)
-		elif job.job_type == "Add Domain to Upstream":
-			process_add_domain_to_upstream_job_update(job)
-		elif job.job_type == "Update Site Migrate" or job.job_type == "Update Site Pull":
-			process_update_site_job_update(job)
-		elif (
-			job.job_type == "Recover Failed Site Migrate"
-			or job.job_type == "Recover Failed Site Pull"
-			or job.job_type == "Recover Failed Site Update"
-		):
-			process_update_site_recover_job_update(job)
-		elif job.job_type == "Rename Site" or job.job_type == "Rename Site on Upstream":
-			process_rename_site_job_update(job)
-		elif job.job_type == "Setup ERPNext":
-			process_setup_erpnext_site_job_update(job)
-		elif job.job_type == "Restore Site Tables":
-			process_restore_tables_job_update(job)
-		elif job.job_type == "Add User to Proxy":
-			process_add_ssh_user_job_update(job)
-		elif job.job_type == "Remove User from Proxy":
-			process_remove_ssh_user_job_update(job)
-		elif job.job_type == "Add User to ProxySQL" or job.job_type == "Remove User from ProxySQL":
-			if job.reference_doctype == "Site Database User":
-				SiteDatabaseUser.process_job_update(job)
-		elif job.job_type == "Reload NGINX":
-			process_update_nginx_job_update(job)
-		elif job.job_type == "Move Site to Bench":
-			process_move_site_to_bench_job_update(job)
-		elif job.job_type == "Patch App":
-			AppPatch.process_patch_app(job)
-		elif job.job_type == "Run Remote Builder":
-			DeployCandidateBuild.process_run_build(job, response_data)
-		elif job.job_type == "Create User":
-			process_create_user_job_update(job)
-		elif job.job_type == "Complete Setup Wizard":
-			process_complete_setup_wizard_job_update(job)
-		elif job.job_type == "Update Bench In Place":
-			Bench.process_update_inplace(job)
-		elif job.job_type == "Recover Update In Place":
-			Bench.process_recover_update_inplace(job)
-		elif job.job_type == "Fetch Database Table Schema":
-			process_fetch_database_table_schema_job_update(job)
-		elif job.job_type in [
-			"Create Database User",
-			"Remove Database User",
-			"Modify Database User Permissions",
-		]:
-			SiteDatabaseUser.process_job_update(job)
-		elif job.job_type == "Physical Restore Database":
-			process_physical_backup_restoration_job_update(job)
-		elif job.job_type == "Deactivate Site" and job.reference_doctype == "Site Update":
-			process_deactivate_site_job_update(job)
-		elif job.job_type == "Activate Site" and job.reference_doctype == "Site Update":
-			process_activate_site_job_update(job)
-		elif job.job_type == "Activate Site" and job.reference_doctype == "Logical Replication Backup":
-			process_logical_replication_backup_activate_site_job_update(job)
-		elif job.job_type == "Deactivate Site" and job.reference_doctype == "Site Backup":
-			process_site_backup_deactivate_site_job_update(job)
-		elif job.job_type == "Deactivate Site" and job.reference_doctype == "Physical Backup Restoration":
-			process_physical_backup_restoration_deactivate_site_job_update(job)
-		elif job.job_type == "Deactivate Site" and job.reference_doctype == "Logical Replication Backup":
-			process_logical_replication_backup_deactivate_site_job_update(job)
-		elif job.job_type == "Update Database Host" and job.reference_doctype == "Logical Replication Backup":
-			process_logical_replication_backup_update_database_host_job_update(job)
-		elif job.job_type == "Add Domain":
-			process_add_domain_job_update(job)
-		elif job.job_type == "Add Binlogs To Indexer":
-			process_add_binlogs_to_indexer_agent_job_update(job)
-		elif job.job_type == "Remove Binlogs From Indexer":
-			process_remove_binlogs_from_indexer_agent_job_update(job)
-		elif job.job_type == "Upload Binlogs To S3":
-			process_upload_binlogs_to_s3_job_update(job)
-		elif job.job_type == "Search Sites In Snapshot":
-			process_search_sites_in_snapshot_job_callback(job)
-		elif job.job_type == "Backup Database From Snapshot":
-			process_backup_database_from_snapshot_job_callback(job)
-		elif job.job_type == "Backup Files From Snapshot":
-			process_backup_files_from_snapshot_job_callback(job)
+		else:
+			run_job_callbacks(job, response_data)
 
 		# send failure notification if job failed
 		if job.status == "Failure":
+			from press.press.doctype.agent_job.agent_job_notifications import (
+				send_job_failure_notification,
+			)
+
 			send_job_failure_notification(job)
 
 		log_update(job, start)
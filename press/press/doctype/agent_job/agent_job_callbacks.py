@@ -0,0 +1,252 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Callbacks run by `process_job_updates` once an agent job is polled.
+
+Callbacks are registered per job type as `module:attribute` paths, so this
+module doesn't import every doctype that handles agent jobs. Modules are
+imported on first use and looked up in a dict for every job after that.
+"""
+
+from __future__ import annotations
+
+import importlib
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import frappe
+
+from press.metrics import AGENT_JOB_CALLBACK_DURATION
+
+if TYPE_CHECKING:
+	from press.press.doctype.agent_job.agent_job import AgentJob
+
+CALLBACK_STATS_KEY = "agent_job_callback_stats"
+
+
+@dataclass(frozen=True)
+class JobCallback:
+	method: str
+	# Only run for jobs created for this reference doctype
+	reference_doctype: str | None = None
+	# Pass polled response as the second argument
+	with_response: bool = False
+	kwargs: dict = field(default_factory=dict)
+
+	def applies_to(self, job: AgentJob) -> bool:
+		return not self.reference_doctype or job.reference_doctype == self.reference_doctype
+
+	def __call__(self, job: AgentJob, response_data: dict | None = None):
+		module, _, attribute = self.method.partition(":")
+		function = get_module(module)
+		for part in attribute.split("."):
+			function = getattr(function, part)
+
+		if self.with_response:
+			return function(job, response_data, **self.kwargs)
+		return function(job, **self.kwargs)
+
+
+_modules = {}
+_registry: dict[str, list[JobCallback]] = {}
+
+
+def get_module(name: str):
+	if name not in _modules:
+		_modules[name] = importlib.import_module(name)
+	return _modules[name]
+
+
+def register_job_callback(job_types: str | list[str], method: str, **options):
+	"""Run `method` (`module:attribute`) for jobs of `job_types`, in order of registration"""
+	if isinstance(job_types, str):
+		job_types = [job_types]
+
+	callback = JobCallback(method, **options)
+	for job_type in job_types:
+		_registry.setdefault(job_type, []).append(callback)
+
+
+def get_job_callbacks(job: AgentJob) -> list[JobCallback]:
+	return [callback for callback in _registry.get(job.job_type, ()) if callback.applies_to(job)]
+
+
+def has_job_callbacks(job_type: str) -> bool:
+	return bool(_registry.get(job_type))
+
+
+def run_job_callbacks(job: AgentJob, response_data: dict | None = None):
+	for callback in get_job_callbacks(job):
+		start = time.monotonic()
+		try:
+			callback(job, response_data)
+		except Exception:
+			record_callback(callback.method, time.monotonic() - start, failed=True)
+			raise
+		record_callback(callback.method, time.monotonic() - start)
+
+
+def record_callback(method: str, duration: float, failed: bool = False):
+	try:
+		key = frappe.cache.make_key(CALLBACK_STATS_KEY)
+		pipeline = frappe.cache.pipeline()
+		pipeline.hincrby(key, f"{method}|calls", 1)
+		pipeline.hincrbyfloat(key, f"{method}|seconds", duration)
+		if failed:
+			pipeline.hincrby(key, f"{method}|failures", 1)
+		pipeline.execute()
+	except Exception:
+		# Stats are best effort, never fail a callback because of them
+		pass
+	AGENT_JOB_CALLBACK_DURATION.observe(duration, method)
+
+
+def get_callback_stats() -> dict[str, dict]:
+	"""Calls, failures and total seconds spent per callback method"""
+	raw = frappe.cache.execute_command("HGETALL", frappe.cache.make_key(CALLBACK_STATS_KEY)) or {}
+	stats = {}
+	for key, value in raw.items():
+		method, _, metric = frappe.safe_decode(key).rpartition("|")
+		stats.setdefault(method, {"calls": 0, "failures": 0, "seconds": 0.0})
+		stats[method][metric] = float(value) if metric == "seconds" else int(value)
+	return stats
+
+
+SITE = "press.press.doctype.site.site"
+SITE_UPDATE = "press.press.doctype.site_update.site_update"
+CODE_SERVER = "press.press.doctype.code_server.code_server"
+BENCH = "press.press.doctype.bench.bench"
+DATABASE_SERVER = "press.press.doctype.database_server.database_server"
+SNAPSHOT_RECOVERY = "press.press.doctype.server_snapshot_recovery.server_snapshot_recovery"
+LOGICAL_REPLICATION_BACKUP = "press.press.doctype.logical_replication_backup.logical_replication_backup"
+PHYSICAL_BACKUP_RESTORATION = "press.press.doctype.physical_backup_restoration.physical_backup_restoration"
+SITE_DATABASE_USER = "press.press.doctype.site_database_user.site_database_user"
+
+register_job_callback(
+	"Add Upstream to Proxy", "press.press.doctype.server.server:process_new_server_job_update"
+)
+register_job_callback("New Bench", f"{BENCH}:process_new_bench_job_update")
+register_job_callback("Archive Bench", f"{BENCH}:process_archive_bench_job_update")
+register_job_callback(
+	["New Site", "New Site from Backup", "Add Site to Upstream"], f"{SITE}:process_new_site_job_update"
+)
+register_job_callback("New Site from Backup", f"{SITE}:process_restore_job_update", kwargs={"force": True})
+register_job_callback("Restore Site", f"{SITE}:process_restore_job_update")
+register_job_callback("Reinstall Site", f"{SITE}:process_reinstall_site_job_update")
+register_job_callback("Migrate Site", f"{SITE}:process_migrate_site_job_update")
+register_job_callback("Install App on Site", f"{SITE}:process_install_app_site_job_update")
+register_job_callback("Uninstall App from Site", f"{SITE}:process_uninstall_app_site_job_update")
+register_job_callback(
+	["Add Code Server to Upstream", "Setup Code Server"], f"{CODE_SERVER}:process_new_code_server_job_update"
+)
+register_job_callback("Start Code Server", f"{CODE_SERVER}:process_start_code_server_job_update")
+register_job_callback("Stop Code Server", f"{CODE_SERVER}:process_stop_code_server_job_update")
+register_job_callback(
+	["Archive Code Server", "Remove Code Server from Upstream"],
+	f"{CODE_SERVER}:process_archive_code_server_job_update",
+)
+register_job_callback(
+	["Backup Site", "Physical Backup Database"],
+	"press.press.doctype.site_backup.site_backup:process_backup_site_job_update",
+)
+register_job_callback(
+	["Archive Site", "Remove Site from Upstream"], f"{SITE}:process_archive_site_job_update"
+)
+register_job_callback(
+	"Add Host to Proxy", "press.press.doctype.site_domain.site_domain:process_new_host_job_update"
+)
+register_job_callback(
+	"Add Domain to Upstream",
+	"press.press.doctype.site_domain.site_domain:process_add_domain_to_upstream_job_update",
+)
+register_job_callback(
+	["Update Site Migrate", "Update Site Pull"], f"{SITE_UPDATE}:process_update_site_job_update"
+)
+register_job_callback(
+	["Recover Failed Site Migrate", "Recover Failed Site Pull", "Recover Failed Site Update"],
+	f"{SITE_UPDATE}:process_update_site_recover_job_update",
+)
+register_job_callback(["Rename Site", "Rename Site on Upstream"], f"{SITE}:process_rename_site_job_update")
+register_job_callback(
+	"Setup ERPNext", "press.press.doctype.site.erpnext_site:process_setup_erpnext_site_job_update"
+)
+register_job_callback("Restore Site Tables", f"{SITE}:process_restore_tables_job_update")
+register_job_callback("Add User to Proxy", f"{BENCH}:process_add_ssh_user_job_update")
+register_job_callback("Remove User from Proxy", f"{BENCH}:process_remove_ssh_user_job_update")
+register_job_callback(
+	["Add User to ProxySQL", "Remove User from ProxySQL"],
+	f"{SITE_DATABASE_USER}:SiteDatabaseUser.process_job_update",
+	reference_doctype="Site Database User",
+)
+register_job_callback(
+	"Reload NGINX", "press.press.doctype.proxy_server.proxy_server:process_update_nginx_job_update"
+)
+register_job_callback("Move Site to Bench", f"{SITE}:process_move_site_to_bench_job_update")
+register_job_callback("Patch App", "press.press.doctype.app_patch.app_patch:AppPatch.process_patch_app")
+register_job_callback(
+	"Run Remote Builder",
+	"press.press.doctype.deploy_candidate_build.deploy_candidate_build:DeployCandidateBuild.process_run_build",
+	with_response=True,
+)
+register_job_callback("Create User", f"{SITE}:process_create_user_job_update")
+register_job_callback("Complete Setup Wizard", f"{SITE}:process_complete_setup_wizard_job_update")
+register_job_callback("Update Bench In Place", f"{BENCH}:Bench.process_update_inplace")
+register_job_callback("Recover Update In Place", f"{BENCH}:Bench.process_recover_update_inplace")
+register_job_callback("Fetch Database Table Schema", f"{SITE}:process_fetch_database_table_schema_job_update")
+register_job_callback(
+	["Create Database User", "Remove Database User", "Modify Database User Permissions"],
+	f"{SITE_DATABASE_USER}:SiteDatabaseUser.process_job_update",
+)
+register_job_callback("Physical Restore Database", f"{PHYSICAL_BACKUP_RESTORATION}:process_job_update")
+register_job_callback(
+	"Deactivate Site", f"{SITE_UPDATE}:process_deactivate_site_job_update", reference_doctype="Site Update"
+)
+register_job_callback(
+	"Activate Site", f"{SITE_UPDATE}:process_activate_site_job_update", reference_doctype="Site Update"
+)
+register_job_callback(
+	"Activate Site",
+	f"{LOGICAL_REPLICATION_BACKUP}:process_logical_replication_backup_activate_site_job_update",
+	reference_doctype="Logical Replication Backup",
+)
+register_job_callback(
+	"Deactivate Site",
+	"press.press.doctype.site_backup.site_backup:process_deactivate_site_job_update",
+	reference_doctype="Site Backup",
+)
+register_job_callback(
+	"Deactivate Site",
+	f"{PHYSICAL_BACKUP_RESTORATION}:process_physical_backup_restoration_deactivate_site_job_update",
+	reference_doctype="Physical Backup Restoration",
+)
+register_job_callback(
+	"Deactivate Site",
+	f"{LOGICAL_REPLICATION_BACKUP}:process_logical_replication_backup_deactivate_site_job_update",
+	reference_doctype="Logical Replication Backup",
+)
+register_job_callback(
+	"Update Database Host",
+	f"{LOGICAL_REPLICATION_BACKUP}:process_logical_replication_backup_update_database_host_job_update",
+	reference_doctype="Logical Replication Backup",
+)
+register_job_callback("Add Domain", f"{SITE}:process_add_domain_job_update")
+register_job_callback(
+	"Add Binlogs To Indexer", f"{DATABASE_SERVER}:process_add_binlogs_to_indexer_agent_job_update"
+)
+register_job_callback(
+	"Remove Binlogs From Indexer", f"{DATABASE_SERVER}:process_remove_binlogs_from_indexer_agent_job_update"
+)
+register_job_callback(
+	"Upload Binlogs To S3",
+	"press.press.doctype.mariadb_binlog.mariadb_binlog:process_upload_binlogs_to_s3_job_update",
+)
+register_job_callback(
+	"Search Sites In Snapshot", f"{SNAPSHOT_RECOVERY}:process_search_sites_in_snapshot_job_callback"
+)
+register_job_callback(
+	"Backup Database From Snapshot", f"{SNAPSHOT_RECOVERY}:process_backup_database_from_snapshot_job_callback"
+)
+register_job_callback(
+	"Backup Files From Snapshot", f"{SNAPSHOT_RECOVERY}:process_backup_files_from_snapshot_job_callback"
+)
@@ -0,0 +1,216 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Poll pending agent jobs of many servers from a single worker.
+
+`poll_pending_jobs_server` polls one server per background job, builds a new
+`Agent` and opens a new connection on every poll. With hundreds of servers the
+short queue spends most of its time on TLS handshakes and worker churn.
+
+`AgentJobPoller` instead fetches job statuses of a batch of servers concurrently
+from a thread pool, reusing a keep-alive session per server. Threads only make
+HTTP requests, everything that touches the database (loading pending jobs,
+decrypting credentials, handling polled jobs) happens on the calling thread.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+import requests
+from frappe.monitor import add_data_to_monitor
+from frappe.utils.caching import site_cache
+from frappe.utils.password import get_decrypted_password
+
+from press.agent import Agent
+from press.metrics import AGENT_JOB_POLL_DURATION
+from press.press.doctype.agent_job.agent_job import handle_polled_jobs, retry_undelivered_jobs
+from press.utils import log_error
+
+POLLER_STATS_KEY = "agent_job_poller_stats"
+DEFAULT_POLLER_WORKERS = 32
+SERVERS_PER_POLLER = 250
+MAX_JOBS_PER_POLL = 100
+
+# Sessions outlive a single poll cycle when the worker process is reused
+_sessions: dict[str, requests.Session] = {}
+
+
+def get_session(server: str) -> requests.Session:
+	if server not in _sessions:
+		_sessions[server] = requests.Session()
+	return _sessions[server]
+
+
+@site_cache(ttl=5 * 60)
+def get_agent_password(server_type: str, server: str) -> str:
+	return get_decrypted_password(server_type, server, "agent_password")
+
+
+def is_concurrent_polling_enabled() -> bool:
+	return bool(
+		frappe.db.get_single_value("Press Settings", "concurrent_agent_job_polling", cache=True)
+	)
+
+
+def enqueue_concurrent_pollers(servers: list[frappe._dict]):
+	for index in range(0, len(servers), SERVERS_PER_POLLER):
+		frappe.enqueue(
+			"press.press.doctype.agent_job.agent_job_poller.poll_pending_jobs_concurrently",
+			queue="short",
+			servers=servers[index : index + SERVERS_PER_POLLER],
+			batch=index // SERVERS_PER_POLLER,
+			job_id=f"poll_pending_jobs_concurrently:{index // SERVERS_PER_POLLER}",
+			deduplicate=True,
+		)
+
+
+def poll_pending_jobs_concurrently(servers: list[frappe._dict], batch: int = 0):
+	servers = [frappe._dict(server) for server in servers]
+	AgentJobPoller(servers, batch=batch).run()
+
+
+class AgentJobPoller:
+	def __init__(self, servers: list[frappe._dict], batch: int = 0, max_workers: int | None = None):
+		self.servers = servers
+		self.batch = batch
+		self.max_workers = max_workers or (
+			frappe.db.get_single_value("Press Settings", "agent_job_poller_workers", cache=True)
+			or DEFAULT_POLLER_WORKERS
+		)
+		self.latencies: dict[str, float] = {}
+		self.failures: dict[str, str] = {}
+
+	def run(self):
+		start = time.monotonic()
+		servers = self.filter_pollable_servers(self.servers)
+		pending_jobs = self.get_pending_jobs(servers)
+
+		targets = [server for server in servers if pending_jobs.get(server.server)]
+		polled = self.fetch_jobs_status(targets, pending_jobs)
+
+		for server in servers:
+			polled_jobs = polled.get(server.server)
+			try:
+				if polled_jobs:
+					handle_polled_jobs(polled_jobs, pending_jobs[server.server])
+				retry_undelivered_jobs(server)
+			except Exception:
+				log_error("Agent Job Poller Exception", server=server)
+				frappe.db.rollback()
+
+		self.record_stats(len(servers), time.monotonic() - start)
+
+	def filter_pollable_servers(self, servers: list[frappe._dict]) -> list[frappe._dict]:
+		"""Drop servers that are inactive or have agent jobs halted, in one query per server type"""
+		pollable = []
+		by_type = defaultdict(list)
+		for server in servers:
+			by_type[server.server_type].append(server)
+
+		for server_type, typed_servers in by_type.items():
+			filters = {"name": ("in", [s.server for s in typed_servers]), "status": "Active"}
+			if server_type in ("Server", "Database Server", "Proxy Server"):
+				filters["halt_agent_jobs"] = 0
+			active = set(frappe.get_all(server_type, filters, pluck="name"))
+			pollable.extend(s for s in typed_servers if s.server in active)
+
+		return pollable
+
+	def get_pending_jobs(self, servers: list[frappe._dict]) -> dict[str, list[frappe._dict]]:
+		if not servers:
+			return {}
+
+		pending_jobs = defaultdict(list)
+		for job in frappe.get_all(
+			"Agent Job",
+			fields=["name", "job_id", "status", "callback_failure_count", "job_type", "server"],
+			filters={
+				"status": ("in", ["Pending", "Running"]),
+				"job_id": ("!=", 0),
+				"server": ("in", [s.server for s in servers]),
+			},
+			order_by="job_id",
+			ignore_ifnull=True,
+		):
+			pending_jobs[job.server].append(job)
+		return pending_jobs
+
+	def fetch_jobs_status(
+		self, servers: list[frappe._dict], pending_jobs: dict[str, list[frappe._dict]]
+	) -> dict[str, list[dict]]:
+		if not servers:
+			return {}
+
+		# Build requests on this thread, worker threads don't have a database connection
+		verify = Agent(servers[0].server, server_type=servers[0].server_type).get_verify()
+		requests_to_make = []
+		for server in servers:
+			agent = Agent(server.server, server_type=server.server_type)
+			ids = [job.job_id for job in pending_jobs[server.server]]
+			ids = random.sample(ids, k=min(MAX_JOBS_PER_POLL, len(ids)))
+			headers = agent.get_headers(password=get_agent_password(server.server_type, server.server))
+			requests_to_make.append((server, agent.get_url(f"jobs/{','.join(map(str, ids))}"), headers, ids))
+
+		polled = {}
+		with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests_to_make))) as executor:
+			futures = [
+				(server, executor.submit(self._fetch, server.server, url, headers, verify))
+				for server, url, headers, _ in requests_to_make
+			]
+			for (server, future), (_, _, _, ids) in zip(futures, requests_to_make, strict=True):
+				try:
+					result = future.result()
+				except Exception as exc:
+					self.handle_fetch_failure(server, exc)
+					continue
+				polled[server.server] = [result] if len(ids) == 1 else result
+
+		return polled
+
+	def _fetch(self, server: str, url: str, headers: dict, verify: bool | str):
+		start = time.monotonic()
+		try:
+			response = get_session(server).get(url, headers=headers, verify=verify, timeout=(10, 30))
+			response.raise_for_status()
+			return response.json()
+		finally:
+			self.latencies[server] = round(time.monotonic() - start, 3)
+
+	def handle_fetch_failure(self, server: frappe._dict, exc: Exception):
+		self.failures[server.server] = repr(exc)
+		if isinstance(exc, requests.ConnectionError | requests.Timeout):
+			# Same as a failed Agent.request, skip this server until the failure expires
+			_sessions.pop(server.server, None)
+			Agent(server.server, server_type=server.server_type).log_request_failure(exc)
+			frappe.db.commit()
+		else:
+			log_error("Agent Job Poll Request Exception", server=server, exception=exc)
+
+	def record_stats(self, server_count: int, duration: float):
+		stats = {
+			"timestamp": frappe.utils.now(),
+			"servers": server_count,
+			"cycle_duration": round(duration, 3),
+			"latencies": self.latencies,
+			"failures": self.failures,
+		}
+		add_data_to_monitor(agent_job_poller={k: v for k, v in stats.items() if k != "latencies"})
+		AGENT_JOB_POLL_DURATION.observe_many([(latency, ()) for latency in self.latencies.values()])
+		frappe.cache.hset(POLLER_STATS_KEY, str(self.batch), stats)
+
+
+def get_poller_stats() -> dict:
+	"""Latest poll cycle stats merged across all poller batches"""
+	batches = (frappe.cache.hgetall(POLLER_STATS_KEY) or {}).values()
+	stats = {"servers": 0, "cycle_duration": 0.0, "latencies": {}, "failures": {}}
+	for batch in batches:
+		stats["servers"] += batch["servers"]
+		stats["cycle_duration"] = max(stats["cycle_duration"], batch["cycle_duration"])
+		stats["latencies"].update(batch["latencies"])
+		stats["failures"].update(batch["failures"])
+	return stats
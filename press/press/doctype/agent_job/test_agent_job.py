@@ -14,7 +14,15 @@ from frappe.model.naming import make_autoname
 from frappe.tests.utils import FrappeTestCase
 
 from press.agent import Agent
-from press.press.doctype.agent_job.agent_job import AgentJob, lock_doc_updated_by_job
+from press.press.doctype.agent_job.agent_job import (
+	AgentJob,
+	handle_polled_jobs,
+	handle_pushed_jobs,
+	lock_doc_updated_by_job,
+	merge_pushed_jobs,
+)
+from press.press.doctype.agent_job.agent_job_callbacks import get_job_callbacks
+from press.press.doctype.agent_job.agent_job_poller import get_poller_stats, poll_pending_jobs_concurrently
 from press.press.doctype.site.test_site import create_test_site
 from press.press.doctype.team.test_team import create_test_press_admin_team
 from press.utils.test import foreground_enqueue, foreground_enqueue_doc
@@ -285,3 +293,148 @@ class TestAgentJob(FrappeTestCase):
 		self.assertEqual(in_execution_job.name, job.name)
 
 		frappe.db.set_single_value("Press Settings", "disable_agent_job_deduplication", True)
+
+	@responses.activate
+	def test_concurrent_poller_updates_polled_jobs(self):
+		site = create_test_site()
+		site.update_site_config({"maintenance_mode": "1"})
+		job = frappe.get_last_doc("Agent Job", {"job_type": "Update Site Configuration"})
+		job.db_set({"job_id": 42, "status": "Pending"})
+		responses.get(
+			f"https://{job.server}:443/agent/jobs/42",
+			json={
+				"id": 42,
+				"status": "Success",
+				"data": {},
+				"steps": [],
+				"start": "2023-08-20 18:24:28.009786",
+				"end": "2023-08-20 18:24:41.506067",
+				"duration": "00:00:13.496281",
+			},
+		)
+
+		with patch("press.press.doctype.agent_job.agent_job.frappe.db.commit", new=Mock()):
+			poll_pending_jobs_concurrently([{"server": job.server, "server_type": job.server_type}])
+
+		job.reload()
+		self.assertEqual(job.status, "Success")
+		self.assertIn(job.server, get_poller_stats()["latencies"])
+
+	def test_merge_pushed_jobs_keeps_latest_job_and_step_status(self):
+		merged = merge_pushed_jobs(
+			[
+				{"id": 7, "status": "Running", "steps": [{"name": "Pull", "status": "Running"}]},
+				{"id": "7", "status": "Success", "steps": [{"name": "Pull", "status": "Success"}]},
+				{"id": 8, "status": "Running"},
+			]
+		)
+		self.assertEqual(merged[7]["status"], "Success")
+		self.assertEqual(merged[7]["steps"], [{"name": "Pull", "status": "Success"}])
+		self.assertEqual(merged[8]["steps"], [])
+
+	def test_pushed_job_updates_are_applied_to_pending_jobs(self):
+		site = create_test_site()
+		site.update_site_config({"maintenance_mode": "1"})
+		job = frappe.get_last_doc("Agent Job", {"job_type": "Update Site Configuration"})
+		job.db_set({"job_id": 43, "status": "Pending"})
+
+		with patch("press.press.doctype.agent_job.agent_job.frappe.db.commit", new=Mock()):
+			handle_pushed_jobs(
+				job.server,
+				[{"id": 43, "status": "Success", "start": None, "end": None, "duration": None}],
+			)
+
+		job.reload()
+		self.assertEqual(job.status, "Success")
+
+	def test_pushed_job_delta_keeps_missing_job_fields(self):
+		site = create_test_site()
+		site.update_site_config({"maintenance_mode": "1"})
+		job = frappe.get_last_doc("Agent Job", {"job_type": "Update Site Configuration"})
+		start = frappe.utils.now_datetime().replace(microsecond=0)
+		job.db_set({"job_id": 45, "status": "Pending", "start": start, "output": "Started"})
+
+		with patch("press.press.doctype.agent_job.agent_job.frappe.db.commit", new=Mock()):
+			handle_pushed_jobs(job.server, [{"id": 45, "status": "Success"}])
+
+		job.reload()
+		self.assertEqual(job.status, "Success")
+		self.assertEqual(job.start, start)
+		self.assertEqual(job.output, "Started")
+
+	def test_progressed_jobs_are_updated_in_bulk(self):
+		site = create_test_site()
+		site.update_site_config({"maintenance_mode": "1"})
+		job = frappe.get_last_doc("Agent Job", {"job_type": "Update Site Configuration"})
+		job.db_set({"job_id": 44, "status": "Pending"})
+		pending_job = frappe._dict(
+			name=job.name, job_id=44, status="Pending", job_type=job.job_type, callback_failure_count=0
+		)
+		polled_job = {
+			"id": 44,
+			"status": "Running",
+			"data": {},
+			"steps": [],
+			"start": "2023-08-20 18:24:28.009786",
+			"end": None,
+			"duration": None,
+		}
+
+		with (
+			patch("press.press.doctype.agent_job.agent_job.frappe.db.commit", new=Mock()),
+			patch("press.press.doctype.agent_job.agent_job.handle_polled_job") as handle_polled_job,
+			patch("press.press.doctype.agent_job.agent_job.publish_updates") as publish_updates,
+		):
+			handle_polled_jobs([polled_job], [pending_job])
+
+		handle_polled_job.assert_not_called()
+		publish_updates.assert_called_once_with([job.name])
+		job.reload()
+		self.assertEqual(job.status, "Running")
+
+	def test_callbacks_of_running_jobs_run_after_bulk_update(self):
+		site = create_test_site()
+		site.update_site_config({"maintenance_mode": "1"})
+		job = frappe.get_last_doc("Agent Job", {"job_type": "Update Site Configuration"})
+		job.db_set({"job_id": 45, "status": "Running", "job_type": "Backup Site"})
+		pending_job = frappe._dict(
+			name=job.name, job_id=45, status="Running", job_type="Backup Site", callback_failure_count=0
+		)
+		polled_job = {
+			"id": 45,
+			"status": "Running",
+			"data": {},
+			"steps": [],
+			"start": "2023-08-20 18:24:28.009786",
+			"end": None,
+			"duration": None,
+		}
+
+		with (
+			patch("press.press.doctype.agent_job.agent_job.frappe.db.commit", new=Mock()),
+			patch("press.press.doctype.agent_job.agent_job.handle_polled_job") as handle_polled_job,
+			patch(
+				"press.press.doctype.site_backup.site_backup.process_backup_site_job_update"
+			) as process_backup_site_job_update,
+		):
+			handle_polled_jobs([polled_job], [pending_job])
+
+		handle_polled_job.assert_not_called()
+		process_backup_site_job_update.assert_called_once()
+		self.assertEqual(process_backup_site_job_update.call_args.args[0].name, job.name)
+
+	def test_job_callbacks_are_looked_up_by_job_type_and_reference(self):
+		new_site_from_backup = frappe._dict(job_type="New Site from Backup", reference_doctype=None)
+		self.assertEqual(
+			[callback.method.rpartition(":")[2] for callback in get_job_callbacks(new_site_from_backup)],
+			["process_new_site_job_update", "process_restore_job_update"],
+		)
+
+		deactivate_for_update = frappe._dict(job_type="Deactivate Site", reference_doctype="Site Update")
+		self.assertEqual(
+			[callback.method for callback in get_job_callbacks(deactivate_for_update)],
+			["press.press.doctype.site_update.site_update:process_deactivate_site_job_update"],
+		)
+
+		deactivate_for_other = frappe._dict(job_type="Deactivate Site", reference_doctype="Site")
+		self.assertEqual(get_job_callbacks(deactivate_for_other), [])
@@ -0,0 +1,156 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+if TYPE_CHECKING:
+	from press.press.doctype.alertmanager_webhook_log.alertmanager_webhook_log import (
+		AlertmanagerWebhookLog,
+	)
+
+
+class AlertmanagerAlertInstance(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		alert: DF.Link
+		instance: DF.Data
+		last_fired_at: DF.Datetime | None
+		last_resolved_at: DF.Datetime | None
+		scope: DF.Data | None
+		severity: DF.Literal["Critical", "Warning", "Information"]
+		status: DF.Literal["Firing", "Resolved"]
+	# end: auto-generated types
+
+	@staticmethod
+	def clear_old_logs(days=30):
+		table = frappe.qb.DocType("Alertmanager Alert Instance")
+		frappe.db.delete(table, filters=(table.modified < (Now() - Interval(days=days))))
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Alertmanager Alert Instance",
+		["alert", "scope", "instance"],
+		constraint_name="unique_alert_scope_instance",
+	)
+	frappe.db.add_index("Alertmanager Alert Instance", ["alert", "scope", "status"])
+
+
+STATE_COLUMNS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"alert",
+	"scope",
+	"instance",
+	"severity",
+	"status",
+	"last_fired_at",
+	"last_resolved_at",
+)
+
+
+def update_alert_instances(log: AlertmanagerWebhookLog, alerts: list[dict]):
+	"""Upsert latest status of every instance in a webhook, keyed by alert, scope and instance"""
+	rows = []
+	for alert in alerts:
+		instance = alert.get("labels", {}).get("instance")
+		if not instance:
+			continue
+		status = (alert.get("status") or log.status).capitalize()
+		rows.append(
+			(
+				frappe.generate_hash(length=10),
+				log.creation,
+				log.creation,
+				frappe.session.user,
+				frappe.session.user,
+				log.alert,
+				log.incident_scope or "",
+				instance,
+				log.severity,
+				status,
+				log.creation if status == "Firing" else None,
+				log.creation if status == "Resolved" else None,
+			)
+		)
+	if not rows:
+		return
+
+	columns = ", ".join(f"`{column}`" for column in STATE_COLUMNS)
+	placeholders = ", ".join([f"({', '.join(['%s'] * len(STATE_COLUMNS))})"] * len(rows))
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabAlertmanager Alert Instance` ({columns})
+		VALUES {placeholders}
+		ON DUPLICATE KEY UPDATE
+			`modified` = VALUES(`modified`),
+			`severity` = VALUES(`severity`),
+			`status` = VALUES(`status`),
+			`last_fired_at` = IFNULL(VALUES(`last_fired_at`), `last_fired_at`),
+			`last_resolved_at` = IFNULL(VALUES(`last_resolved_at`), `last_resolved_at`)
+		""",
+		[value for row in rows for value in row],
+	)
+
+
+def get_instances(alert: str, scope: str, status: str, since, severity: str | None = None) -> set[str]:
+	"""Instances of an alert in a scope with the latest status, that changed to it after `since`"""
+	filters = {
+		"alert": alert,
+		"scope": scope or "",
+		"status": status,
+		"last_fired_at" if status == "Firing" else "last_resolved_at": (">", since),
+	}
+	if severity:
+		filters["severity"] = severity
+	return set(frappe.get_all("Alertmanager Alert Instance", filters=filters, pluck="instance"))
+
+
+def get_firing_counts(alert: str, severity: str, scopes: list[str], since) -> dict[str, tuple[int, bool]]:
+	"""
+	Number of instances of a severity still firing since `since` in each scope,
+	and whether any of them has been resolved, with one grouped query
+	"""
+	if not scopes:
+		return {}
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			`scope`,
+			SUM(`status` = 'Firing' AND `last_fired_at` > %(since)s) AS firing,
+			MAX(`last_resolved_at`) AS last_resolved_at
+		FROM
+			`tabAlertmanager Alert Instance`
+		WHERE
+			`alert` = %(alert)s AND `severity` = %(severity)s AND `scope` IN %(scopes)s
+		GROUP BY
+			`scope`
+		""",
+		{"alert": alert, "severity": severity, "scopes": tuple(scopes), "since": since},
+		as_dict=True,
+	)
+	return {row.scope: (int(row.firing or 0), bool(row.last_resolved_at)) for row in rows}
+
+
+def get_repeat_interval(alert: str) -> int:
+	"""Repeat interval of an alert rule in hours"""
+	repeat_interval = str(frappe.db.get_value("Prometheus Alert Rule", alert, "repeat_interval"))
+	assert repeat_interval.endswith("h"), f"Repeat interval not in hours: {repeat_interval}"
+	hours = repeat_interval.split("h")[0]  # only handles hours
+	return int(hours)
@@ -16,6 +16,11 @@ from frappe.utils.data import add_to_date
 from frappe.utils.synchronization import filelock
 
 from press.exceptions import AlertRuleNotEnabled
+from press.press.doctype.alertmanager_alert_instance.alertmanager_alert_instance import (
+	get_instances,
+	get_repeat_interval,
+	update_alert_instances,
+)
 from press.press.doctype.incident.incident import (
 	INCIDENT_ALERT,
 	INCIDENT_SCOPE,
@@ -108,6 +113,7 @@ class AlertmanagerWebhookLog(Document):
 		return self.parsed_group_labels.get(INCIDENT_SCOPE)
 
 	def after_insert(self):
+		update_alert_instances(self, self.parsed["alerts"])
 		if self.alert == INCIDENT_ALERT:
 			enqueue_doc(
 				self.doctype,
@@ -170,27 +176,14 @@ class AlertmanagerWebhookLog(Document):
 		return {}
 
 	def past_alert_instances(self, status: DF.Literal["Firing", "Resolved"]) -> set[str]:
-		past_alerts = frappe.get_all(
-			self.doctype,
-			fields=["payload"],
-			filters={
-				"alert": self.alert,
-				"severity": self.severity,
-				"status": status,
-				"group_key": ("like", f"%{self.incident_scope}%"),
-				"modified": [
-					">",
-					add_to_date(frappe.utils.now(), hours=-self.get_repeat_interval()),
-				],
-			},
-			group_by="group_key",
-			ignore_ifnull=True,
-		)  # get site down alerts grouped by benches
-
-		instances = []
-		for alert in past_alerts:
-			instances.extend(self.get_instances_from_alerts_payload(alert["payload"]))
-		return set(instances)
+		"""Instances in the scope whose latest status is `status`, set within the repeat interval"""
+		return get_instances(
+			self.alert,
+			self.incident_scope,
+			status,
+			since=add_to_date(frappe.utils.now(), hours=-self.get_repeat_interval()),
+			severity=self.severity,
+		)
 
 	@property
 	def total_instances(self) -> int:
@@ -225,10 +218,7 @@ class AlertmanagerWebhookLog(Document):
 			self.create_incident()
 
 	def get_repeat_interval(self):
-		repeat_interval = str(frappe.db.get_value("Prometheus Alert Rule", self.alert, "repeat_interval"))
-		assert repeat_interval.endswith("h"), f"Repeat interval not in hours: {repeat_interval}"
-		hours = repeat_interval.split("h")[0]  # only handles hours
-		return int(hours)
+		return get_repeat_interval(self.alert)
 
 	def generate_telegram_message(self):
 		context = self.as_dict()
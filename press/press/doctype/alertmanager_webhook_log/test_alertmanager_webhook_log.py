@@ -8,6 +8,7 @@ import typing
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.alertmanager_alert_instance.alertmanager_alert_instance import get_firing_counts
 from press.press.doctype.prometheus_alert_rule.test_prometheus_alert_rule import (
 	create_test_prometheus_alert_rule,
 )
@@ -90,4 +91,32 @@ def create_test_alertmanager_webhook_log(
 
 
 class TestAlertmanagerWebhookLog(FrappeTestCase):
-	pass
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_latest_status_of_instance_is_kept(self):
+		site = create_test_site()
+		alert = create_test_prometheus_alert_rule()
+		firing = create_test_alertmanager_webhook_log(site=site, alert=alert, status="firing")
+		resolved = create_test_alertmanager_webhook_log(site=site, alert=alert, status="resolved")
+
+		instances = frappe.get_all(
+			"Alertmanager Alert Instance",
+			filters={"alert": alert.name, "scope": site.server, "instance": site.name},
+			fields=["status", "last_fired_at", "last_resolved_at"],
+		)
+		self.assertEqual(len(instances), 1)
+		self.assertEqual(instances[0].status, "Resolved")
+		self.assertEqual(instances[0].last_fired_at, frappe.utils.get_datetime(firing.creation))
+		self.assertEqual(instances[0].last_resolved_at, frappe.utils.get_datetime(resolved.creation))
+
+	def test_firing_counts_are_per_severity(self):
+		site = create_test_site()
+		alert = create_test_prometheus_alert_rule()
+		create_test_alertmanager_webhook_log(site=site, alert=alert, status="firing")
+		since = frappe.utils.add_to_date(frappe.utils.now_datetime(), hours=-1)
+
+		self.assertEqual(
+			get_firing_counts(alert.name, "Critical", [site.server], since), {site.server: (1, False)}
+		)
+		self.assertEqual(get_firing_counts(alert.name, "Warning", [site.server], since), {})
@@ -4,15 +4,26 @@
 
 
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
-import rq
 import frappe
+import requests
+import rq
 from frappe.model.document import Document
+from frappe.utils import create_batch
+
+from press.api.github import get_auth_headers
+from press.press.doctype.app_source.app_source import get_branch_url
+from press.utils import log_error
 from press.utils.jobs import has_job_timeout_exceeded
 
 if typing.TYPE_CHECKING:
 	from press.press.doctype.app_source.app_source import AppSource
 
+POLL_BATCH_SIZE = 100
+POLL_WORKERS = 16
+POLL_TIMEOUT = 30
+
 
 class App(Document):
 	# begin: auto-generated types
@@ -87,19 +98,101 @@ def new_app(name, title):
 
 
 def poll_new_releases():
-	for source in frappe.get_all(
+	"""
+	Poll branches of all enabled sources for new commits.
+
+	Branches are fetched concurrently with the ETag of the last response, GitHub
+	replies with a 304 (which does not count against the rate limit) when the
+	branch head hasn't moved, and only sources with a changed branch are loaded.
+	"""
+	sources = frappe.get_all(
 		"App Source",
 		{"enabled": True, "last_github_poll_failed": False},
+		["name", "repository_owner", "repository", "branch", "github_installation_id", "github_etag"],
 		order_by="last_synced",
-	):
+	)
+	for batch in create_batch(sources, POLL_BATCH_SIZE):
 		if has_job_timeout_exceeded():
 			return
 		try:
-			source = frappe.get_doc("App Source", source.name)
-			source.create_release()
-			frappe.db.commit()
+			poll_sources(batch)
 		except rq.timeouts.JobTimeoutException:
 			frappe.db.rollback()
 			return
+
+
+def poll_sources(sources: list[frappe._dict]):
+	# Tokens are fetched here, worker threads don't touch the database or cache
+	headers = get_installation_headers(sources)
+	sources = [source for source in sources if source.github_installation_id in headers]
+
+	with ThreadPoolExecutor(max_workers=POLL_WORKERS) as executor:
+		responses = list(
+			executor.map(lambda source: fetch_branch(source, headers[source.github_installation_id]), sources)
+		)
+
+	unchanged = []
+	for source, response in zip(sources, responses, strict=True):
+		if response is None:
+			continue
+		if response.status_code == 304:
+			unchanged.append(source.name)
+			continue
+		create_release_from_response(source.name, response)
+
+	if unchanged:
+		frappe.db.set_value(
+			"App Source",
+			{"name": ("in", unchanged)},
+			"last_synced",
+			frappe.utils.now(),
+			update_modified=False,
+		)
+		frappe.db.commit()
+
+
+def get_installation_headers(sources: list[frappe._dict]) -> dict:
+	"""Auth headers per installation, sources of an installation whose token can't be fetched are skipped"""
+	headers = {}
+	for installation_id in {source.github_installation_id for source in sources}:
+		try:
+			headers[installation_id] = get_auth_headers(installation_id)
+		except rq.timeouts.JobTimeoutException:
+			raise
 		except Exception:
-			frappe.db.rollback()
+			log_error(
+				"GitHub Installation Token Error",
+				installation_id=installation_id,
+				sources=[
+					source.name for source in sources if source.github_installation_id == installation_id
+				],
+			)
+	return headers
+
+
+def fetch_branch(source: frappe._dict, headers: dict) -> requests.Response | None:
+	headers = headers.copy()
+	if source.github_etag:
+		headers["If-None-Match"] = source.github_etag
+	try:
+		return requests.get(
+			get_branch_url(source.repository_owner, source.repository, source.branch),
+			headers=headers,
+			timeout=POLL_TIMEOUT,
+		)
+	except requests.exceptions.RequestException:
+		return None
+
+
+def create_release_from_response(name: str, response: requests.Response):
+	try:
+		source: "AppSource" = frappe.get_doc("App Source", name)
+		commit_hash, commit_info, ok = source.process_github_response(response)
+		if ok:
+			source._create_release(commit_hash, commit_info)
+		frappe.db.commit()
+	except rq.timeouts.JobTimeoutException:
+		raise
+	except Exception:
+		frappe.db.rollback()
+		log_error("Create Release Error", reference_doctype="App Source", reference_name=name)
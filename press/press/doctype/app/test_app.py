@@ -3,10 +3,13 @@
 
 
 from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, Mock, patch
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.app.app import poll_new_releases
+from press.press.doctype.app_source.test_app_source import create_test_app_source
 from press.press.doctype.team.test_team import create_test_team
 
 if TYPE_CHECKING:
@@ -127,3 +130,54 @@ class TestApp(FrappeTestCase):
 		self.assertEqual(source_2.branch, "version-13")
 		self.assertEqual(len(source_2.versions), 1)
 		self.assertEqual(source_2.versions[0].version, "Version 13")
+
+	@patch("press.press.doctype.app.app.frappe.db.commit", new=MagicMock)
+	@patch("press.press.doctype.app.app.get_auth_headers", new=Mock(return_value={}))
+	def test_poll_new_releases_skips_unchanged_branches(self):
+		app = create_test_app("frappe", "Frappe Framework")
+		source = create_test_app_source("Version 14", app, branch="version-14")
+		source.db_set("github_etag", 'W/"unchanged"')
+		releases = frappe.db.count("App Release", {"source": source.name})
+
+		with patch("press.press.doctype.app.app.requests.get", return_value=Mock(status_code=304)) as get:
+			poll_new_releases()
+
+		headers = next(call.kwargs["headers"] for call in get.call_args_list if "version-14" in call.args[0])
+		self.assertEqual(headers["If-None-Match"], 'W/"unchanged"')
+		self.assertEqual(frappe.db.count("App Release", {"source": source.name}), releases)
+
+		response = Mock(
+			ok=True,
+			status_code=200,
+			headers={"ETag": 'W/"changed"'},
+			json=Mock(return_value={"commit": {"sha": frappe.mock("sha1"), "commit": {"message": "New"}}}),
+		)
+		with patch("press.press.doctype.app.app.requests.get", return_value=response):
+			poll_new_releases()
+
+		self.assertEqual(frappe.db.count("App Release", {"source": source.name}), releases + 1)
+		self.assertEqual(frappe.db.get_value("App Source", source.name, "github_etag"), 'W/"changed"')
+
+	@patch("press.press.doctype.app.app.frappe.db.commit", new=MagicMock)
+	@patch("press.press.doctype.app.app.log_error", new=Mock())
+	def test_poll_new_releases_skips_installations_without_token(self):
+		app = create_test_app("frappe", "Frappe Framework")
+		failing = create_test_app_source("Version 14", app, branch="version-14")
+		failing.db_set("github_installation_id", "failing")
+		working = create_test_app_source("Version 15", app, branch="version-15")
+		working.db_set("github_installation_id", "working")
+
+		def get_auth_headers(installation_id):
+			if installation_id == "failing":
+				raise Exception("Bad credentials")
+			return {}
+
+		with (
+			patch("press.press.doctype.app.app.get_auth_headers", side_effect=get_auth_headers),
+			patch("press.press.doctype.app.app.requests.get", return_value=Mock(status_code=304)) as get,
+		):
+			poll_new_releases()
+
+		urls = [call.args[0] for call in get.call_args_list]
+		self.assertTrue(any("version-15" in url for url in urls))
+		self.assertFalse(any("version-14" in url for url in urls))
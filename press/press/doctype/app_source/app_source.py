@@ -39,6 +39,7 @@ class AppSource(Document):
 		branch: DF.Data
 		enabled: DF.Check
 		frappe: DF.Check
+		github_etag: DF.Data | None
 		github_installation_id: DF.Data | None
 		last_github_poll_failed: DF.Check
 		last_github_response: DF.Code | None
@@ -211,13 +212,22 @@ class AppSource(Document):
 		If `commit_hash` is not provided, `commit_info` is of the latest commit
 		on the branch pointed to by `self.hash`.
 		"""
-		if (response := self.poll_github(commit_hash)).ok:
+		return self.process_github_response(self.poll_github(commit_hash), commit_hash)
+
+	def process_github_response(
+		self, response: requests.Response, commit_hash: str | None = None
+	) -> tuple[str, dict, bool]:
+		if response.ok:
 			self.set_poll_succeeded()
 		else:
 			self.set_poll_failed(response)
 			self.db_update()
 			return ("", {}, False)
 
+		if not commit_hash:
+			# Sent back as If-None-Match by `poll_new_releases`
+			self.github_etag = response.headers.get("ETag") or ""
+
 		# Will cause recursion of db.save is used
 		self.db_update()
 
@@ -230,16 +240,15 @@ class AppSource(Document):
 		return (commit_hash, commit_info, True)
 
 	def poll_github(self, commit_hash: None | str = None) -> requests.Response:
-		headers = self.get_auth_headers()
-		url = f"https://api.github.com/repos/{self.repository_owner}/{self.repository}"
+		return requests.get(self.get_github_url(commit_hash), headers=self.get_auth_headers())
 
-		if commit_hash:
-			# page and per_page set to reduce unnecessary diff info
-			url = f"{url}/commits/{commit_hash}?page=1&per_page=1"
-		else:
-			url = f"{url}/branches/{self.branch}"
+	def get_github_url(self, commit_hash: str | None = None) -> str:
+		if not commit_hash:
+			return get_branch_url(self.repository_owner, self.repository, self.branch)
 
-		return requests.get(url, headers=headers)
+		# page and per_page set to reduce unnecessary diff info
+		url = f"https://api.github.com/repos/{self.repository_owner}/{self.repository}"
+		return f"{url}/commits/{commit_hash}?page=1&per_page=1"
 
 	def set_poll_succeeded(self):
 		self.last_github_response = ""
@@ -315,6 +324,10 @@ def create_app_source(
 get_permission_query_conditions = get_permission_query_conditions_for_doctype("App Source")
 
 
+def get_branch_url(repository_owner: str, repository: str, branch: str) -> str:
+	return f"https://api.github.com/repos/{repository_owner}/{repository}/branches/{branch}"
+
+
 def get_timestamp_from_commit_info(commit_info: dict) -> str | None:
 	timestamp_str = commit_info.get("author", {}).get("date")
 	if not timestamp_str:
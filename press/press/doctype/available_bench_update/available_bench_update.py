@@ -0,0 +1,172 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+
+from __future__ import annotations
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+UPDATE_COLUMNS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"source_bench",
+	"destination_bench",
+	"server",
+	"source_candidate",
+	"destination_candidate",
+)
+
+
+class AvailableBenchUpdate(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		destination_bench: DF.Link
+		destination_candidate: DF.Link | None
+		server: DF.Link | None
+		source_bench: DF.Link
+		source_candidate: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Available Bench Update",
+		["source_bench", "destination_bench"],
+		constraint_name="unique_source_destination_bench",
+	)
+	frappe.db.add_index("Available Bench Update", ["destination_bench"])
+	frappe.db.add_index("Available Bench Update", ["server"])
+
+
+def get_benches_with_update(
+	benches: list[str] | None = None,
+	server: str | None = None,
+) -> list[str]:
+	"""Benches that have at least one Active bench with a newer candidate on the same server"""
+	filters = {}
+	if benches is not None:
+		if not benches:
+			return []
+		filters["source_bench"] = ("in", benches)
+	if server:
+		filters["server"] = server
+	return frappe.get_all("Available Bench Update", filters, pluck="source_bench", distinct=True)
+
+
+def get_update_destination(bench: str) -> frappe._dict | None:
+	"""Most recent Active bench the sites of `bench` can be updated to"""
+	Update = frappe.qb.DocType("Available Bench Update")
+	Bench = frappe.qb.DocType("Bench")
+	destinations = (
+		frappe.qb.from_(Update)
+		.join(Bench)
+		.on(Update.destination_bench == Bench.name)
+		.select(
+			Update.destination_bench.as_("name"),
+			Update.destination_candidate.as_("candidate"),
+			Update.source_candidate,
+		)
+		.where(Update.source_bench == bench)
+		.orderby(Bench.creation, order=frappe.qb.desc)
+		.limit(1)
+		.run(as_dict=True)
+	)
+	return destinations[0] if destinations else None
+
+
+def get_updates(
+	bench: str | None = None,
+	source_candidate: str | None = None,
+	destination_candidate: str | None = None,
+) -> list[dict]:
+	"""
+	Pairs of Active / Broken source benches and Active destination benches on
+	the same server, where a Deploy Candidate Difference exists between their
+	candidates. Filtered to pairs with `bench` on either side, if passed.
+	"""
+	Difference = frappe.qb.DocType("Deploy Candidate Difference")
+	Source = frappe.qb.DocType("Bench").as_("source")
+	Destination = frappe.qb.DocType("Bench").as_("destination")
+	query = (
+		frappe.qb.from_(Difference)
+		.join(Source)
+		.on(Source.candidate == Difference.source)
+		.join(Destination)
+		.on((Destination.candidate == Difference.destination) & (Destination.server == Source.server))
+		.select(
+			Source.name.as_("source_bench"),
+			Destination.name.as_("destination_bench"),
+			Source.server,
+			Difference.source.as_("source_candidate"),
+			Difference.destination.as_("destination_candidate"),
+		)
+		.where(Source.status.isin(("Active", "Broken")) & (Destination.status == "Active"))
+	)
+	if bench:
+		query = query.where((Source.name == bench) | (Destination.name == bench))
+	if source_candidate:
+		query = query.where(Difference.source == source_candidate)
+	if destination_candidate:
+		query = query.where(Difference.destination == destination_candidate)
+	return query.run(as_dict=True)
+
+
+def insert_updates(updates: list[dict]):
+	if not updates:
+		return
+
+	now = now_datetime()
+	user = frappe.session.user
+	rows = [
+		(
+			frappe.generate_hash(length=10),
+			now,
+			now,
+			user,
+			user,
+			update.source_bench,
+			update.destination_bench,
+			update.server,
+			update.source_candidate,
+			update.destination_candidate,
+		)
+		for update in updates
+	]
+	frappe.db.bulk_insert("Available Bench Update", UPDATE_COLUMNS, rows, ignore_duplicates=True)
+
+
+def sync_bench_updates(bench: str):
+	"""Recompute updates from and to `bench`, called when its status changes"""
+	frappe.db.delete("Available Bench Update", {"source_bench": bench})
+	frappe.db.delete("Available Bench Update", {"destination_bench": bench})
+	insert_updates(get_updates(bench=bench))
+
+
+def add_difference_updates(source_candidate: str, destination_candidate: str):
+	insert_updates(
+		get_updates(source_candidate=source_candidate, destination_candidate=destination_candidate)
+	)
+
+
+def remove_difference_updates(source_candidate: str, destination_candidate: str):
+	frappe.db.delete(
+		"Available Bench Update",
+		{"source_candidate": source_candidate, "destination_candidate": destination_candidate},
+	)
+
+
+def rebuild_bench_updates():
+	frappe.db.delete("Available Bench Update")
+	insert_updates(get_updates())
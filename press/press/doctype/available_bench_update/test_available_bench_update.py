@@ -0,0 +1,72 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See license.txt
+
+from unittest.mock import Mock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from press.press.doctype.agent_job.agent_job import AgentJob
+from press.press.doctype.app.test_app import create_test_app
+from press.press.doctype.available_bench_update.available_bench_update import (
+	get_benches_with_update,
+	get_update_destination,
+	rebuild_bench_updates,
+)
+from press.press.doctype.release_group.test_release_group import create_test_release_group
+from press.press.doctype.site.test_site import create_test_bench
+
+
+@patch.object(AgentJob, "enqueue_http_request", new=Mock())
+class TestAvailableBenchUpdate(FrappeTestCase):
+	def setUp(self):
+		super().setUp()
+		group = create_test_release_group([create_test_app()])
+		self.source = create_test_bench(group=group)
+		self.destination = create_test_bench(group=group, server=self.source.server)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def create_difference(self):
+		return frappe.get_doc(
+			{
+				"doctype": "Deploy Candidate Difference",
+				"group": self.source.group,
+				"source": self.source.candidate,
+				"destination": self.destination.candidate,
+			}
+		).insert()
+
+	def test_difference_makes_update_available(self):
+		self.assertEqual(get_benches_with_update(benches=[self.source.name]), [])
+
+		self.create_difference()
+
+		self.assertEqual(get_benches_with_update(benches=[self.source.name]), [self.source.name])
+		self.assertEqual(get_benches_with_update(server=self.source.server), [self.source.name])
+		self.assertEqual(get_update_destination(self.source.name).name, self.destination.name)
+
+	def test_destination_status_change_updates_index(self):
+		self.create_difference()
+
+		self.destination.status = "Broken"
+		self.destination.save()
+		self.assertEqual(get_benches_with_update(benches=[self.source.name]), [])
+
+		self.destination.status = "Active"
+		self.destination.save()
+		self.assertEqual(get_benches_with_update(benches=[self.source.name]), [self.source.name])
+
+	def test_deleted_difference_removes_update(self):
+		difference = self.create_difference()
+		difference.delete()
+		self.assertIsNone(get_update_destination(self.source.name))
+
+	def test_rebuild_matches_maintained_index(self):
+		self.create_difference()
+		before = frappe.get_all("Available Bench Update", ["source_bench", "destination_bench"])
+
+		rebuild_bench_updates()
+		after = frappe.get_all("Available Bench Update", ["source_bench", "destination_bench"])
+		self.assertCountEqual(before, after)
@@ -17,6 +17,7 @@ class BackupBucket(Document):
 		bucket_name: DF.Data | None
 		cluster: DF.Link | None
 		endpoint_url: DF.Data | None
+		inventory_manifest_path: DF.Data | None
 		region: DF.Data | None
 	# end: auto-generated types
 
@@ -21,11 +21,14 @@ from press.api.client import dashboard_whitelist
 from press.api.server import usage
 from press.exceptions import ArchiveBenchError
 from press.overrides import get_permission_query_conditions_for_doctype
+from press.press.doctype.available_bench_update.available_bench_update import sync_bench_updates
 from press.press.doctype.bench_shell_log.bench_shell_log import (
 	ExecuteResult,
 	create_bench_shell_log,
 )
 from press.press.doctype.site.site import Site
+from press.press.doctype.site.site_info_sync import SiteInfoSync
+from press.press.doctype.site_analytics.site_analytics import SiteAnalyticsWriter
 from press.runner import Ansible
 from press.utils import (
 	SupervisorProcess,
@@ -393,7 +396,11 @@ class Bench(Document):
 
 	def on_update(self):
 		self.update_bench_config()
-		if self.has_value_changed("status") and self.team != "Administrator":
+		if not self.has_value_changed("status"):
+			return
+
+		sync_bench_updates(self.name)
+		if self.team != "Administrator":
 			create_webhook_event("Bench Status Update", self, self.team)
 
 	def update_bench_config(self, force=False):
@@ -480,24 +487,7 @@ class Bench(Document):
 			return
 		data = agent.get_sites_info(self, since=last_synced_time)
 		if data:
-			for site, info in data.items():
-				if not frappe.db.exists("Site", site):
-					continue
-				try:
-					frappe.get_doc("Site", site, for_update=True).sync_info(info)
-					frappe.db.commit()
-				except frappe.DoesNotExistError:
-					# Ignore: Site got renamed or deleted
-					pass
-				except Exception:
-					log_error(
-						"Site Sync Error",
-						site=site,
-						info=info,
-						reference_doctype="Bench",
-						reference_name=self.name,
-					)
-					frappe.db.rollback()
+			SiteInfoSync(self.name, data).run()
 
 	@frappe.whitelist()
 	def sync_analytics(self):
@@ -507,21 +497,17 @@ class Bench(Document):
 		data = agent.get_sites_analytics(self)
 		if not data:
 			return
-		for site, analytics in data.items():
-			if not frappe.db.exists("Site", site):
-				return
-			try:
-				frappe.get_doc("Site", site).sync_analytics(analytics)
-				frappe.db.commit()
-			except Exception:
-				log_error(
-					"Site Analytics Sync Error",
-					site=site,
-					analytics=analytics,
-					reference_doctype="Bench",
-					reference_name=self.name,
-				)
-				frappe.db.rollback()
+		sites = set(frappe.get_all("Site", filters={"name": ("in", list(data))}, pluck="name"))
+		try:
+			SiteAnalyticsWriter({site: data[site] for site in sites}, bench=self.name).write(commit=True)
+		except Exception:
+			log_error(
+				"Site Analytics Sync Error",
+				sites=list(sites),
+				reference_doctype="Bench",
+				reference_name=self.name,
+			)
+			frappe.db.rollback()
 
 	def sync_product_site_users(self):
 		agent = Agent(self.server)
@@ -532,7 +518,7 @@ class Bench(Document):
 			return
 		for site, analytics in data.items():
 			if not frappe.db.exists("Site", site):
-				return
+				continue
 			try:
 				frappe.get_doc("Site", site).sync_users_to_product_site(analytics)
 				frappe.db.commit()
@@ -1116,6 +1102,7 @@ def process_new_bench_job_update(job):
 		return
 
 	frappe.db.set_value("Bench", job.bench, "status", updated_status)
+	sync_bench_updates(job.bench)
 	if bench.team != "Administrator":
 		bench.status = updated_status  # just to ensure the status got changed in webhook payload, reload_doc is costly here
 		create_webhook_event("Bench Status Update", bench, bench.team)
@@ -1180,6 +1167,7 @@ def process_archive_bench_job_update(job):
 
 	if updated_status != bench.status:
 		frappe.db.set_value("Bench", job.bench, "status", updated_status)
+		sync_bench_updates(job.bench)
 		is_ssh_proxy_setup = frappe.db.get_value("Bench", job.bench, "is_ssh_proxy_setup")
 		if updated_status == "Archived" and is_ssh_proxy_setup:
 			frappe.get_doc("Bench", job.bench).remove_ssh_user()
@@ -2,6 +2,7 @@
 # See license.txt
 from __future__ import annotations
 
+import json
 from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, Mock, patch
 
@@ -30,6 +31,8 @@ from press.press.doctype.release_group.test_release_group import (
 	create_test_release_group,
 )
 from press.press.doctype.server.server import Server, scale_workers
+from press.press.doctype.site.site import Site
+from press.press.doctype.site.site_info_sync import SiteInfoSync
 from press.press.doctype.site.test_site import create_test_bench, create_test_site
 from press.press.doctype.site_plan.test_site_plan import create_test_plan
 from press.press.doctype.subscription.test_subscription import create_test_subscription
@@ -545,3 +548,38 @@ class TestArchiveObsoleteBenches(FrappeTestCase):
 			with self.assertRaises(ArchiveBenchError):
 				bench.archive()
 			bench.reload()
+
+
+@patch("press.press.doctype.site.site_info_sync.frappe.db.commit", new=MagicMock)
+@patch.object(AgentJob, "enqueue_http_request", new=Mock())
+class TestSiteInfoSync(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def site_info(self, site, database=100, timezone="Asia/Kolkata"):
+		return {
+			"usage": {"backups": 10, "database": database, "public": 1, "private": 1},
+			"config": json.loads(site.config or "{}"),
+			"timezone": timezone,
+		}
+
+	def test_usages_of_all_sites_are_inserted_once(self):
+		site_1 = create_test_site()
+		site_2 = create_test_site(bench=site_1.bench)
+		data = {site_1.name: self.site_info(site_1), site_2.name: self.site_info(site_2)}
+
+		SiteInfoSync(site_1.bench, data).run()
+		SiteInfoSync(site_1.bench, data).run()
+		self.assertEqual(frappe.db.count("Site Usage", {"site": ("in", [site_1.name, site_2.name])}), 2)
+
+		data[site_1.name] = self.site_info(site_1, database=200)
+		SiteInfoSync(site_1.bench, data).run()
+		self.assertEqual(frappe.db.count("Site Usage", {"site": site_1.name}), 2)
+
+	def test_timezone_is_updated_without_saving_site(self):
+		site = create_test_site()
+		with patch.object(Site, "save") as save:
+			SiteInfoSync(site.bench, {site.name: self.site_info(site, timezone="Europe/Berlin")}).run()
+
+		save.assert_not_called()
+		self.assertEqual(frappe.db.get_value("Site", site.name, "timezone"), "Europe/Berlin")
@@ -5,24 +5,22 @@ from __future__ import annotations
 
 import json
 import typing
-from collections import Counter, defaultdict
-from dataclasses import dataclass, field
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time, timedelta
 from statistics import median
 from typing import Any
 
 import frappe
 from frappe.model.document import Document
+from frappe.utils import get_datetime, getdate
 
 if typing.TYPE_CHECKING:
+	from collections.abc import Generator
+
 	from frappe.utils import DateTimeLikeObject
 
-	from press.press.doctype.build_metric.build_metric_types import (
-		ContextDurationType,
-		DeployCandidateBuildType,
-		DurationType,
-		FailedBuildType,
-		MetricsType,
-	)
+	from press.press.doctype.build_metric.build_metric_types import MetricsType
 
 
 class BuildMetric(Document):
@@ -62,69 +60,148 @@ class BuildMetric(Document):
 		frappe.enqueue(self._get_metrics)
 
 
-@dataclass
-class GenerateBuildMetric:
-	from_date: DateTimeLikeObject
-	end_date: DateTimeLikeObject
-	metric_fields: list[str] = field(
-		default_factory=lambda: [
-			"name",
-			"group",
-			"status",
-			"creation",
-			"error_key",
-			"retry_count",
-			"build_output",
-			"build_duration",
-			"manually_failed",
-			"pending_duration",
-			"user_addressable_failure",
-			"platform",
-		]
-	)
+# Characters from the end of a failed step's output checked for known failures
+FAILURE_OUTPUT_WINDOW = 16 * 1024
 
-	def dump_metrics(self) -> MetricsType:
-		return {
-			"total_builds": self.total_builds,
-			"total_failures": {
-				"user_failure": len(self.total_failures["user_failure"]),
-				"fc_manual_failure": len(self.total_failures["fc_manual_failure"]),
-				"fc_failure": len(self.total_failures["fc_failure"]),
-			},
-			"median_pending_duration": self.duration_metrics["median_pending_duration"],
-			"median_build_duration": self.duration_metrics["median_build_duration"],
-			"median_upload_context_duration": self.context_durations["median_upload_duration"],
-			"median_package_context_duration": self.context_durations["median_package_duration"],
-			"failure_frequency": dict(self.failure_frequency.most_common()),
-			"fc_failure_metrics": self.fc_failure_metrics,
-			"build_count_split": self.get_build_count_platform_split(),
-		}
+# Builds of recent days can still be running or retried, so days are rolled up
+# once they are older than this
+ROLLUP_AFTER_DAYS = 2
 
-	def get_metrics(self):
+COMMON_FC_FAILURE_PATTERNS = {
+	"Node not found": "npm: not found",
+	"Permission issue": "permission denied",
+	"Timed out": "timeout",
+	"Check sum failed": "failed to calculate checksum",
+}
+
+DURATION_FIELDS = (
+	"pending_durations",
+	"build_durations",
+	"package_context_durations",
+	"upload_context_durations",
+)
+COUNTER_FIELDS = (
+	"build_count_split",
+	"total_failures",
+	"failure_frequency",
+	"step_failures",
+	"known_output_failures",
+)
+
+
+@dataclass
+class BuildMetricSlice:
+	"""
+	Metrics of builds created in a time range.
+
+	Slices of adjacent ranges add up to the slice of the combined range,
+	durations (in minutes) are kept so medians of any range are exact.
+	"""
+
+	total_builds: int = 0
+	build_count_split: Counter = field(default_factory=Counter)
+	total_failures: Counter = field(default_factory=Counter)
+	failure_frequency: Counter = field(default_factory=Counter)
+	step_failures: Counter = field(default_factory=Counter)
+	known_output_failures: Counter = field(default_factory=Counter)
+	pending_durations: list[float] = field(default_factory=list)
+	build_durations: list[float] = field(default_factory=list)
+	package_context_durations: list[float] = field(default_factory=list)
+	upload_context_durations: list[float] = field(default_factory=list)
+
+	def __add__(self, other: BuildMetricSlice) -> BuildMetricSlice:
+		combined = BuildMetricSlice(total_builds=self.total_builds + other.total_builds)
+		for key in COUNTER_FIELDS:
+			setattr(combined, key, getattr(self, key) + getattr(other, key))
+		for key in DURATION_FIELDS:
+			setattr(combined, key, getattr(self, key) + getattr(other, key))
+		return combined
+
+	def as_dict(self) -> dict:
+		return asdict(self)
+
+	@classmethod
+	def from_dict(cls, data: dict) -> BuildMetricSlice:
+		metric_slice = cls(total_builds=data.get("total_builds", 0))
+		for key in COUNTER_FIELDS:
+			setattr(metric_slice, key, Counter(data.get(key, {})))
+		for key in DURATION_FIELDS:
+			setattr(metric_slice, key, data.get(key, []))
+		return metric_slice
+
+	@classmethod
+	def collect(cls, start: datetime, end: datetime) -> BuildMetricSlice:
 		"""
-		- Get total builds
-		- Get total failed builds (user, fc, manually)
-		- Get Avg pending and build duration
-		- Get Avg context durations (package & upload)
-		- Get failure frequency.
+		Aggregate builds created between `start` and `end` in the database.
+
+		Only a few columns per build are read, build output is never fetched
+		and failed step output is read up to `FAILURE_OUTPUT_WINDOW`.
 		"""
-		self.total_builds = self.get_total_builds()
-		self.total_failures = self.get_total_failures()
-		self.duration_metrics = self.get_build_duration_metrics()
-		self.context_durations = self.get_context_durations()
-		self.failure_frequency = self.get_error_frequency(
-			self.total_failures["user_failure"],
+		metric_slice = cls()
+		metric_slice._set_build_counts(start, end)
+		metric_slice._set_failure_frequency(start, end)
+		metric_slice._set_durations(start, end)
+		metric_slice._set_context_durations(start, end)
+		metric_slice._set_fc_failures(start, end)
+		return metric_slice
+
+	def _set_build_counts(self, start: datetime, end: datetime):
+		# Ensure build creation was not a part of migration using deploy flag.
+		rows = frappe.get_all(
+			"Deploy Candidate Build",
+			filters=get_build_filters(start, end),
+			fields=[
+				"platform",
+				"status",
+				"user_addressable_failure",
+				"manually_failed",
+				"count(*) as count",
+			],
+			group_by="platform, status, user_addressable_failure, manually_failed",
 		)
-		self.fc_failure_metrics = self.get_fc_failure_metrics()
+		for row in rows:
+			self.total_builds += row.count
+			if row.platform in ("arm64", "x86_64"):
+				self.build_count_split[row.platform] += row.count
+			if row.status != "Failure":
+				continue
+
+			# Ensure failures are not exaggerated due to conversions
+			failure = FAILURE_TYPES.get((bool(row.user_addressable_failure), bool(row.manually_failed)))
+			if failure:
+				self.total_failures[failure] += row.count
 
-	def get_error_frequency(
-		self,
-		user_failures: list[DeployCandidateBuildType],
-	) -> Counter:
+	def _set_failure_frequency(self, start: datetime, end: datetime):
 		"""What type of user addressable failure is most common"""
-		return Counter(failure["error_key"] for failure in user_failures)
+		rows = frappe.get_all(
+			"Deploy Candidate Build",
+			filters={
+				**get_build_filters(start, end),
+				"status": "Failure",
+				"user_addressable_failure": 1,
+				"manually_failed": 0,
+			},
+			fields=["error_key", "count(*) as count"],
+			group_by="error_key",
+		)
+		for row in rows:
+			self.failure_frequency[row.error_key] += row.count
 
-	def get_context_durations(self) -> ContextDurationType:
+	def _set_durations(self, start: datetime, end: datetime):
+		durations = frappe.get_all(
+			"Deploy Candidate Build",
+			filters={
+				**get_build_filters(start, end),
+				"build_duration": ("is", "set"),
+				"pending_duration": ("is", "set"),
+			},
+			fields=["build_duration", "pending_duration"],
+		)
+		for duration in durations:
+			self.pending_durations.append(to_minutes(duration.pending_duration.total_seconds()))
+			self.build_durations.append(to_minutes(duration.build_duration.total_seconds()))
+
+	def _set_context_durations(self, start: datetime, end: datetime):
 		deploy_candidate_build = frappe.qb.DocType("Deploy Candidate Build")
 		deploy_candidate_build_step = frappe.qb.DocType("Deploy Candidate Build Step")
 
@@ -135,124 +212,148 @@ class GenerateBuildMetric:
 			.select(deploy_candidate_build_step.duration, deploy_candidate_build_step.stage_slug)
 			.where(deploy_candidate_build_step.stage_slug.isin(["package", "upload"]))
 			.where(deploy_candidate_build_step.step_slug == "context")
-			.where(deploy_candidate_build_step.creation[self.from_date : self.end_date])
+			.where(deploy_candidate_build_step.creation >= start)
+			.where(deploy_candidate_build_step.creation < end)
 			.where(deploy_candidate_build.deploy_after_build == 1)
 			.run(as_dict=1)
 		)
+		for ctx in context_durations:
+			durations = (
+				self.package_context_durations
+				if ctx.stage_slug == "package"
+				else self.upload_context_durations
+			)
+			durations.append(to_minutes(ctx.duration or 0))
+
+	def _set_fc_failures(self, start: datetime, end: datetime):
+		failed_steps = frappe.db.sql(
+			"""
+			SELECT step.parent, step.stage, step.step, RIGHT(step.output, %(window)s) AS output
+			FROM `tabDeploy Candidate Build Step` step
+			JOIN `tabDeploy Candidate Build` build ON build.name = step.parent
+			WHERE build.creation >= %(start)s AND build.creation < %(end)s
+				AND build.deploy_after_build = 1
+				AND build.status = 'Failure'
+				AND build.user_addressable_failure = 0
+				AND build.manually_failed = 0
+				AND step.parenttype = 'Deploy Candidate Build'
+				AND step.status = 'Failure'
+			ORDER BY step.parent, step.idx
+			""",
+			{"start": start, "end": end, "window": FAILURE_OUTPUT_WINDOW},
+			as_dict=True,
+		)
 
-		package_durations = [ctx.duration / 60 for ctx in context_durations if ctx.stage_slug == "package"]
-		upload_durations = [ctx.duration / 60 for ctx in context_durations if ctx.stage_slug == "upload"]
+		counted = set()
+		for failed_step in failed_steps:
+			# First failed step of a build
+			if failed_step.parent in counted:
+				continue
+			counted.add(failed_step.parent)
 
-		return {
-			"median_package_duration": median(package_durations),
-			"median_upload_duration": median(upload_durations),
-		}
+			self.step_failures[f"{failed_step.stage}-{failed_step.step}"] += 1
+			for key, error_key in COMMON_FC_FAILURE_PATTERNS.items():
+				if failed_step.output and error_key in failed_step.output:
+					self.known_output_failures[key] += 1
 
-	def get_build_duration_metrics(self) -> DurationType:
-		"""Average duration pending / build getting python median"""
-		durations = frappe.get_all(
-			"Deploy Candidate Build",
-			{
-				"creation": ["between", (self.from_date, self.end_date)],
-				"deploy_after_build": 1,
-				"build_duration": ("is", "set"),
-				"pending_duration": ("is", "set"),
-			},
-			["build_duration", "pending_duration"],
-		)
 
-		median_pending_duration = median(
-			[duration["pending_duration"].total_seconds() / 60 for duration in durations]
-		)
-		median_build_duration = median(
-			[duration["build_duration"].total_seconds() / 60 for duration in durations]
-		)
+# (user addressable, manually failed) of failed builds
+FAILURE_TYPES = {
+	(True, False): "user_failure",
+	(False, False): "fc_failure",
+	(False, True): "fc_manual_failure",
+}
 
-		return {
-			"median_build_duration": median_build_duration,
-			"median_pending_duration": median_pending_duration,
-		}
 
-	def get_total_failures(self) -> FailedBuildType:
-		"""User failures, fc failures and manual failures"""
-		return {
-			"user_failure": self._get_failure(is_user_addressable=True, is_manually_failed=False),
-			"fc_failure": self._get_failure(is_user_addressable=False, is_manually_failed=False),
-			"fc_manual_failure": self._get_failure(is_user_addressable=False, is_manually_failed=True),
-		}
+def get_build_filters(start: datetime, end: datetime) -> dict[str, Any]:
+	return {"creation": ("between", [start, end - timedelta(microseconds=1)]), "deploy_after_build": 1}
 
-	def _get_failure(
-		self, is_user_addressable: bool, is_manually_failed: bool
-	) -> list[DeployCandidateBuildType]:
-		# Ensure failures are not exaggerated due to conversions
-		return frappe.get_all(
-			"Deploy Candidate Build",
-			{
-				"creation": ("between", [self.from_date, self.end_date]),
-				"status": "Failure",
-				"user_addressable_failure": is_user_addressable,
-				"manually_failed": is_manually_failed,
-				"deploy_after_build": 1,
-			},
-			self.metric_fields,
-		)
 
-	def _get_build_count(self, filters: dict[str, Any] | None = None):
-		# Ensure build creation was not a part of migration using deploy flag.
-		if not filters:
-			filters = {}
-
-		filters.update(
-			{
-				"creation": ("between", [self.from_date, self.end_date]),
-				"deploy_after_build": 1,
-			}
-		)
+def to_minutes(seconds: float) -> float:
+	return round(seconds / 60, 2)
 
-		return frappe.db.count("Deploy Candidate Build", filters=filters)
 
-	def get_build_count_platform_split(self) -> dict[str, int]:
-		return {
-			"arm64": self._get_build_count({"platform": "arm64"}),
-			"x86_64": self._get_build_count({"platform": "x86_64"}),
-		}
+def median_or_zero(values: list[float]) -> float:
+	return median(values) if values else 0
 
-	def get_total_builds(self) -> int:
-		return self._get_build_count()
 
-	@property
-	def common_fc_failure_patterns(self):
-		return {
-			"Node not found": "npm: not found",
-			"Permission issue": "permission denied",
-			"Timed out": "timeout",
-			"Check sum failed": "failed to calculate checksum",
+def get_rollup(day: date) -> BuildMetricSlice:
+	"""Metrics of builds created on a closed day, stored on first use"""
+	if metrics := frappe.db.get_value("Build Metric Rollup", str(day), "metrics"):
+		return BuildMetricSlice.from_dict(json.loads(metrics))
+
+	start = datetime.combine(day, time.min)
+	metric_slice = BuildMetricSlice.collect(start, start + timedelta(days=1))
+	frappe.get_doc(
+		{
+			"doctype": "Build Metric Rollup",
+			"date": day,
+			"total_builds": metric_slice.total_builds,
+			"metrics": json.dumps(metric_slice.as_dict()),
 		}
+	).insert(ignore_permissions=True)
+	return metric_slice
 
-	def get_fc_failure_metrics(self) -> dict[str, dict[str, int]]:
-		fc_failures = self._get_failure(is_user_addressable=False, is_manually_failed=False)
-		failed_step_frequency = defaultdict(int)
-		failure_output_frequency = defaultdict(int)
 
-		for fc_failure in fc_failures:
-			failed_build_step = frappe.db.get_value(
-				"Deploy Candidate Build Step",
-				{"parent": fc_failure["name"], "status": "Failure"},
-				["stage", "step", "output"],
-			)
-			if not failed_build_step:
-				continue
+@dataclass
+class GenerateBuildMetric:
+	from_date: DateTimeLikeObject
+	end_date: DateTimeLikeObject
 
-			step_name, step, output = failed_build_step
+	def dump_metrics(self) -> MetricsType:
+		metrics = self.metrics
+		return {
+			"total_builds": metrics.total_builds,
+			"total_failures": {
+				"user_failure": metrics.total_failures["user_failure"],
+				"fc_manual_failure": metrics.total_failures["fc_manual_failure"],
+				"fc_failure": metrics.total_failures["fc_failure"],
+			},
+			"median_pending_duration": median_or_zero(metrics.pending_durations),
+			"median_build_duration": median_or_zero(metrics.build_durations),
+			"median_upload_context_duration": median_or_zero(metrics.upload_context_durations),
+			"median_package_context_duration": median_or_zero(metrics.package_context_durations),
+			"failure_frequency": dict(metrics.failure_frequency.most_common()),
+			"fc_failure_metrics": {
+				"step_failures": dict(metrics.step_failures),
+				"known_output_failures": dict(metrics.known_output_failures),
+			},
+			"build_count_split": {
+				"arm64": metrics.build_count_split["arm64"],
+				"x86_64": metrics.build_count_split["x86_64"],
+			},
+		}
 
-			failure_key = f"{step_name}-{step}"
-			failed_step_frequency[failure_key] += 1
+	def get_metrics(self):
+		"""
+		- Get total builds and platform split
+		- Get total failed builds (user, fc, manually)
+		- Get median pending and build duration
+		- Get median context durations (package & upload)
+		- Get failure frequency.
 
-			for key, error_key in self.common_fc_failure_patterns.items():
-				if output and error_key in output:
-					failure_output_frequency[key] += 1
+		Whole days that are old enough come from daily rollups, the rest of
+		the range is aggregated from builds.
+		"""
+		self.metrics = sum(
+			(
+				get_rollup(start.date()) if is_rollup else BuildMetricSlice.collect(start, end)
+				for start, end, is_rollup in self.get_slices()
+			),
+			BuildMetricSlice(),
+		)
 
-		return {"step_failures": failed_step_frequency, "known_output_failures": failure_output_frequency}
+	def get_slices(self) -> Generator[tuple[datetime, datetime, bool], None, None]:
+		start, end = get_datetime(self.from_date), get_datetime(self.end_date)
+		last_rollup = datetime.combine(getdate() - timedelta(days=ROLLUP_AFTER_DAYS), time.min)
+		while start < end:
+			day_start = datetime.combine(start.date(), time.min)
+			day_end = min(day_start + timedelta(days=1), end)
+			is_rollup = (
+				start == day_start and day_end == day_start + timedelta(days=1) and day_end <= last_rollup
+			)
+			yield start, day_end, is_rollup
+			start = day_end
 
 
 def deploy_metrics(start_from: DateTimeLikeObject, to: DateTimeLikeObject) -> dict[str, int]:
@@ -1,9 +1,18 @@
 # Copyright (c) 2025, Frappe and Contributors
 # See license.txt
 
-# import frappe
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.build_metric.build_metric import (
+	BuildMetricSlice,
+	GenerateBuildMetric,
+	get_rollup,
+)
+
 
 class IntegrationTestBuildMetric(FrappeTestCase):
 	"""
@@ -11,4 +20,39 @@ class IntegrationTestBuildMetric(FrappeTestCase):
 	Use this class for testing interactions between multiple components.
 	"""
 
-	pass
+	def test_whole_old_days_are_read_from_rollups(self):
+		start = datetime(2025, 1, 1, 12)
+		slices = list(GenerateBuildMetric(start, start + timedelta(days=3)).get_slices())
+
+		self.assertEqual(
+			slices,
+			[
+				(start, datetime(2025, 1, 2), False),
+				(datetime(2025, 1, 2), datetime(2025, 1, 3), True),
+				(datetime(2025, 1, 3), datetime(2025, 1, 4), True),
+				(datetime(2025, 1, 4), start + timedelta(days=3), False),
+			],
+		)
+
+	def test_rollup_is_stored_once(self):
+		day = datetime(2025, 1, 2).date()
+		with patch.object(
+			BuildMetricSlice, "collect", return_value=BuildMetricSlice(total_builds=3, build_durations=[4.0])
+		) as collect:
+			first = get_rollup(day)
+			second = get_rollup(day)
+
+		collect.assert_called_once()
+		self.assertEqual(first, second)
+		self.assertEqual(frappe.db.get_value("Build Metric Rollup", str(day), "total_builds"), 3)
+
+	def test_slices_add_up(self):
+		first = BuildMetricSlice(total_builds=2, build_durations=[1.0, 3.0])
+		first.total_failures["fc_failure"] += 1
+		second = BuildMetricSlice(total_builds=1, build_durations=[2.0])
+		second.total_failures["fc_failure"] += 2
+
+		combined = first + second
+		self.assertEqual(combined.total_builds, 3)
+		self.assertEqual(combined.total_failures["fc_failure"], 3)
+		self.assertEqual(sorted(combined.build_durations), [1.0, 2.0, 3.0])
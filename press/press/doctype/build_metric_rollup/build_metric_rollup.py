@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+
+from __future__ import annotations
+
+from frappe.model.document import Document
+
+
+class BuildMetricRollup(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		date: DF.Date
+		metrics: DF.JSON
+		total_builds: DF.Int
+	# end: auto-generated types
+
+	pass
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, Literal
 
@@ -10,6 +11,7 @@ import frappe
 import frappe.utils
 from frappe.core.doctype.version.version import get_diff
 from frappe.core.utils import find
+from frappe.monitor import add_data_to_monitor
 from frappe.utils.password import get_decrypted_password
 
 from press.api.client import dashboard_whitelist
@@ -18,6 +20,7 @@ from press.press.doctype.ansible_console.ansible_console import AnsibleAdHoc
 from press.press.doctype.database_server_mariadb_variable.database_server_mariadb_variable import (
 	DatabaseServerMariaDBVariable,
 )
+from press.press.doctype.mariadb_binlog.mariadb_binlog import sync_binlogs
 from press.press.doctype.server.server import PUBLIC_SERVER_AUTO_ADD_STORAGE_MIN, Agent, BaseServer
 from press.runner import Ansible
 from press.utils import log_error
@@ -1544,101 +1547,14 @@ Latest binlog : {latest_binlog.get("name", "")} - {last_binlog_size_mb} MB {last
 		)
 
 	def _sync_binlogs_info(self, index_binlogs: bool = True, upload_binlogs: bool = True):
-		info = self.agent.fetch_binlog_list()
-		current_binlog = info.get("current_binlog", "")
-		binlogs_in_disk = info.get("binlogs_in_disk", [])
-		indexed_binlogs = info.get("indexed_binlogs", [])
-
-		# Update entry for binlogs stored in disk
-		for binlog in binlogs_in_disk:
-			binlog["is_indexed"] = binlog["name"] in indexed_binlogs
-
-			size_mb = round((binlog.get("size", 0) / 1024 / 1024), 1)
-			file_modification_time = datetime.fromtimestamp(int(binlog["modified_at"]))
-
-			if not frappe.db.exists(
-				"MariaDB Binlog",
-				{
-					"database_server": self.name,
-					"file_name": binlog["name"],
-				},
-			):
-				frappe.get_doc(
-					{
-						"doctype": "MariaDB Binlog",
-						"database_server": self.name,
-						"file_name": binlog["name"],
-						"size_mb": size_mb,
-						"is_indexed": binlog["is_indexed"],
-						"purged_from_disk": False,
-						"file_modification_time": file_modification_time,
-					}
-				).insert(ignore_permissions=True)
-			else:
-				frappe.db.set_value(
-					"MariaDB Binlog",
-					{
-						"database_server": self.name,
-						"file_name": binlog["name"],
-					},
-					{
-						"size_mb": size_mb,
-						"file_modification_time": file_modification_time,
-					},
-				)
-
-		# Update entry for current binlog
-		current_binlog_set_to = frappe.db.exists(
-			"MariaDB Binlog", {"database_server": self.name, "current": True}
-		)
-		if current_binlog_set_to != current_binlog:
-			if current_binlog_set_to:
-				frappe.db.set_value(
-					"MariaDB Binlog",
-					current_binlog_set_to,
-					"current",
-					0,
-				)
-			frappe.db.set_value(
-				"MariaDB Binlog",
-				{"database_server": self.name, "file_name": current_binlog},
-				"current",
-				1,
-			)
-
-		# Set purged_from_disk to True for binlogs that are not in disk
-		binlog_file_names_stored_in_disk = [x.get("name") for x in binlogs_in_disk]
-		frappe.db.set_value(
-			"MariaDB Binlog",
-			{
+		start = time.monotonic()
+		changed = sync_binlogs(self.name, self.agent.fetch_binlog_list())
+		add_data_to_monitor(
+			binlog_sync={
 				"database_server": self.name,
-				"file_name": ("not in", binlog_file_names_stored_in_disk),
-				"purged_from_disk": 0,
-			},
-			"purged_from_disk",
-			1,
-		)
-
-		# Set binlogs as indexed
-		frappe.db.set_value(
-			"MariaDB Binlog",
-			{
-				"database_server": self.name,
-				"file_name": ("in", indexed_binlogs),
-			},
-			"indexed",
-			1,
-		)
-
-		# Set other binlogs as non indexed
-		frappe.db.set_value(
-			"MariaDB Binlog",
-			{
-				"database_server": self.name,
-				"file_name": ("not in", indexed_binlogs),
-			},
-			"indexed",
-			0,
+				"rows_changed": changed,
+				"duration": round(time.monotonic() - start, 3),
+			}
 		)
 
 		if index_binlogs:
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import itertools
+import json
 import re
 import typing
 from typing import Literal
@@ -32,12 +34,36 @@ class IndexSplit(typing.TypedDict):
 	is_unusual: bool
 
 
+def get_parser_state(dc: "DeployCandidateBuild", key: str) -> dict:
+	state = dc.output_parser_state or {}
+	if isinstance(state, str):
+		state = json.loads(state)
+	return state.get(key) or {}
+
+
+def set_parser_state(dc: "DeployCandidateBuild", key: str, value: dict):
+	state = dc.output_parser_state or {}
+	if isinstance(state, str):
+		state = json.loads(state)
+	state[key] = value
+	dc.output_parser_state = json.dumps(state)
+
+
+def update_build_fields(dc: "DeployCandidateBuild", fields: list[str]):
+	"""Write parser fields without saving (and rewriting the output of) the whole build"""
+	frappe.db.set_value(
+		dc.doctype, dc.name, {field: dc.get(field) for field in fields}, update_modified=False
+	)
+
+
 class DockerBuildOutputParser:
 	"""
-	Parses `docker build` raw output and updates Deploy Candidate.
+	Parses `docker build` raw output and updates Deploy Candidate Build.
 
-	Due to the way agent updates are propagated, all lines are updated
-	when agent is polled, and so output is looped N! times.
+	Agent sends all of the output every time it is polled. The number of
+	lines already parsed is kept in `output_parser_state`, so only lines
+	that arrived since the last poll are parsed and appended to the saved
+	output. Build steps and build error are the rest of the parser state.
 	"""
 
 	_steps_by_step_slug: dict[tuple[str, str], DeployCandidateBuildStep] | None
@@ -47,9 +73,14 @@ class DockerBuildOutputParser:
 		self.last_updated = now_datetime()
 
 		# Used to generate output and track parser state
+		self.offset: int = get_parser_state(dc, "build").get("offset", 0)
 		self.lines: list[str] = []
-		self.error_lines: list[str] = []
-		self.steps: dict[int, "DeployCandidateBuildStep"] = frappe._dict()
+		self.error_lines: list[str] = (dc.build_error or "").splitlines(keepends=True)
+		self.steps: dict[int, "DeployCandidateBuildStep"] = frappe._dict(
+			{bs.step_index: bs for bs in dc.build_steps if bs.step_index}
+		)
+		self.updated_steps: dict[str, "DeployCandidateBuildStep"] = {}
+		self.rewrite_output = False
 		self._steps_by_step_slug = None
 
 	# Convenience map used to update build steps
@@ -60,21 +91,62 @@ class DockerBuildOutputParser:
 		return self._steps_by_step_slug
 
 	def parse_and_update(self, output: "BuildOutput"):
-		for raw_line in output:
+		if isinstance(output, list) and len(output) < self.offset:
+			# Output has restarted, parse all of it again
+			self._reset()
+
+		for raw_line in itertools.islice(output, self.offset, None):
 			self._parse_line_handle_exc(raw_line)
+			self.offset += 1
 		self._end_parsing()
 
+	def _reset(self):
+		self.offset = 0
+		self.error_lines = []
+		self.steps = frappe._dict()
+		self.dc.build_output = ""
+		self.rewrite_output = True
+
 	def _parse_line_handle_exc(self, raw_line: str):
 		self._parse_line(raw_line)
 
 	def flush_output(self, commit: bool = True):
-		self.dc.build_output = "".join(self.lines)
+		self._append_output("".join(self.lines))
+		self.lines = []
+
 		self.dc.build_error = "".join(self.error_lines)
+		set_parser_state(self.dc, "build", {"offset": self.offset})
+		update_build_fields(self.dc, ["build_error", "docker_image_id", "output_parser_state"])
+
+		for step in self.updated_steps.values():
+			step.db_update()
+		if self.updated_steps:
+			self.dc.publish_steps()
+		self.updated_steps = {}
 
-		self.dc.save(ignore_version=True, ignore_permissions=True)
 		if commit:
 			frappe.db.commit()
 
+	def _append_output(self, output: str):
+		if self.rewrite_output:
+			self.dc.build_output = output
+			update_build_fields(self.dc, ["build_output"])
+			self.rewrite_output = False
+			return
+
+		if not output:
+			return
+
+		self.dc.build_output = (self.dc.build_output or "") + output
+		frappe.db.sql(
+			"""
+			UPDATE `tabDeploy Candidate Build`
+			SET build_output = CONCAT(IFNULL(build_output, ''), %s)
+			WHERE name = %s
+			""",
+			(output, self.dc.name),
+		)
+
 	def _parse_line(self, raw_line: str):
 		escaped_line = ansi_escape(raw_line)
 
@@ -140,6 +212,7 @@ class DockerBuildOutputParser:
 		if not step:
 			return
 
+		self.updated_steps[step.name] = step
 		line = split["line"]
 		if split["is_unusual"]:
 			step.output += line + "\n"
@@ -182,6 +255,7 @@ class DockerBuildOutputParser:
 		step.output = ""
 
 		self.steps[index] = step
+		self.updated_steps[step.name] = step
 
 	def _get_step_index_split(self, line: str) -> "IndexSplit | None":
 		splits = line.split(maxsplit=1)
@@ -233,14 +307,17 @@ class UploadStepUpdater:
 	registry.
 
 	Similar to DockerBuildOutputParser, this can process the output from
-	a remote (agent) or local (press) builder docker push.
+	a remote (agent) or local (press) builder docker push, and only the
+	lines that arrived since the last poll are processed.
 	"""
 
 	_upload_step: "DeployCandidateBuildStep | None"
 
 	def __init__(self, dc: "DeployCandidateBuild") -> None:
 		self.dc = dc
-		self.output: list[dict] = []
+		state = get_parser_state(dc, "push")
+		self.offset: int = state.get("offset", 0)
+		self.output: list[dict] = state.get("output", [])
 
 		# Used only if not remote
 		self.start_time = now_datetime()
@@ -267,8 +344,12 @@ class UploadStepUpdater:
 		if not self.upload_step:
 			return
 
-		for line in output:
+		if isinstance(output, list) and len(output) < self.offset:
+			self.offset, self.output = 0, []
+
+		for line in itertools.islice(output, self.offset, None):
 			self._update_output(line)
+			self.offset += 1
 
 		last_update = self.dc.last_updated
 		duration = (now_datetime() - last_update).total_seconds()
@@ -321,6 +402,10 @@ class UploadStepUpdater:
 				self.upload_step.status = "Success"
 
 		self.upload_step.output = "\n".join(output_lines)
-		self.dc.save(ignore_version=True, ignore_permissions=True)
+		self.upload_step.db_update()
+		self.dc.publish_steps()
+
+		set_parser_state(self.dc, "push", {"offset": self.offset, "output": self.output})
+		update_build_fields(self.dc, ["output_parser_state"])
 		if commit:
 			frappe.db.commit()
@@ -208,6 +208,7 @@ class DeployCandidateBuild(Document):
 		no_build: DF.Check
 		no_cache: DF.Check
 		no_push: DF.Check
+		output_parser_state: DF.JSON | None
 		pending_duration: DF.Time | None
 		pending_end: DF.Datetime | None
 		pending_start: DF.Datetime | None
@@ -734,6 +735,10 @@ class DeployCandidateBuild(Document):
 	def _update_status_from_remote_build_job(self, job: "AgentJob"):
 		match job.status:
 			case "Pending" | "Running":
+				# Output parsers have written their changes, avoid rewriting
+				# the whole build output on every poll
+				if self.status == Status.RUNNING.value:
+					return None
 				return self.set_status(Status.RUNNING)
 			case "Failure" | "Undelivered" | "Delivery Failure":
 				self._set_build_duration()
@@ -810,10 +815,10 @@ class DeployCandidateBuild(Document):
 
 		"""
 		Due to how agent - press communication takes place, every time an
-		output is published all of it has to be re-parsed from the start.
+		output is published all of it is sent again.
 
-		This is due to a method of streaming agent output to press not
-		existing.
+		Output parsers keep track of how much of it has been parsed in
+		`output_parser_state` and only parse the lines after that.
 		"""
 		self._set_output_parsers()
 		if output := get_remote_step_output(
@@ -1054,6 +1059,7 @@ class DeployCandidateBuild(Document):
 		self.build_directory = None
 		self.build_error = ""
 		self.build_output = ""
+		self.output_parser_state = None
 		# Failure flags
 		self.user_addressable_failure = False
 		self.manually_failed = False
@@ -1154,12 +1160,7 @@ class DeployCandidateBuild(Document):
 
 	def on_update(self):
 		if self.status == "Running":
-			frappe.publish_realtime(
-				f"bench_deploy:{self.name}:steps",
-				doctype=self.doctype,
-				docname=self.name,
-				message={"steps": self.build_steps, "name": self.name},
-			)
+			self.publish_steps()
 		else:
 			frappe.publish_realtime(
 				f"bench_deploy:{self.name}:finished",
@@ -1171,6 +1172,15 @@ class DeployCandidateBuild(Document):
 		# if self.has_value_changed("status") and self.team != "Administrator":
 		# 	create_webhook_event("Bench Deploy Status Update", self, self.team)
 
+	def publish_steps(self):
+		"""Send build steps to the dashboard, also called by output parsers which write without saving"""
+		frappe.publish_realtime(
+			f"bench_deploy:{self.name}:steps",
+			doctype=self.doctype,
+			docname=self.name,
+			message={"steps": self.build_steps, "name": self.name},
+		)
+
 	def run_scheduled_build_and_deploy(self):
 		self.set_status(Status.DRAFT)
 		self.pre_build()
@@ -178,3 +178,34 @@ class TestDeployCandidateBuild(FrappeTestCase):
 				self.assertEqual(newly_created_build.name, build)
 			else:
 				self.assertEqual(deploy_candidate_build.name, build)
+
+	def test_build_output_is_parsed_incrementally(self):
+		from press.press.doctype.deploy_candidate.docker_output_parsers import DockerBuildOutputParser
+
+		output = ["#1 [internal] load build definition\n", "#1 DONE 0.1s\n"]
+		DockerBuildOutputParser(self.deploy_candidate_build).parse_and_update(output)
+
+		output += ["#2 ERROR: failed to solve\n", "#2 ERROR: process did not complete\n"]
+		build: DeployCandidateBuild = frappe.get_doc(
+			"Deploy Candidate Build", self.deploy_candidate_build.name
+		)
+		parser = DockerBuildOutputParser(build)
+		with patch.object(parser, "_parse_line", wraps=parser._parse_line) as parse_line:
+			parser.parse_and_update(output)
+
+		self.assertEqual(parse_line.call_count, 2)
+		build.reload()
+		self.assertEqual(build.build_output, "".join(output))
+		self.assertEqual(build.build_error, "ERROR: failed to solve\n#2 ERROR: process did not complete\n")
+
+	def test_build_steps_are_published_when_parsers_update_them(self):
+		from press.press.doctype.deploy_candidate.docker_output_parsers import DockerBuildOutputParser
+
+		parser = DockerBuildOutputParser(self.deploy_candidate_build)
+		with patch.object(self.deploy_candidate_build, "publish_steps") as publish_steps:
+			parser.flush_output(commit=False)
+			publish_steps.assert_not_called()
+
+			parser.updated_steps = {"step": Mock()}
+			parser.flush_output(commit=False)
+			publish_steps.assert_called_once()
@@ -7,6 +7,10 @@ from frappe.core.utils import find
 from frappe.model.document import Document
 
 from press.overrides import get_permission_query_conditions_for_doctype
+from press.press.doctype.available_bench_update.available_bench_update import (
+	add_difference_updates,
+	remove_difference_updates,
+)
 
 
 class DeployCandidateDifference(Document):
@@ -62,6 +66,12 @@ class DeployCandidateDifference(Document):
 
 		self.populate_apps_table()
 
+	def after_insert(self):
+		add_difference_updates(self.source, self.destination)
+
+	def on_trash(self):
+		remove_difference_updates(self.source, self.destination)
+
 	def populate_apps_table(self):
 		source_candidate = frappe.get_doc("Deploy Candidate", self.source)
 		destination_candidate = frappe.get_doc("Deploy Candidate", self.destination)
@@ -12,6 +12,7 @@ from frappe.model.document import Document
 from frappe.query_builder import Interval
 from frappe.query_builder.functions import Now
 
+from press.api.github import clear_access_token_cache
 from press.utils import log_error
 
 if TYPE_CHECKING:
@@ -87,6 +88,8 @@ class GitHubWebhookLog(Document):
 			self.create_app_tag(payload)
 
 	def handle_installation_event(self):
+		# Cached token of the installation may have been revoked
+		clear_access_token_cache(self.github_installation_id)
 		payload = self.get_parsed_payload()
 		action = payload.get("action")
 		if action == "created" or action == "unsuspend":
@@ -98,6 +101,8 @@ class GitHubWebhookLog(Document):
 		payload = self.get_parsed_payload()
 		if payload["action"] not in ["added", "removed"]:
 			return
+		# Repositories accessible with a token are fixed when it is created
+		clear_access_token_cache(self.github_installation_id)
 		owner = payload["installation"]["account"]["login"]
 		self.update_installation_ids(owner)
 
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import math
 from base64 import b64encode
 from datetime import timedelta
 from functools import cached_property
@@ -21,6 +22,10 @@ from tenacity.retry import retry_if_not_result
 from twilio.base.exceptions import TwilioRestException
 
 from press.api.server import prometheus_query
+from press.press.doctype.alertmanager_alert_instance.alertmanager_alert_instance import (
+	get_firing_counts,
+	get_repeat_interval,
+)
 from press.press.doctype.server.server import MARIADB_DATA_MNT_POINT
 from press.telegram_utils import Telegram
 from press.utils import log_error
@@ -29,7 +34,6 @@ if TYPE_CHECKING:
 	from twilio.rest.api.v2010.account.call import CallInstance
 
 	from press.press.doctype.agent_job.agent_job import AgentJob
-	from press.press.doctype.alertmanager_webhook_log.alertmanager_webhook_log import AlertmanagerWebhookLog
 	from press.press.doctype.bench.bench import Bench
 	from press.press.doctype.database_server.database_server import DatabaseServer
 	from press.press.doctype.incident_settings.incident_settings import IncidentSettings
@@ -44,6 +48,7 @@ if TYPE_CHECKING:
 	from press.press.doctype.server.server import BaseServer, Server
 
 INCIDENT_ALERT = "Sites Down"  # TODO: make it a field or child table somewhere #
+INCIDENT_SEVERITY = "Critical"  # only alerts of this severity create incidents
 INCIDENT_SCOPE = (
 	"server"  # can be bench, cluster, server, etc. Not site, minor code changes required for that
 )
@@ -664,21 +669,9 @@ Incident URL: {incident_link}"""
 		)
 
 	def check_resolved(self):
-		try:
-			last_resolved: AlertmanagerWebhookLog = frappe.get_last_doc(
-				"Alertmanager Webhook Log",
-				{
-					"status": "Resolved",
-					"group_key": ("like", f"%{self.incident_scope}%"),
-					"alert": self.alert,
-				},
-			)
-		except frappe.DoesNotExistError:
-			return
-		else:
-			if not last_resolved.is_enough_firing:
-				self.create_log_for_server(is_resolved=True)
-				self.resolve()
+		if self.name in get_resolved_incidents([self]):
+			self.create_log_for_server(is_resolved=True)
+			self.resolve()
 
 	def resolve(self):
 		if self.status == "Validating":
@@ -701,15 +694,11 @@ Incident URL: {incident_link}"""
 
 	@property
 	def time_to_call_for_help(self) -> bool:
-		return self.status == "Confirmed" and frappe.utils.now_datetime() - self.creation > timedelta(
-			seconds=get_confirmation_threshold_duration() + get_call_threshold_duration()
-		)
+		return is_time_to_call_for_help(self.status, self.creation)
 
 	@property
 	def time_to_call_for_help_again(self) -> bool:
-		return self.status == "Acknowledged" and frappe.utils.now_datetime() - self.modified > timedelta(
-			seconds=get_call_repeat_interval()
-		)
+		return is_time_to_call_for_help_again(self.status, self.modified)
 
 	@cached_property
 	def sites_down(self) -> list[str]:
@@ -772,18 +761,73 @@ def validate_incidents():
 			incident.confirm()
 
 
+def is_time_to_call_for_help(status, creation) -> bool:
+	return status == "Confirmed" and frappe.utils.now_datetime() - creation > timedelta(
+		seconds=get_confirmation_threshold_duration() + get_call_threshold_duration()
+	)
+
+
+def is_time_to_call_for_help_again(status, modified) -> bool:
+	return status == "Acknowledged" and frappe.utils.now_datetime() - modified > timedelta(
+		seconds=get_call_repeat_interval()
+	)
+
+
+def get_resolved_incidents(incidents) -> set[str]:
+	"""
+	Incidents whose scope has seen a resolved alert, and where too few
+	instances are still firing for the incident to hold
+	"""
+	scopes = list({incident.get(INCIDENT_SCOPE) for incident in incidents if incident.get(INCIDENT_SCOPE)})
+	if not scopes:
+		return set()
+
+	total_instances = {
+		row[INCIDENT_SCOPE]: row.count
+		for row in frappe.get_all(
+			"Site",
+			filters={"status": "Active", INCIDENT_SCOPE: ("in", scopes)},
+			fields=[INCIDENT_SCOPE, "count(*) as count"],
+			group_by=INCIDENT_SCOPE,
+		)
+	}
+
+	resolved = set()
+	for alert in {incident.alert for incident in incidents if incident.alert}:
+		since = frappe.utils.add_to_date(frappe.utils.now(), hours=-get_repeat_interval(alert))
+		firing_counts = get_firing_counts(alert, INCIDENT_SEVERITY, scopes, since)
+		for incident in incidents:
+			scope = incident.get(INCIDENT_SCOPE)
+			if incident.alert != alert or scope not in firing_counts:
+				continue
+			firing, has_resolved = firing_counts[scope]
+			threshold = min(
+				math.floor(MIN_FIRING_INSTANCES_FRACTION * total_instances.get(scope, 0)),
+				MIN_FIRING_INSTANCES,
+			)
+			if has_resolved and firing <= threshold:
+				resolved.add(incident.name)
+	return resolved
+
+
 def resolve_incidents():
 	ongoing_incidents = frappe.get_all(
 		"Incident",
 		filters={
 			"status": ("in", ["Validating", "Confirmed", "Acknowledged"]),
 		},
-		pluck="name",
+		fields=["name", "alert", "status", "creation", "modified", INCIDENT_SCOPE],
 	)
-	for incident_name in ongoing_incidents:
-		incident = Incident("Incident", incident_name)
-		incident.check_resolved()
-		if incident.time_to_call_for_help or incident.time_to_call_for_help_again:
+	resolved_incidents = get_resolved_incidents(ongoing_incidents)
+	for incident_dict in ongoing_incidents:
+		if incident_dict.name in resolved_incidents:
+			incident = Incident("Incident", incident_dict.name)
+			incident.create_log_for_server(is_resolved=True)
+			incident.resolve()
+		elif is_time_to_call_for_help(
+			incident_dict.status, incident_dict.creation
+		) or is_time_to_call_for_help_again(incident_dict.status, incident_dict.modified):
+			incident = Incident("Incident", incident_dict.name)
 			incident.create_log_for_server()
 			incident.call_humans()
 
@@ -564,23 +564,47 @@ class Invoice(Document):
 					item.description = "Prepaid Credits"
 
 	def add_usage_record(self, usage_record):
+		self.add_usage_records([usage_record])
+
+	def add_usage_records(self, usage_records):
+		"""Add usage records to invoice items, totals are recomputed once when the invoice is saved"""
 		if self.type != "Subscription":
 			return
-		# return if this usage_record is already accounted for in an invoice
-		if usage_record.invoice:
-			return
 
-		# return if this usage_record does not fall inside period of invoice
-		usage_record_date = getdate(usage_record.date)
 		start = getdate(self.period_start)
 		end = getdate(self.period_end)
-		if not (start <= usage_record_date <= end):
+		items = self.get_usage_record_items()
+		added = []
+		for usage_record in usage_records:
+			# skip if this usage_record is already accounted for in an invoice
+			if usage_record.invoice:
+				continue
+
+			# skip if this usage_record does not fall inside period of invoice
+			if not (start <= getdate(usage_record.date) <= end):
+				continue
+
+			invoice_item = self.get_or_append_usage_record_item(items, usage_record)
+			invoice_item.quantity = (invoice_item.quantity or 0) + 1
+
+			if usage_record.payout:
+				self.payout += usage_record.payout
+
+			added.append(usage_record)
+
+		if not added:
 			return
 
-		invoice_item = self.get_invoice_item_for_usage_record(usage_record)
+		self.save()
+		frappe.db.set_value("Usage Record", {"name": ("in", [ur.name for ur in added])}, "invoice", self.name)
+		for usage_record in added:
+			usage_record.invoice = self.name
+
+	def get_or_append_usage_record_item(self, items: dict, usage_record):
+		key = get_usage_record_item_key(usage_record, usage_record.amount)
 		# if not found, create a new invoice item
-		if not invoice_item:
-			invoice_item = self.append(
+		if key not in items:
+			items[key] = self.append(
 				"items",
 				{
 					"document_type": usage_record.document_type,
@@ -591,14 +615,7 @@ class Invoice(Document):
 					"site": usage_record.site,
 				},
 			)
-
-		invoice_item.quantity = (invoice_item.quantity or 0) + 1
-
-		if usage_record.payout:
-			self.payout += usage_record.payout
-
-		self.save()
-		usage_record.db_set("invoice", self.name)
+		return items[key]
 
 	def remove_usage_record(self, usage_record):
 		if self.type != "Subscription":
@@ -623,19 +640,11 @@ class Invoice(Document):
 		usage_record.db_set("invoice", None)
 
 	def get_invoice_item_for_usage_record(self, usage_record):
-		invoice_item = None
-		for row in self.items:
-			conditions = (
-				row.document_type == usage_record.document_type
-				and row.document_name == usage_record.document_name
-				and row.plan == usage_record.plan
-				and row.rate == usage_record.amount
-			)
-			if row.document_type == "Marketplace App":
-				conditions = conditions and row.site == usage_record.site
-			if conditions:
-				invoice_item = row
-		return invoice_item
+		return self.get_usage_record_items().get(get_usage_record_item_key(usage_record, usage_record.amount))
+
+	def get_usage_record_items(self) -> dict[tuple, InvoiceItem]:
+		"""Invoice items by the usage record fields they are billed for, last matching row wins"""
+		return {get_usage_record_item_key(row, row.rate): row for row in self.items}
 
 	def validate_items(self):
 		items_to_remove = []
@@ -1097,6 +1106,12 @@ def finalize_draft_invoice(invoice):
 		log_error("Invoice creation for next month failed", invoice=invoice.name)
 
 
+def get_usage_record_item_key(row, rate) -> tuple:
+	"""Usage records are billed on the same item if these match, marketplace apps are billed per site"""
+	site = row.site if row.document_type == "Marketplace App" else None
+	return (row.document_type, row.document_name, row.plan, rate, site)
+
+
 def calculate_gst(amount):
 	return amount * 0.18
 
@@ -46,6 +46,54 @@ class TestInvoice(FrappeTestCase):
 
 		self.assertEqual(invoice.amount_due, 60)
 
+	def test_invoice_add_usage_records_in_bulk(self):
+		from press.press.doctype.usage_record.usage_record import update_usage_in_invoices
+
+		invoice = frappe.get_doc(
+			doctype="Invoice",
+			team=self.team.name,
+			period_start=today(),
+			period_end=add_days(today(), 10),
+		).insert()
+
+		usage_records = []
+		for amount in [10, 10, 30]:
+			usage_record = frappe.get_doc(doctype="Usage Record", team=self.team.name, amount=amount)
+			usage_record.insert()
+			usage_record.flags.skip_invoice_update = True
+			usage_record.submit()
+			usage_records.append(usage_record)
+
+		update_usage_in_invoices(usage_records)
+		invoice.reload()
+
+		self.assertEqual(len(invoice.items), 2)
+		self.assertEqual(invoice.items[0].quantity, 2)
+		self.assertEqual(invoice.total, 50)
+		for usage_record in usage_records:
+			self.assertEqual(frappe.db.get_value("Usage Record", usage_record.name, "invoice"), invoice.name)
+
+	def test_invoicing_teams_are_resolved_without_a_lookup_per_team(self):
+		from press.press.doctype.usage_record.usage_record import get_invoicing_teams
+
+		billing_team = create_test_team()
+		parent_team = create_test_team()
+		parent_team.db_set("billing_team", billing_team.name)
+		child_team = create_test_team()
+		child_team.db_set("parent_team", parent_team.name)
+		free_team = create_test_team()
+		free_team.db_set("free_account", 1)
+
+		teams = {self.team.name, child_team.name, free_team.name}
+		with patch.object(frappe.db, "get_value", wraps=frappe.db.get_value) as get_value:
+			invoicing_teams = get_invoicing_teams(teams)
+
+		get_value.assert_not_called()
+		self.assertEqual(
+			invoicing_teams,
+			{self.team.name: self.team.name, child_team.name: billing_team.name, free_team.name: None},
+		)
+
 	def test_invoice_cancel_usage_record(self):
 		invoice = frappe.get_doc(
 			doctype="Invoice",
@@ -4,11 +4,13 @@
 from __future__ import annotations
 
 import json
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 import frappe
 from frappe.desk.doctype.tag.tag import add_tag
 from frappe.model.document import Document
+from frappe.utils import create_batch, flt, get_datetime, now_datetime
 
 from press.press.doctype.ansible_console.ansible_console import AnsibleAdHoc
 
@@ -85,6 +87,126 @@ class MariaDBBinlog(Document):
 			self.add_comment(text=f"Binlog downloaded successfully to /var/lib/mysql/{self.file_name}.bak")
 
 
+# Columns written by `sync_binlogs`, rows of existing binlogs only update the synced ones
+BINLOG_COLUMNS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"database_server",
+	"file_name",
+	"size_mb",
+	"file_modification_time",
+	"indexed",
+	"purged_from_disk",
+	"current",
+)
+SYNCED_COLUMNS = ("modified", "size_mb", "file_modification_time", "indexed", "purged_from_disk", "current")
+BINLOG_UPSERT_BATCH_SIZE = 500
+
+
+def sync_binlogs(database_server: str, info: dict) -> int:
+	"""
+	Sync MariaDB Binlog records of a database server with the binlog list from agent.
+
+	Existing records are read once and compared with the list in memory, only
+	new and changed records are written with multi-row upserts.
+	Returns the number of records written.
+	"""
+	current_binlog = info.get("current_binlog", "")
+	binlogs_in_disk = {binlog["name"]: binlog for binlog in info.get("binlogs_in_disk", [])}
+	indexed_binlogs = set(info.get("indexed_binlogs", []))
+
+	existing = {
+		binlog.file_name: binlog
+		for binlog in frappe.get_all(
+			"MariaDB Binlog",
+			filters={"database_server": database_server},
+			fields=["name", "file_name", *SYNCED_COLUMNS[1:]],
+		)
+	}
+
+	now = now_datetime()
+	rows = []
+	for file_name in binlogs_in_disk.keys() | existing.keys():
+		values = get_synced_values(
+			existing.get(file_name),
+			binlogs_in_disk.get(file_name),
+			is_indexed=file_name in indexed_binlogs,
+			is_current=file_name == current_binlog,
+		)
+		if values is None:
+			continue
+
+		binlog = existing.get(file_name)
+		rows.append(
+			(
+				binlog.name if binlog else frappe.generate_hash(length=10),
+				now,
+				now,
+				frappe.session.user,
+				frappe.session.user,
+				database_server,
+				file_name,
+				values["size_mb"],
+				values["file_modification_time"],
+				values["indexed"],
+				values["purged_from_disk"],
+				values["current"],
+			)
+		)
+
+	for batch in create_batch(rows, BINLOG_UPSERT_BATCH_SIZE):
+		upsert_binlogs(batch)
+	return len(rows)
+
+
+def get_synced_values(
+	binlog: frappe._dict | None, binlog_in_disk: dict | None, is_indexed: bool, is_current: bool
+) -> dict | None:
+	"""Values a binlog record should have, None if the record is up to date"""
+	if binlog_in_disk:
+		size_mb = flt(binlog_in_disk.get("size", 0) / 1024 / 1024, 1)
+		file_modification_time = datetime.fromtimestamp(int(binlog_in_disk["modified_at"]))
+	else:
+		size_mb, file_modification_time = binlog.size_mb, binlog.file_modification_time
+
+	values = {
+		"size_mb": size_mb,
+		"file_modification_time": file_modification_time,
+		"indexed": int(is_indexed),
+		"purged_from_disk": int(not binlog_in_disk or bool(binlog and binlog.purged_from_disk)),
+		"current": int(is_current),
+	}
+	if not binlog:
+		return values
+
+	if (
+		flt(binlog.size_mb, 1) == values["size_mb"]
+		and get_datetime(binlog.file_modification_time) == values["file_modification_time"]
+		and binlog.indexed == values["indexed"]
+		and binlog.purged_from_disk == values["purged_from_disk"]
+		and binlog.current == values["current"]
+	):
+		return None
+	return values
+
+
+def upsert_binlogs(rows: list[tuple]):
+	columns = ", ".join(f"`{column}`" for column in BINLOG_COLUMNS)
+	placeholders = ", ".join([f"({', '.join(['%s'] * len(BINLOG_COLUMNS))})"] * len(rows))
+	updates = ", ".join(f"`{column}` = VALUES(`{column}`)" for column in SYNCED_COLUMNS)
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabMariaDB Binlog` ({columns})
+		VALUES {placeholders}
+		ON DUPLICATE KEY UPDATE {updates}
+		""",
+		[value for row in rows for value in row],
+	)
+
+
 def process_upload_binlogs_to_s3_job_update(job: AgentJob):
 	if job.status != "Success" or job.server_type != "Database Server" or not job.data:
 		return
@@ -1,9 +1,21 @@
 # Copyright (c) 2025, Frappe and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.mariadb_binlog.mariadb_binlog import sync_binlogs
+
+DATABASE_SERVER = "m-test.frappe.cloud"
+
+
+def binlog_list(current: str, in_disk: list[str], indexed: list[str], size: int = 1024 * 1024):
+	return {
+		"current_binlog": current,
+		"binlogs_in_disk": [{"name": name, "size": size, "modified_at": 1735689600} for name in in_disk],
+		"indexed_binlogs": indexed,
+	}
+
 
 class IntegrationTestMariaDBBinlog(FrappeTestCase):
 	"""
@@ -11,4 +23,38 @@ class IntegrationTestMariaDBBinlog(FrappeTestCase):
 	Use this class for testing interactions between multiple components.
 	"""
 
-	pass
+	def get_binlogs(self):
+		return {
+			binlog.file_name: binlog
+			for binlog in frappe.get_all(
+				"MariaDB Binlog",
+				filters={"database_server": DATABASE_SERVER},
+				fields=["name", "file_name", "size_mb", "indexed", "purged_from_disk", "current"],
+			)
+		}
+
+	def test_sync_inserts_and_updates_binlogs(self):
+		changed = sync_binlogs(
+			DATABASE_SERVER, binlog_list("mysql-bin.000002", ["mysql-bin.000001", "mysql-bin.000002"], [])
+		)
+		self.assertEqual(changed, 2)
+		before = self.get_binlogs()
+		self.assertEqual(before["mysql-bin.000002"].current, 1)
+		self.assertEqual(before["mysql-bin.000001"].size_mb, 1)
+
+		changed = sync_binlogs(
+			DATABASE_SERVER,
+			binlog_list("mysql-bin.000003", ["mysql-bin.000002", "mysql-bin.000003"], ["mysql-bin.000002"]),
+		)
+		self.assertEqual(changed, 3)
+		after = self.get_binlogs()
+		self.assertEqual(after["mysql-bin.000001"].name, before["mysql-bin.000001"].name)
+		self.assertEqual(after["mysql-bin.000001"].purged_from_disk, 1)
+		self.assertEqual(after["mysql-bin.000002"].indexed, 1)
+		self.assertEqual(after["mysql-bin.000002"].current, 0)
+		self.assertEqual(after["mysql-bin.000003"].current, 1)
+
+	def test_sync_skips_unchanged_binlogs(self):
+		info = binlog_list("mysql-bin.000001", ["mysql-bin.000001"], ["mysql-bin.000001"])
+		sync_binlogs(DATABASE_SERVER, info)
+		self.assertEqual(sync_binlogs(DATABASE_SERVER, info), 0)
@@ -27,6 +27,7 @@ class PressSettings(Document):
 		from press.press.doctype.erpnext_app.erpnext_app import ERPNextApp
 
 		agent_github_access_token: DF.Data | None
+		agent_job_poller_workers: DF.Int
 		agent_repository_owner: DF.Data | None
 		agent_sentry_dsn: DF.Data | None
 		app_include_script: DF.Data | None
@@ -51,6 +52,7 @@ class PressSettings(Document):
 		code_server_password: DF.Data | None
 		commission: DF.Float
 		compress_app_cache: DF.Check
+		concurrent_agent_job_polling: DF.Check
 		data_40: DF.Data | None
 		default_apps: DF.Table[AppGroup]
 		default_outgoing_id: DF.Data | None
@@ -104,6 +106,7 @@ class PressSettings(Document):
 		max_allowed_screenshots: DF.Int
 		max_concurrent_physical_restorations: DF.Int
 		max_failed_backup_attempts_in_a_day: DF.Int
+		metrics_refresh_interval: DF.Int
 		micro_debit_charge_inr: DF.Currency
 		micro_debit_charge_usd: DF.Currency
 		minimum_rebuild_memory: DF.Int
@@ -1,9 +1,158 @@
 # Copyright (c) 2024, Frappe and Contributors
 # See license.txt
 
-# import frappe
+import json
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.press_webhook.press_webhook import PressWebhook
+from press.press.doctype.press_webhook_log.webhook_delivery import (
+	MAX_CALLS_PER_ENDPOINT,
+	WebhookDelivery,
+	deliver,
+)
+from press.press.doctype.team.test_team import create_test_team
+
+EVENT = "Site Status Update"
+
+
+def create_test_webhook(team: str, endpoint: str) -> PressWebhook:
+	if not frappe.db.exists("Press Webhook Event", EVENT):
+		frappe.get_doc({"doctype": "Press Webhook Event", "title": EVENT, "enabled": 1}).insert()
+
+	with patch.object(PressWebhook, "validate"):
+		return frappe.get_doc(
+			{
+				"doctype": "Press Webhook",
+				"team": team,
+				"endpoint": endpoint,
+				"secret": frappe.generate_hash(),
+				"enabled": 1,
+				"events": [{"event": EVENT}],
+			}
+		).insert(ignore_permissions=True)
+
+
+def create_test_webhook_log(team: str) -> str:
+	return (
+		frappe.get_doc(
+			{
+				"doctype": "Press Webhook Log",
+				"team": team,
+				"event": EVENT,
+				"status": "Queued",
+				"request_payload": json.dumps({"event": EVENT}),
+			}
+		)
+		.insert(ignore_permissions=True)
+		.name
+	)
+
+
+def response(status_code: int):
+	return MagicMock(status_code=status_code, text="")
+
 
 class TestPressWebhookLog(FrappeTestCase):
-	pass
+	def setUp(self):
+		super().setUp()
+		self.team = create_test_team().name
+		self.ok = create_test_webhook(self.team, "https://ok.example.com/hook")
+		self.down = create_test_webhook(self.team, "https://down.example.com/hook")
+
+	def post(self, url, **kwargs):
+		return response(200 if url == self.ok.endpoint else 500)
+
+	def test_batch_is_delivered_and_saved_in_bulk(self):
+		logs = [create_test_webhook_log(self.team) for _ in range(3)]
+		with patch("requests.Session.post", side_effect=self.post):
+			deliver(logs)
+
+		for log in logs:
+			log = frappe.get_doc("Press Webhook Log", log)
+			self.assertEqual(log.status, "Partially Sent")
+			self.assertEqual(
+				{(attempt.webhook, attempt.status) for attempt in log.attempts},
+				{(self.ok.name, "Sent"), (self.down.name, "Failed")},
+			)
+
+	def test_only_failed_webhooks_are_retried(self):
+		log = create_test_webhook_log(self.team)
+		with patch("requests.Session.post", side_effect=self.post):
+			deliver([log])
+
+		with patch("requests.Session.post", return_value=response(200)) as post:
+			deliver([log])
+
+		self.assertEqual(post.call_args.args[0], self.down.endpoint)
+		log = frappe.get_doc("Press Webhook Log", log)
+		self.assertEqual(log.status, "Sent")
+		self.assertEqual([attempt.idx for attempt in log.attempts], [1, 2, 3])
+
+	def test_logs_are_retried_if_delivery_fails(self):
+		log = create_test_webhook_log(self.team)
+		with patch.object(WebhookDelivery, "send", side_effect=RuntimeError):
+			deliver([log])
+
+		log = frappe.get_doc("Press Webhook Log", log)
+		self.assertEqual(log.status, "Failed")
+		self.assertEqual(log.retries, 1)
+		self.assertTrue(log.next_retry_at)
+
+	def test_calls_in_flight_to_an_endpoint_are_limited(self):
+		logs = [create_test_webhook_log(self.team) for _ in range(3 * MAX_CALLS_PER_ENDPOINT)]
+		lock, in_flight, most_in_flight = threading.Lock(), defaultdict(int), defaultdict(int)
+
+		def post(url, **kwargs):
+			with lock:
+				in_flight[url] += 1
+				most_in_flight[url] = max(most_in_flight[url], in_flight[url])
+			time.sleep(0.01)
+			with lock:
+				in_flight[url] -= 1
+			return response(200)
+
+		with patch("requests.Session.post", side_effect=post):
+			deliver(logs)
+
+		self.assertEqual(set(most_in_flight), {self.ok.endpoint, self.down.endpoint})
+		for count in most_in_flight.values():
+			self.assertLessEqual(count, MAX_CALLS_PER_ENDPOINT)
+		self.assertEqual({frappe.db.get_value("Press Webhook Log", log, "status") for log in logs}, {"Sent"})
+
+	def test_retries_of_deleted_webhooks_are_dropped(self):
+		log = create_test_webhook_log(self.team)
+		with patch("requests.Session.post", side_effect=self.post):
+			deliver([log])
+
+		frappe.delete_doc("Press Webhook", self.down.name, force=True)
+		with patch("requests.Session.post") as post:
+			deliver([log])
+
+		post.assert_not_called()
+		log = frappe.get_doc("Press Webhook Log", log)
+		self.assertEqual(log.status, "Partially Sent")
+		self.assertIsNone(log.next_retry_at)
+
+	def test_delivered_logs_are_not_retried_if_saving_fails(self):
+		frappe.delete_doc("Press Webhook", self.down.name, force=True)
+		delivered = create_test_webhook_log(self.team)
+		other_team = create_test_team().name
+		create_test_webhook(other_team, "https://down.example.com/hook")
+		failed = create_test_webhook_log(other_team)
+
+		with (
+			patch("requests.Session.post", side_effect=self.post),
+			patch.object(WebhookDelivery, "save", side_effect=RuntimeError),
+		):
+			deliver([delivered, failed])
+
+		delivered = frappe.get_doc("Press Webhook Log", delivered)
+		self.assertEqual((delivered.status, delivered.retries), ("Sent", 0))
+		failed = frappe.get_doc("Press Webhook Log", failed)
+		self.assertEqual((failed.status, failed.retries), ("Failed", 1))
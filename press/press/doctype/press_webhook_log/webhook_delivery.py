@@ -0,0 +1,390 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Concurrent delivery of webhook logs.
+
+`process` of Press Webhook Log claims due logs and hands them to `deliver` in
+batches. A batch sends all of its endpoint calls from a thread pool. Calls
+are queued per endpoint and at most `MAX_CALLS_PER_ENDPOINT` of them are
+submitted to the pool at a time, the next one only once one finishes, so a
+slow endpoint only holds up its own calls. Each endpoint gets a keep-alive
+session that outlives the batch.
+
+Threads only make HTTP requests. Logs, webhooks and earlier attempts are read
+before sending, attempts and log statuses are written afterwards with a few
+multi-row queries.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import frappe
+import requests
+from frappe.monitor import add_data_to_monitor
+from frappe.utils import add_to_date, convert_utc_to_system_timezone, get_datetime, now_datetime
+
+from press.metrics import WEBHOOK_DELIVERY_LAG
+from press.utils import log_error
+
+MAX_WORKERS = 32
+MAX_CALLS_PER_ENDPOINT = 4
+LOGS_PER_BATCH = 500
+MAX_LOGS_PER_RUN = 4 * LOGS_PER_BATCH
+REQUEST_TIMEOUT = 5
+
+# Per endpoint origin, reused by later batches in the same worker process
+_sessions: dict[str, requests.Session] = {}
+
+
+def get_origin(url: str) -> str:
+	parts = urlsplit(url)
+	return f"{parts.scheme}://{parts.netloc}"
+
+
+def prepare_endpoint(url: str) -> str:
+	"""Create session of an endpoint before threads use it, returns the endpoint's origin"""
+	origin = get_origin(url)
+	if origin not in _sessions:
+		_sessions[origin] = requests.Session()
+	return origin
+
+
+def deliver(logs: list[str]):
+	WebhookDelivery(logs).run()
+
+
+class WebhookDelivery:
+	def __init__(self, logs: list[str]):
+		self.logs = {
+			log.name: log
+			for log in frappe.get_all(
+				"Press Webhook Log",
+				filters={"name": ("in", logs)},
+				fields=["name", "event", "team", "request_payload", "retries", "creation"],
+			)
+		}
+
+	def run(self):
+		start = time.monotonic()
+		try:
+			attempts = self.get_attempts()
+			calls = self.get_calls(attempts)
+			results = self.send(calls)
+		except Exception:
+			log_error("Webhook Delivery Exception", logs=list(self.logs))
+			frappe.db.rollback()
+			self.schedule_retries(list(self.logs.values()))
+			return
+
+		try:
+			self.save(calls, results, attempts, list(self.logs.values()))
+			frappe.db.commit()
+		except Exception:
+			log_error("Webhook Delivery Exception", logs=list(self.logs))
+			frappe.db.rollback()
+			self.save_each_log(calls, results, attempts)
+			return
+
+		self.record_stats(calls, results, attempts, time.monotonic() - start)
+
+	def get_attempts(self) -> dict[str, dict[str, str]]:
+		"""Status of each webhook already called for a log, a webhook is sent once any attempt succeeded"""
+		attempts = defaultdict(dict)
+		self.last_idx = defaultdict(int)
+		for attempt in frappe.get_all(
+			"Press Webhook Attempt",
+			filters={"parenttype": "Press Webhook Log", "parent": ("in", list(self.logs))},
+			fields=["parent", "webhook", "status", "idx"],
+			order_by="idx asc",
+		):
+			self.last_idx[attempt.parent] = max(self.last_idx[attempt.parent], attempt.idx)
+			if attempts[attempt.parent].get(attempt.webhook) != "Sent":
+				attempts[attempt.parent][attempt.webhook] = attempt.status
+		return attempts
+
+	def get_calls(self, attempts: dict[str, dict[str, str]]) -> list[frappe._dict]:
+		"""Webhooks subscribed to new logs, and webhooks that failed for logs being retried"""
+		subscribed = self.get_subscribed_webhooks(
+			[log for name, log in self.logs.items() if name not in attempts]
+		)
+		failed = {
+			webhook
+			for statuses in attempts.values()
+			for webhook, status in statuses.items()
+			if status == "Failed"
+		}
+		# Failed webhooks that still exist, attempts of deleted ones aren't retried
+		self.webhooks = webhooks = self.get_webhooks(failed)
+
+		calls = []
+		for log in self.logs.values():
+			if log.name in attempts:
+				targets = [
+					webhooks[webhook]
+					for webhook, status in attempts[log.name].items()
+					if status == "Failed" and webhook in webhooks
+				]
+			else:
+				targets = subscribed.get((log.team, log.event), [])
+
+			payload = json.loads(log.request_payload)
+			for webhook in targets:
+				calls.append(frappe._dict(log=log.name, payload=payload, **webhook))
+		return calls
+
+	def get_subscribed_webhooks(self, new_logs) -> dict[tuple[str, str], list[dict]]:
+		if not new_logs:
+			return {}
+
+		PressWebhookSelectedEvent = frappe.qb.DocType("Press Webhook Selected Event")
+		PressWebhook = frappe.qb.DocType("Press Webhook")
+		rows = (
+			frappe.qb.from_(PressWebhookSelectedEvent)
+			.select(
+				PressWebhook.name.as_("webhook"),
+				PressWebhook.endpoint,
+				PressWebhook.secret,
+				PressWebhook.team,
+				PressWebhookSelectedEvent.event,
+			)
+			.left_join(PressWebhook)
+			.on(PressWebhookSelectedEvent.parent == PressWebhook.name)
+			.where(PressWebhookSelectedEvent.event.isin({log.event for log in new_logs}))
+			.where(PressWebhook.team.isin({log.team for log in new_logs}))
+			.where(PressWebhook.enabled == 1)
+			.run(as_dict=True)
+		)
+
+		subscribed = defaultdict(list)
+		for row in rows:
+			subscribed[(row.team, row.event)].append(
+				{"webhook": row.webhook, "endpoint": row.endpoint, "secret": row.secret}
+			)
+		return subscribed
+
+	def get_webhooks(self, names: set[str]) -> dict[str, dict]:
+		if not names:
+			return {}
+		return {
+			webhook.name: {"webhook": webhook.name, "endpoint": webhook.endpoint, "secret": webhook.secret}
+			for webhook in frappe.get_all(
+				"Press Webhook", filters={"name": ("in", list(names))}, fields=["name", "endpoint", "secret"]
+			)
+		}
+
+	def send(self, calls: list[frappe._dict]) -> list[tuple[int, str, datetime]]:
+		if not calls:
+			return []
+
+		queues = defaultdict(deque)
+		for index, call in enumerate(calls):
+			queues[prepare_endpoint(call.endpoint)].append(index)
+
+		results = send_queued_calls(calls, queues)
+
+		# Threads only record UTC, since system timezone is read from `frappe.local`
+		return [
+			(status_code, body, convert_utc_to_system_timezone(sent_at).replace(tzinfo=None))
+			for status_code, body, sent_at in results
+		]
+
+	def save(self, calls, results, attempts, logs):
+		now = now_datetime()
+		rows, sent_by_log, calls_by_log = [], defaultdict(int), defaultdict(int)
+		for call, (status_code, body, timestamp) in zip(calls, results, strict=True):
+			sent = 200 <= status_code < 300
+			calls_by_log[call.log] += 1
+			sent_by_log[call.log] += sent
+			rows.append(
+				(
+					frappe.generate_hash(length=10),
+					now,
+					now,
+					frappe.session.user,
+					frappe.session.user,
+					call.log,
+					"Press Webhook Log",
+					"attempts",
+					self.last_idx[call.log] + calls_by_log[call.log],
+					call.webhook,
+					call.endpoint,
+					"Sent" if sent else "Failed",
+					body,
+					str(status_code),
+					timestamp,
+				)
+			)
+
+		if rows:
+			frappe.db.bulk_insert("Press Webhook Attempt", ATTEMPT_FIELDS, rows)
+
+		frappe.db.bulk_update(
+			"Press Webhook Log",
+			{
+				log.name: get_log_values(
+					log,
+					calls_by_log[log.name],
+					sent_by_log[log.name],
+					attempts.get(log.name),
+					now,
+					self.webhooks,
+				)
+				for log in logs
+			},
+		)
+
+	def save_each_log(self, calls, results, attempts):
+		"""Save logs one by one after the batch couldn't be saved, so only failed calls are retried"""
+		results_by_log = defaultdict(list)
+		for call, result in zip(calls, results, strict=True):
+			results_by_log[call.log].append((call, result))
+
+		for log in self.logs.values():
+			log_calls = results_by_log[log.name]
+			try:
+				self.save(
+					[call for call, _ in log_calls], [result for _, result in log_calls], attempts, [log]
+				)
+				frappe.db.commit()
+			except Exception:
+				frappe.db.rollback()
+				if all(200 <= status_code < 300 for _, (status_code, _, _) in log_calls):
+					frappe.db.set_value("Press Webhook Log", log.name, "status", "Sent")
+					frappe.db.commit()
+				else:
+					self.schedule_retries([log])
+
+	def schedule_retries(self, logs):
+		"""Don't leave logs queued when their delivery couldn't be completed"""
+		now = now_datetime()
+		frappe.db.bulk_update(
+			"Press Webhook Log",
+			{
+				log.name: {
+					"status": "Failed",
+					"retries": log.retries + 1,
+					"next_retry_at": add_to_date(now, minutes=2 ** (log.retries + 1)),
+				}
+				for log in logs
+			},
+		)
+		frappe.db.commit()
+
+	def record_stats(self, calls, results, attempts, duration: float):
+		now = now_datetime()
+		sent = sum(1 for status_code, _, _ in results if 200 <= status_code < 300)
+		add_data_to_monitor(
+			webhook_delivery={
+				"logs": len(self.logs),
+				"calls": len(calls),
+				"sent": sent,
+				"duration": round(duration, 3),
+			}
+		)
+		# Lag from the event to its first delivery attempt
+		WEBHOOK_DELIVERY_LAG.observe_many(
+			[
+				((now - get_datetime(log.creation)).total_seconds(), ())
+				for log in self.logs.values()
+				if log.name not in attempts
+			]
+		)
+
+
+ATTEMPT_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"parent",
+	"parenttype",
+	"parentfield",
+	"idx",
+	"webhook",
+	"endpoint",
+	"status",
+	"response_body",
+	"response_status_code",
+	"timestamp",
+)
+
+
+def send_queued_calls(calls: list[frappe._dict], queues: dict[str, deque]) -> list:
+	"""Send calls with at most `MAX_CALLS_PER_ENDPOINT` of an endpoint submitted at a time"""
+	results = [None] * len(calls)
+	in_flight = {}
+	with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(calls))) as executor:
+
+		def submit_next(origin: str):
+			if queues[origin]:
+				index = queues[origin].popleft()
+				call = calls[index]
+				future = executor.submit(send_webhook_call, call.endpoint, call.payload, call.secret)
+				in_flight[future] = (origin, index)
+
+		for origin in queues:
+			for _ in range(MAX_CALLS_PER_ENDPOINT):
+				submit_next(origin)
+
+		while in_flight:
+			done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+			for future in done:
+				origin, index = in_flight.pop(future)
+				results[index] = future.result()
+				submit_next(origin)
+	return results
+
+
+def send_webhook_call(url: str, payload: dict, secret: str) -> tuple[int, str, datetime]:
+	"""Runs in a worker thread, returns status code, response body and UTC time of the call"""
+	timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
+	try:
+		response = _sessions[get_origin(url)].post(
+			url, json=payload, headers={"X-Webhook-Secret": secret}, timeout=REQUEST_TIMEOUT
+		)
+		return response.status_code, response.text or "", timestamp
+	except requests.exceptions.SSLError:
+		return 0, "SSL Error. Please check if SSL the certificate of the webhook is valid.", timestamp
+	except requests.exceptions.Timeout:
+		return 0, "Request Timeout. Please check if the webhook is reachable.", timestamp
+	except requests.exceptions.ConnectionError:
+		return 0, "Failed to connect to the webhook endpoint", timestamp
+	except Exception as e:
+		return 0, str(e), timestamp
+
+
+def get_log_values(
+	log, calls: int, sent: int, previous: dict[str, str] | None, now, webhooks: dict[str, dict]
+) -> dict:
+	"""Status of a log after a delivery, same rules as for a single log"""
+	values = {"status": "Sent", "modified": now}
+	if previous is None:
+		# First delivery, calls were made to every subscribed webhook
+		if calls and sent == 0:
+			values["status"] = "Failed"
+		elif sent != calls:
+			values["status"] = "Partially Sent"
+			return values
+		else:
+			return values
+	else:
+		failed = [webhook for webhook, status in previous.items() if status == "Failed"]
+		retried = sum(1 for webhook in failed if webhook in webhooks)
+		if sent == retried == len(failed):
+			return values
+		values["status"] = "Partially Sent" if (len(previous) - len(failed) > 0 or sent > 0) else "Failed"
+		if sent == retried:
+			# Only webhooks deleted since the last attempt failed, there's nothing left to retry
+			values["next_retry_at"] = None
+			return values
+
+	values["retries"] = log.retries + 1
+	values["next_retry_at"] = add_to_date(now, minutes=2 ** values["retries"])
+	return values
@@ -0,0 +1,237 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Reconciliation of Remote File statuses with the objects in a bucket.
+
+Remote File rows of the bucket are spooled to a temporary file in binary key
+order, which is the order S3 lists keys in. The rows and the bucket listing
+(or a local copy of its S3 Inventory) are then walked together as a merge
+join, so memory doesn't grow with the size of the bucket. Status changes and
+deletion of untracked objects are written in batches.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+import typing
+from datetime import datetime, timezone
+from urllib.parse import unquote_plus
+
+import frappe
+from boto3 import client
+from frappe.utils import convert_utc_to_system_timezone, get_datetime, now_datetime
+
+from press.press.doctype.remote_file.remote_file import delete_s3_files
+
+if typing.TYPE_CHECKING:
+	from collections.abc import Callable, Iterator
+	from typing import IO
+
+BATCH_SIZE = 1000
+
+AVAILABLE = "Available"
+UNAVAILABLE = "Unavailable"
+UNTRACKED = "Untracked"
+
+
+class BucketObject(typing.NamedTuple):
+	key: str
+	last_modified: datetime | None
+
+
+class RemoteFileRow(typing.NamedTuple):
+	name: str
+	file_path: str | None
+	status: str
+	creation: datetime | None
+
+
+def reconcile(
+	objects: Iterator[BucketObject], rows: Iterator[RemoteFileRow]
+) -> Iterator[tuple[str, BucketObject | RemoteFileRow]]:
+	"""
+	Merge join of bucket objects and Remote File rows, both sorted by key.
+
+	Yields rows that need to be set Available or Unavailable, and objects
+	that no row points to. Rows can share a file path, an object is only
+	untracked if none of them point to it.
+	"""
+	objects = ensure_sorted(objects, lambda obj: obj.key)
+	rows = ensure_sorted(rows, lambda row: row.file_path or "")
+
+	obj, row = next(objects, None), next(rows, None)
+	matched = False
+	while obj or row:
+		if row and (not obj or not row.file_path or row.file_path < obj.key):
+			if row.status == AVAILABLE:
+				yield UNAVAILABLE, row
+			row = next(rows, None)
+		elif row and row.file_path == obj.key:
+			if row.status == UNAVAILABLE:
+				yield AVAILABLE, row
+			matched, row = True, next(rows, None)
+		else:
+			if not matched:
+				yield UNTRACKED, obj
+			matched, obj = False, next(objects, None)
+
+
+def ensure_sorted(iterator: Iterator, key: Callable) -> Iterator:
+	"""Merge join gives wrong results on unsorted input, fail instead"""
+	previous = None
+	for item in iterator:
+		current = key(item)
+		if previous is not None and current < previous:
+			frappe.throw(f"Keys are not sorted: {current!r} after {previous!r}")
+		previous = current
+		yield item
+
+
+def iter_bucket_objects(bucket: dict) -> Iterator[BucketObject]:
+	s3 = client(
+		"s3",
+		aws_access_key_id=bucket["access_key_id"],
+		aws_secret_access_key=bucket["secret_access_key"],
+		region_name=bucket["region"],
+	)
+	for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket["name"]):
+		for obj in page.get("Contents", []):
+			yield BucketObject(obj["Key"], obj["LastModified"])
+
+
+def get_inventory_time(manifest_path: str) -> datetime:
+	"""Time the inventory was taken, in system timezone"""
+	with open(manifest_path) as f:
+		timestamp = int(json.load(f)["creationTimestamp"]) / 1000
+	utc = datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+	return convert_utc_to_system_timezone(utc).replace(tzinfo=None)
+
+
+def iter_inventory_objects(manifest_path: str) -> Iterator[BucketObject]:
+	"""
+	Objects from a local copy of an S3 Inventory, laid out as in the
+	destination bucket: data files are in `data/` next to the directory of
+	`manifest.json`.
+	"""
+	with open(manifest_path) as f:
+		manifest = json.load(f)
+
+	data_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(manifest_path))), "data")
+	file_format = manifest["fileFormat"]
+	for file in manifest["files"]:
+		path = os.path.join(data_directory, os.path.basename(file["key"]))
+		if file_format == "CSV":
+			yield from iter_inventory_csv(path, manifest["fileSchema"])
+		elif file_format == "Parquet":
+			yield from iter_inventory_parquet(path)
+		else:
+			frappe.throw(f"S3 Inventory format {file_format} is not supported")
+
+
+def iter_inventory_csv(path: str, schema: str) -> Iterator[BucketObject]:
+	columns = [column.strip() for column in schema.split(",")]
+	key_index = columns.index("Key")
+	last_modified_index = columns.index("LastModifiedDate") if "LastModifiedDate" in columns else None
+	with gzip.open(path, "rt", newline="") as f:
+		for record in csv.reader(f):
+			last_modified = None
+			if last_modified_index is not None and record[last_modified_index]:
+				last_modified = datetime.fromisoformat(record[last_modified_index].replace("Z", "+00:00"))
+			# Keys are URL encoded in CSV inventories
+			yield BucketObject(unquote_plus(record[key_index]), last_modified)
+
+
+def iter_inventory_parquet(path: str) -> Iterator[BucketObject]:
+	try:
+		import pyarrow.parquet as pq
+	except ImportError:
+		frappe.throw("pyarrow is required to read Parquet S3 Inventories")
+
+	for batch in pq.ParquetFile(path).iter_batches(columns=["key", "last_modified_date"]):
+		for key, last_modified in zip(batch.column(0).to_pylist(), batch.column(1).to_pylist(), strict=True):
+			if last_modified and not last_modified.tzinfo:
+				last_modified = last_modified.replace(tzinfo=timezone.utc)
+			yield BucketObject(key, last_modified)
+
+
+def spool_remote_files(bucket: str, file: IO[str]):
+	"""Write Remote File rows of the bucket to `file`, in the binary key order S3 uses"""
+	writer = csv.writer(file)
+	with frappe.db.unbuffered_cursor():
+		for row in frappe.db.sql(
+			"""
+			SELECT name, file_path, status, creation
+			FROM `tabRemote File`
+			WHERE bucket = %s
+			ORDER BY BINARY file_path
+			""",
+			bucket,
+			as_iterator=True,
+		):
+			writer.writerow(row)
+	file.seek(0)
+
+
+def iter_spooled_rows(file: IO[str]) -> Iterator[RemoteFileRow]:
+	for name, file_path, status, creation in csv.reader(file):
+		yield RemoteFileRow(name, file_path or None, status, get_datetime(creation) if creation else None)
+
+
+class RemoteFileReconciler:
+	def __init__(self, bucket: dict):
+		self.bucket = bucket
+		self.manifest = bucket.get("inventory_manifest")
+		if self.manifest and not os.path.exists(self.manifest):
+			self.manifest = None
+
+		# Objects in the listing were there at this time, rows created after
+		# it can't be missing. Objects uploaded after the rows are read can't
+		# be tracked yet.
+		self.listed_at = get_inventory_time(self.manifest) if self.manifest else now_datetime()
+		self.started = datetime.now(timezone.utc)
+
+		self.updates: dict[str, list[str]] = {AVAILABLE: [], UNAVAILABLE: []}
+		self.untracked: list[str] = []
+
+	def run(self):
+		with tempfile.TemporaryFile("w+", newline="") as spool:
+			spool_remote_files(self.bucket["name"], spool)
+			for action, item in reconcile(self.get_objects(), iter_spooled_rows(spool)):
+				self.add(action, item)
+		self.flush()
+
+	def get_objects(self) -> Iterator[BucketObject]:
+		if self.manifest:
+			return iter_inventory_objects(self.manifest)
+		return iter_bucket_objects(self.bucket)
+
+	def add(self, action: str, item: BucketObject | RemoteFileRow):
+		if action == UNTRACKED:
+			if item.last_modified and item.last_modified >= self.started:
+				return
+			self.untracked.append(item.key)
+		elif action == UNAVAILABLE and item.creation and item.creation >= self.listed_at:
+			return
+		else:
+			self.updates[action].append(item.name)
+
+		if len(self.untracked) >= BATCH_SIZE or any(
+			len(names) >= BATCH_SIZE for names in self.updates.values()
+		):
+			self.flush()
+
+	def flush(self):
+		for status, names in self.updates.items():
+			if names:
+				frappe.db.set_value("Remote File", {"name": ("in", names)}, "status", status)
+		if self.untracked:
+			# Delete s3 files that are not tracked with Remote Files
+			delete_s3_files({self.bucket["name"]: self.untracked})
+		frappe.db.commit()
+
+		self.updates = {AVAILABLE: [], UNAVAILABLE: []}
+		self.untracked = []
@@ -8,7 +8,7 @@ import pprint
 
 import frappe
 import requests
-from boto3 import client, resource
+from boto3 import client
 from frappe.model.document import Document
 from frappe.utils.password import get_decrypted_password
 
@@ -49,13 +49,14 @@ def poll_file_statuses():
 		},
 	]
 
-	for b in frappe.get_all("Backup Bucket", ["bucket_name", "cluster", "region"]):
+	for b in frappe.get_all("Backup Bucket", ["bucket_name", "cluster", "region", "inventory_manifest_path"]):
 		buckets.append(
 			{
 				"name": b["bucket_name"],
 				"region": b["region"],
 				"access_key_id": aws_access_key,
 				"secret_access_key": aws_secret_key,
+				"inventory_manifest": b["inventory_manifest_path"],
 			}
 		)
 
@@ -71,52 +72,9 @@ def poll_file_statuses():
 
 
 def poll_file_statuses_from_bucket(bucket):
-	from press.utils import chunk
-
-	s3 = resource(
-		"s3",
-		aws_access_key_id=bucket["access_key_id"],
-		aws_secret_access_key=bucket["secret_access_key"],
-		region_name=bucket["region"],
-	)
-
-	available_files = set()
-	for s3_object in s3.Bucket(bucket["name"]).objects.all():
-		available_files.add(s3_object.key)
-
-	doctype = "Remote File"
-	remote_files = frappe.get_all(
-		doctype,
-		fields=["name", "file_path", "status"],
-		filters={"bucket": bucket["name"]},
-	)
-
-	set_to_available = []
-	set_to_unavailable = []
-	for remote_file in remote_files:
-		name, file_path, status = (
-			remote_file["name"],
-			remote_file["file_path"],
-			remote_file["status"],
-		)
-		if file_path not in available_files:
-			if status == "Available":
-				set_to_unavailable.append(name)
-		else:
-			if status == "Unavailable":
-				set_to_available.append(name)
-
-	for files in chunk(set_to_unavailable, 1000):
-		frappe.db.set_value(doctype, {"name": ("in", files)}, "status", "Unavailable")
-
-	for files in chunk(set_to_available, 1000):
-		frappe.db.set_value(doctype, {"name": ("in", files)}, "status", "Available")
+	from press.press.doctype.remote_file.bucket_reconciliation import RemoteFileReconciler
 
-	# Delete s3 files that are not tracked with Remote Files
-	remote_file_paths = set(file["file_path"] for file in remote_files)
-	file_only_on_s3 = available_files - remote_file_paths
-	delete_s3_files({bucket["name"]: list(file_only_on_s3)})
-	frappe.db.commit()
+	RemoteFileReconciler(bucket).run()
 
 
 def delete_remote_backup_objects(remote_files):
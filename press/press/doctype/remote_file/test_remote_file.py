@@ -3,11 +3,28 @@
 
 from __future__ import annotations
 
+import csv
+import gzip
+import json
+import os
+import tempfile
+import tracemalloc
+from collections import Counter
 from typing import TYPE_CHECKING
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.remote_file.bucket_reconciliation import (
+	AVAILABLE,
+	UNAVAILABLE,
+	UNTRACKED,
+	BucketObject,
+	RemoteFileRow,
+	iter_inventory_objects,
+	reconcile,
+)
+
 if TYPE_CHECKING:
 	from datetime import datetime
 
@@ -34,5 +51,85 @@ def create_test_remote_file(
 	return remote_file
 
 
+def get_reconciled(objects: list[str], rows: list[tuple[str, str | None, str]]) -> set:
+	return {
+		(action, getattr(item, "name", None) or item.key)
+		for action, item in reconcile(
+			(BucketObject(key, None) for key in objects),
+			(RemoteFileRow(*row, None) for row in rows),
+		)
+	}
+
+
 class TestRemoteFile(FrappeTestCase):
-	pass
+	def test_reconcile_sets_status_and_finds_untracked_objects(self):
+		reconciled = get_reconciled(
+			["a/1", "a/2", "b/1", "c/1"],
+			[
+				("no-path", None, "Available"),
+				("a1", "a/1", "Available"),
+				("a2", "a/2", "Unavailable"),
+				("a2-copy", "a/2", "Available"),
+				("a3", "a/3", "Available"),
+				("a4", "a/4", "Unavailable"),
+				("c1", "c/1", "Unavailable"),
+			],
+		)
+		self.assertEqual(
+			reconciled,
+			{
+				(UNAVAILABLE, "no-path"),
+				(AVAILABLE, "a2"),
+				(UNAVAILABLE, "a3"),
+				(UNTRACKED, "b/1"),
+				(AVAILABLE, "c1"),
+			},
+		)
+
+	def test_reconcile_fails_on_unsorted_keys(self):
+		with self.assertRaises(frappe.ValidationError):
+			get_reconciled(["b", "a"], [])
+
+	def test_reconcile_memory_does_not_grow_with_bucket(self):
+		def get_peak_memory(size: int) -> int:
+			objects = (BucketObject(f"{i:09d}", None) for i in range(size))
+			rows = (
+				RemoteFileRow(str(i), f"{i:09d}", AVAILABLE if i % 3 else UNAVAILABLE, None)
+				for i in range(0, size + size // 10, 2)
+			)
+			tracemalloc.start()
+			counts = Counter(action for action, _ in reconcile(objects, rows))
+			_, peak = tracemalloc.get_traced_memory()
+			tracemalloc.stop()
+			self.assertEqual(counts[UNTRACKED], size // 2)
+			return peak
+
+		small = get_peak_memory(10_000)
+		large = get_peak_memory(500_000)
+		self.assertLess(large, small * 2)
+
+	def test_inventory_objects_are_read_from_csv(self):
+		with tempfile.TemporaryDirectory() as directory:
+			os.makedirs(os.path.join(directory, "2026-01-01T00-00Z"))
+			os.makedirs(os.path.join(directory, "data"))
+			with gzip.open(os.path.join(directory, "data", "part.csv.gz"), "wt", newline="") as f:
+				writer = csv.writer(f)
+				writer.writerow(["bucket", "a/site+backup.sql.gz", "10", "2026-01-01T00:00:00.000Z"])
+				writer.writerow(["bucket", "b/file%2Bname", "20", "2026-01-02T00:00:00.000Z"])
+
+			manifest = os.path.join(directory, "2026-01-01T00-00Z", "manifest.json")
+			with open(manifest, "w") as f:
+				json.dump(
+					{
+						"fileFormat": "CSV",
+						"fileSchema": "Bucket, Key, Size, LastModifiedDate",
+						"creationTimestamp": "1767225600000",
+						"files": [{"key": "inventory/bucket/config/data/part.csv.gz"}],
+					},
+					f,
+				)
+
+			objects = list(iter_inventory_objects(manifest))
+
+		self.assertEqual([obj.key for obj in objects], ["a/site backup.sql.gz", "b/file+name"])
+		self.assertEqual(objects[0].last_modified.year, 2026)
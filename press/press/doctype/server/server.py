@@ -7,6 +7,7 @@ import datetime
 import json
 import shlex
 import typing
+from collections import defaultdict
 from contextlib import suppress
 from datetime import timedelta
 from functools import cached_property
@@ -31,7 +32,7 @@ from press.press.doctype.add_on_storage_log.add_on_storage_log import (
 from press.press.doctype.ansible_console.ansible_console import AnsibleAdHoc
 from press.press.doctype.resource_tag.tag_helpers import TagHelpers
 from press.press.doctype.server_activity.server_activity import log_server_activity
-from press.runner import Ansible
+from press.runner import Ansible, AnsibleFleet
 from press.telegram_utils import Telegram
 from press.utils import fmt_timedelta, log_error
 
@@ -627,20 +628,23 @@ class BaseServer(Document, TagHelpers):
 	def update_agent_ansible(self):
 		frappe.enqueue_doc(self.doctype, self.name, "_update_agent_ansible")
 
+	def get_agent_update_variables(self) -> dict:
+		agent_branch = frappe.get_value("Press Settings", "Press Settings", "branch")
+		if not agent_branch:
+			agent_branch = "upstream/master"
+		else:
+			agent_branch = f"upstream/{agent_branch}"
+		return {
+			"agent_repository_url": self.get_agent_repository_url(),
+			"agent_repository_branch_or_commit_ref": agent_branch,
+			"agent_update_args": "",
+		}
+
 	def _update_agent_ansible(self):
 		try:
-			agent_branch = frappe.get_value("Press Settings", "Press Settings", "branch")
-			if not agent_branch:
-				agent_branch = "upstream/master"
-			else:
-				agent_branch = f"upstream/{agent_branch}"
 			ansible = Ansible(
 				playbook="update_agent.yml",
-				variables={
-					"agent_repository_url": self.get_agent_repository_url(),
-					"agent_repository_branch_or_commit_ref": agent_branch,
-					"agent_update_args": "",
-				},
+				variables=self.get_agent_update_variables(),
 				server=self,
 				user=self._ssh_user(),
 				port=self._ssh_port(),
@@ -2701,6 +2705,27 @@ def scale_workers(now=False):
 			frappe.db.rollback()
 
 
+def update_agent_on_servers(servers: list[dict]):
+	"""Update agent of many servers with one Ansible run per SSH user and port"""
+	fleets = defaultdict(list)
+	for server in servers:
+		server = frappe.get_doc(server["server_type"], server["name"])
+		if server.ip:
+			fleets[(server._ssh_user(), server._ssh_port())].append(server)
+
+	for (user, port), fleet in fleets.items():
+		try:
+			AnsibleFleet(
+				servers=fleet,
+				playbook="update_agent.yml",
+				variables=fleet[0].get_agent_update_variables(),
+				user=user,
+				port=port,
+			).run()
+		except Exception:
+			log_error("Agent Update Exception", servers=[server.name for server in fleet])
+
+
 def process_new_server_job_update(job):
 	if job.status == "Success":
 		frappe.db.set_value("Server", job.upstream, "is_upstream_setup", True)
@@ -4,7 +4,8 @@
 from __future__ import annotations
 
 import functools
-from collections import deque
+import typing
+from collections import Counter, deque
 from datetime import datetime, timedelta
 from functools import wraps
 from itertools import groupby
@@ -16,10 +17,12 @@ import pytz
 from press.press.doctype.press_settings.press_settings import PressSettings
 from press.press.doctype.remote_file.remote_file import delete_remote_backup_objects
 from press.press.doctype.site.site import Literal, Site
-from press.press.doctype.site_backup.site_backup import SiteBackup
 from press.press.doctype.subscription.subscription import Subscription
 from press.utils import log_error
 
+if typing.TYPE_CHECKING:
+	from press.press.doctype.site_backup.site_backup import SiteBackup
+
 
 def timing(f):
 	@wraps(f)
@@ -232,6 +235,93 @@ class ModifiableCycle:
 		self.deque.pop()
 
 
+BACKUP_SCHEDULE_KEY = "backup_schedule"
+BACKUP_SCHEDULE_BUILT_KEY = "backup_schedule_built"
+BACKUP_SCHEDULE_REBUILD_INTERVAL = 24 * 60 * 60
+
+
+def get_backup_interval() -> int:
+	return frappe.get_cached_value("Press Settings", "Press Settings", "backup_interval") or 6
+
+
+class BackupSchedule:
+	"""
+	Time at which the next scheduled backup of each site is due.
+
+	Kept in a redis sorted set scored by due time, so scheduler ticks only
+	read sites that are due. Creating a backup pushes the site's due time
+	by the backup interval, a failed backup makes it due right away.
+
+	Sites are added when created and the set is rebuilt from backups once a
+	day, or whenever redis loses it.
+	"""
+
+	def __init__(self, interval: int | None = None):
+		self.interval = interval or get_backup_interval()
+		self.key = frappe.cache.make_key(BACKUP_SCHEDULE_KEY)
+
+	def get_due(self) -> list[str]:
+		if not frappe.cache.get_value(BACKUP_SCHEDULE_BUILT_KEY):
+			self.rebuild()
+
+		due = frappe.cache.zrangebyscore(self.key, "-inf", frappe.utils.now_datetime().timestamp())
+		return [frappe.safe_decode(site) for site in due]
+
+	def schedule(self, due: dict[str, datetime]):
+		if due:
+			frappe.cache.zadd(self.key, {site: at.timestamp() for site, at in due.items()})
+
+	def postpone(self, sites: list[str]):
+		"""Next backup is due an interval from now"""
+		self.schedule(dict.fromkeys(sites, frappe.utils.add_to_date(None, hours=self.interval)))
+
+	def remove(self, sites: list[str]):
+		if sites:
+			frappe.cache.zrem(self.key, *sites)
+
+	def rebuild(self):
+		interval_hrs_ago = frappe.utils.add_to_date(None, hours=-self.interval)
+		last_backups = dict(
+			frappe.db.sql(
+				"""
+				SELECT site, MAX(creation)
+				FROM `tabSite Backup`
+				WHERE creation > %s
+					AND (status IN ('Pending', 'Running') OR (status != 'Failure' AND owner = 'Administrator'))
+				GROUP BY site
+				""",
+				interval_hrs_ago,
+			)
+		)
+		sites = frappe.get_all("Site", {"status": ("!=", "Archived")}, ["name", "creation"])
+		due = {
+			site.name: last_backups.get(site.name, site.creation) + timedelta(hours=self.interval)
+			for site in sites
+		}
+
+		pipeline = frappe.cache.pipeline()
+		pipeline.delete(self.key)
+		for index in range(0, len(sites), 10_000):
+			chunk = sites[index : index + 10_000]
+			pipeline.zadd(self.key, {site.name: due[site.name].timestamp() for site in chunk})
+		pipeline.execute()
+		frappe.cache.set_value(
+			BACKUP_SCHEDULE_BUILT_KEY, True, expires_in_sec=BACKUP_SCHEDULE_REBUILD_INTERVAL
+		)
+
+
+def schedule_backup_of_new_site(site: str):
+	"""New sites are checked when due and postponed until they are an interval old"""
+	BackupSchedule().schedule({site: frappe.utils.now_datetime()})
+
+
+def update_backup_schedule(backup: SiteBackup):
+	if backup.status == "Failure":
+		BackupSchedule().schedule({backup.site: frappe.utils.now_datetime()})
+	else:
+		BackupSchedule().postpone([backup.site])
+
+
 class ScheduledBackupJob:
 	"""Represents Scheduled Backup Job that takes backup for all active sites."""
 
@@ -246,9 +336,7 @@ class ScheduledBackupJob:
 
 	def __init__(self, backup_type: BACKUP_TYPES):
 		self.backup_type: BACKUP_TYPES = backup_type
-		self.interval: int = (
-			frappe.get_cached_value("Press Settings", "Press Settings", "backup_interval") or 6
-		)
+		self.interval: int = get_backup_interval()
 		self.offset: int = frappe.get_cached_value("Press Settings", "Press Settings", "backup_offset") or 0
 		self.limit = frappe.get_cached_value("Press Settings", "Press Settings", "backup_limit") or 100
 		self.max_failed_backup_attempts_in_a_day = (
@@ -258,17 +346,118 @@ class ScheduledBackupJob:
 
 		self.offsite_setup = PressSettings.is_offsite_setup()
 		self.server_time = datetime.now()
-		self.sites = Site.get_sites_for_backup(self.interval, backup_type=self.backup_type)
+		self.schedule = BackupSchedule(self.interval)
+		self.sites = self.get_sites_due_for_backup()
 		if self.backup_type == "Logical":
 			self.sites_without_offsite = Subscription.get_sites_without_offsite_backups()
 		else:
 			self.sites_without_offsite = []
+		self.set_backups_of_sites()
+
+	def get_sites_due_for_backup(self) -> list[dict]:
+		due = self.schedule.get_due()
+		if not due:
+			return []
+
+		servers_with_backups = set(
+			frappe.get_all(
+				"Server",
+				{"status": "Active", "skip_scheduled_backups": False},
+				pluck="name",
+			)
+		)
+		sites = frappe.get_all(
+			"Site",
+			{
+				"name": ("in", due),
+				"status": "Active",
+				"creation": ("<=", frappe.utils.add_to_date(None, hours=-self.interval)),
+				"is_standby": False,
+				"plan": ("not like", "%Trial"),
+			},
+			[
+				"name",
+				"timezone",
+				"server",
+				"skip_scheduled_logical_backups",
+				"schedule_logical_backup_at_custom_time",
+				"skip_scheduled_physical_backups",
+				"schedule_physical_backup_at_custom_time",
+			],
+			order_by="server",
+		)
+		self.reschedule_sites_not_due(set(due) - {site.name for site in sites})
+
+		sites_for_backup, sites_count_by_server = [], Counter()
+		for site in sites:
+			takes = {
+				backup_type
+				for backup_type in ("Logical", "Physical")
+				if site.server in servers_with_backups and takes_scheduled_backups(site, backup_type)
+			}
+			if not takes:
+				# Neither backup job will take it until something changes
+				self.schedule.postpone([site.name])
+			elif self.backup_type in takes and sites_count_by_server[site.server] < self.limit:
+				sites_count_by_server[site.server] += 1
+				sites_for_backup.append(site)
+		return sites_for_backup
+
+	def reschedule_sites_not_due(self, sites: set[str]):
+		"""Sites that were due but aren't active, or are too new for scheduled backups"""
+		if not sites:
+			return
+
+		existing = frappe.get_all(
+			"Site", {"name": ("in", list(sites)), "status": ("!=", "Archived")}, ["name", "creation"]
+		)
+		self.schedule.remove(list(sites - {site.name for site in existing}))
+
+		now, interval = frappe.utils.now_datetime(), timedelta(hours=self.interval)
+		self.schedule.schedule(
+			{
+				site.name: site.creation + interval if site.creation + interval > now else now + interval
+				for site in existing
+			}
+		)
+
+	def set_backups_of_sites(self):
+		"""Recent failures and today's backups of sites due, instead of checking per site"""
+		sites = [site.name for site in self.sites]
+		self.failed_backup_attempts = Counter()
+		self.sites_with_offsite_backup_today, self.sites_with_file_backup_today = set(), set()
+		if not sites:
+			return
+
+		failures = frappe.get_all(
+			"Site Backup",
+			{
+				"site": ("in", sites),
+				"status": ("in", ["Failure", "Delivery Failure"]),
+				"physical": self.backup_type == "Physical",
+				"creation": [">=", frappe.utils.add_days(None, -1)],
+			},
+			["site", "count(*) as count"],
+			group_by="site",
+		)
+		self.failed_backup_attempts.update({failure.site: failure.count for failure in failures})
+
+		today = frappe.utils.getdate()
+		for backup in frappe.get_all(
+			"Site Backup",
+			{"site": ("in", sites), "status": "Success", "creation": ("between", [today, today])},
+			["site", "offsite", "with_files"],
+		):
+			if backup.offsite:
+				self.sites_with_offsite_backup_today.add(backup.site)
+			if backup.with_files:
+				self.sites_with_file_backup_today.add(backup.site)
 
 	def take_offsite(self, site: frappe._dict, day: datetime.date) -> bool:
 		return (
 			self.offsite_setup
 			and site.name not in self.sites_without_offsite
-			and not SiteBackup.offsite_backup_exists(site.name, day)
+			and site.name not in self.sites_with_offsite_backup_today
 		)
 
 	def get_site_time(self, site: dict[str, str]) -> datetime:
@@ -303,18 +492,7 @@ class ScheduledBackupJob:
 		"""Return true if backup was taken."""
 		try:
 			site_time = self.get_site_time(site)
-			failed_backup_attempts_in_a_day = frappe.db.count(
-				"Site Backup",
-				{
-					"site": site.name,
-					"status": ("in", ["Failure", "Delivery Failure"]),
-					"physical": self.backup_type == "Physical",
-					"creation": [
-						">=",
-						frappe.utils.add_days(None, -1),
-					],
-				},
-			)
+			failed_backup_attempts_in_a_day = self.failed_backup_attempts[site.name]
 			if (
 				self.is_backup_hour(site_time.hour)
 				and failed_backup_attempts_in_a_day <= self.max_failed_backup_attempts_in_a_day
@@ -327,7 +505,7 @@ class ScheduledBackupJob:
 				"""
 				offsite = self.backup_type == "Logical" and self.take_offsite(site, today)
 				with_files = self.backup_type == "Logical" and (
-					offsite or not SiteBackup.file_backup_exists(site.name, today)
+					offsite or site.name not in self.sites_with_file_backup_today
 				)
 
 				frappe.get_doc("Site", site.name).backup(
@@ -345,6 +523,12 @@ class ScheduledBackupJob:
 			frappe.db.rollback()
 
 
+def takes_scheduled_backups(site: dict, backup_type: BACKUP_TYPES) -> bool:
+	if backup_type == "Logical":
+		return not (site.skip_scheduled_logical_backups or site.schedule_logical_backup_at_custom_time)
+	return not (site.skip_scheduled_physical_backups or site.schedule_physical_backup_at_custom_time)
+
+
 def schedule_logical_backups_for_sites_with_backup_time():
 	"""
 	Schedule logical backups for sites with backup time.
@@ -6,14 +6,11 @@ from __future__ import annotations
 import json
 from collections import defaultdict
 from contextlib import suppress
-from datetime import datetime
 from functools import cached_property, wraps
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-import dateutil.parser
 import frappe
 import frappe.utils
-import pytz
 import requests
 import rq
 from frappe import _, has_permission
@@ -21,6 +18,7 @@ from frappe.core.utils import find
 from frappe.frappeclient import FrappeClient, FrappeException
 from frappe.model.document import Document
 from frappe.model.naming import append_number_if_name_exists
+from frappe.permissions import is_system_user
 from frappe.utils import (
 	add_to_date,
 	cint,
@@ -33,7 +31,11 @@ from frappe.utils import (
 	sbool,
 	time_diff_in_hours,
 )
+from frappe.utils.password import get_decrypted_password
 
+from press.agent import Agent, AgentRequestSkippedException
+from press.api.client import dashboard_whitelist
+from press.api.site import check_dns, get_updates_between_current_and_next_apps
 from press.exceptions import (
 	CannotChangePlan,
 	InsufficientSpaceOnServer,
@@ -44,25 +46,6 @@ from press.exceptions import (
 from press.marketplace.doctype.marketplace_app_plan.marketplace_app_plan import (
 	MarketplaceAppPlan,
 )
-from press.utils.jobs import has_job_timeout_exceeded
-from press.utils.telemetry import capture
-from press.utils.webhook import create_webhook_event
-
-try:
-	from frappe.utils import convert_utc_to_user_timezone
-except ImportError:
-	from frappe.utils import (
-		convert_utc_to_system_timezone as convert_utc_to_user_timezone,
-	)
-
-from typing import TYPE_CHECKING
-
-from frappe.permissions import is_system_user
-from frappe.utils.password import get_decrypted_password
-
-from press.agent import Agent, AgentRequestSkippedException
-from press.api.client import dashboard_whitelist
-from press.api.site import check_dns, get_updates_between_current_and_next_apps
 from press.overrides import get_permission_query_conditions_for_doctype
 from press.press.doctype.marketplace_app.marketplace_app import (
 	get_plans_for_app,
@@ -70,6 +53,13 @@ from press.press.doctype.marketplace_app.marketplace_app import (
 )
 from press.press.doctype.resource_tag.tag_helpers import TagHelpers
 from press.press.doctype.server.server import is_dedicated_server
+from press.press.doctype.site.site_info_sync import (
+	get_synced_config,
+	get_usage_time,
+	get_usage_values,
+	is_new_usage,
+	is_valid_timezone,
+)
 from press.press.doctype.site_activity.site_activity import log_site_activity
 from press.press.doctype.site_analytics.site_analytics import create_site_analytics
 from press.press.doctype.site_plan.site_plan import UNLIMITED_PLANS, get_plan_config
@@ -89,10 +79,11 @@ from press.utils import (
 	validate_subdomain,
 )
 from press.utils.dns import _change_dns_record, create_dns_record
+from press.utils.jobs import has_job_timeout_exceeded
+from press.utils.telemetry import capture
+from press.utils.webhook import create_webhook_event
 
 if TYPE_CHECKING:
-	from datetime import datetime
-
 	from frappe.types.DF import Table
 
 	from press.press.doctype.agent_job.agent_job import AgentJob
@@ -816,6 +807,7 @@ class Site(Document, TagHelpers):
 		from press.press.doctype.press_role.press_role import (
 			add_permission_for_newly_created_doc,
 		)
+		from press.press.doctype.site.backups import schedule_backup_of_new_site
 
 		self.capture_signup_event("created_first_site")
 
@@ -832,6 +824,7 @@ class Site(Document, TagHelpers):
 
 		# log activity
 		log_site_activity(self.name, "Create")
+		schedule_backup_of_new_site(self.name)
 		self._create_default_site_domain()
 		create_dns_record(self, record_name=self._get_site_name(self.subdomain))
 		self.create_agent_request()
@@ -1778,13 +1771,8 @@ class Site(Document, TagHelpers):
 		:fetched_config: Generally data passed is the config part of the agent info response
 		:returns: True if value has changed
 		"""
-		config = {
-			key: fetched_config[key] for key in fetched_config if key not in get_client_blacklisted_keys()
-		}
-		new_config = {**json.loads(self.config or "{}"), **config}
-		current_config = json.dumps(new_config, indent=4)
-
-		if self.config != current_config:
+		new_config = get_synced_config(self.config, fetched_config)
+		if new_config is not None:
 			self._update_configuration(new_config, save=False)
 			return True
 		return False
@@ -1802,39 +1790,12 @@ class Site(Document, TagHelpers):
 			self._insert_site_usage(fetched_usage)
 
 	def _insert_site_usage(self, usage: dict):
-		current_usages = self.get_disk_usages()
-		site_usage_data = {
-			"site": self.name,
-			"backups": usage["backups"],
-			"database": usage["database"],
-			"database_free": usage.get("database_free", 0),
-			"database_free_tables": json.dumps(usage.get("database_free_tables", []), indent=1),
-			"public": usage["public"],
-			"private": usage["private"],
-		}
-
-		same_as_last_usage = (
-			current_usages["backups"] == site_usage_data["backups"]
-			and current_usages["database"] == site_usage_data["database"]
-			and current_usages["public"] == site_usage_data["public"]
-			and current_usages["private"] == site_usage_data["private"]
-			and current_usages["database_free"] == site_usage_data["private"]
-		)
-
-		if same_as_last_usage:
+		site_usage_data = get_usage_values(usage)
+		equivalent_site_time = get_usage_time(usage)
+		if not is_new_usage(self.get_disk_usages(), site_usage_data, equivalent_site_time):
 			return
 
-		equivalent_site_time = None
-		if usage.get("timestamp"):
-			equivalent_site_time = convert_utc_to_user_timezone(
-				dateutil.parser.parse(usage["timestamp"])
-			).replace(tzinfo=None)
-			if frappe.db.exists("Site Usage", {"site": self.name, "creation": equivalent_site_time}):
-				return
-			if current_usages["creation"] and equivalent_site_time < current_usages["creation"]:
-				return
-
-		site_usage = frappe.get_doc({"doctype": "Site Usage", **site_usage_data}).insert()
+		site_usage = frappe.get_doc({"doctype": "Site Usage", "site": self.name, **site_usage_data}).insert()
 
 		if equivalent_site_time:
 			site_usage.db_set("creation", equivalent_site_time)
@@ -1845,13 +1806,8 @@ class Site(Document, TagHelpers):
 		:timezone: Timezone passed in part of the agent info response
 		:returns: True if value has changed
 		"""
-		# Validate timezone string
-		# Empty string is fine, since we default to IST
-		if timezone:
-			try:
-				pytz.timezone(timezone)
-			except pytz.exceptions.UnknownTimeZoneError:
-				return False
+		if not is_valid_timezone(timezone):
+			return False
 
 		if self.timezone != timezone:
 			self.timezone = timezone
@@ -2930,83 +2886,6 @@ class Site(Document, TagHelpers):
 
 		return query.run(as_dict=True)
 
-	@classmethod
-	def get_sites_for_backup(
-		cls, interval: int, backup_type: Literal["Logical", "Physical"] = "Logical"
-	) -> list[dict]:
-		sites = cls.get_sites_without_backup_in_interval(interval)
-		servers_with_backups = frappe.get_all(
-			"Server",
-			{"status": "Active", "skip_scheduled_backups": False},
-			pluck="name",
-		)
-		filters = {
-			"name": ("in", sites),
-			"server": ("in", servers_with_backups),
-		}
-
-		if backup_type == "Logical":
-			filters["skip_scheduled_logical_backups"] = False
-			filters["schedule_logical_backup_at_custom_time"] = False
-		elif backup_type == "Physical":
-			filters["skip_scheduled_physical_backups"] = False
-			filters["schedule_physical_backup_at_custom_time"] = False
-
-		return frappe.get_all(
-			"Site",
-			filters,
-			["name", "timezone", "server"],
-			order_by="server",
-			ignore_ifnull=True,
-		)
-
-	@classmethod
-	def get_sites_without_backup_in_interval(cls, interval: int) -> list[str]:
-		"""Return active sites that haven't had backup taken in interval hours."""
-		interval_hrs_ago = frappe.utils.add_to_date(None, hours=-interval)
-		all_sites = set(
-			frappe.get_all(
-				"Site",
-				{
-					"status": "Active",
-					"creation": ("<=", interval_hrs_ago),
-					"is_standby": False,
-					"plan": ("not like", "%Trial"),
-				},
-				pluck="name",
-			)
-		)
-		return list(
-			all_sites
-			- set(cls.get_sites_with_backup_in_interval(interval_hrs_ago))
-			- set(cls.get_sites_with_pending_backups(interval_hrs_ago))
-		)
-		# TODO: query using creation time of account request for actual new sites <03-09-21, Balamurali M> #
-
-	@classmethod
-	def get_sites_with_pending_backups(cls, interval_hrs_ago: datetime) -> list[str]:
-		return frappe.get_all(
-			"Site Backup",
-			{
-				"status": ("in", ["Running", "Pending"]),
-				"creation": (">=", interval_hrs_ago),
-			},
-			pluck="site",
-		)
-
-	@classmethod
-	def get_sites_with_backup_in_interval(cls, interval_hrs_ago) -> list[str]:
-		return frappe.get_all(
-			"Site Backup",
-			{
-				"creation": (">", interval_hrs_ago),
-				"status": ("!=", "Failure"),
-				"owner": "Administrator",
-			},
-			pluck="site",
-			ignore_ifnull=True,
-		)
-
 	@classmethod
 	def exists(cls, subdomain, domain) -> bool:
 		"""Check if subdomain is available"""
@@ -0,0 +1,219 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Batch sync of the site info agent reports for all sites of a bench.
+
+Site Usage rows of all sites are inserted with one multi-row insert. Timezone
+and database name are written with a bulk update, and a Site is only locked
+and saved when its config changed, since that also updates the configuration
+table.
+"""
+
+from __future__ import annotations
+
+import json
+import typing
+
+import dateutil.parser
+import frappe
+import pytz
+from frappe.query_builder.functions import Max
+from frappe.utils import now_datetime
+
+from press.utils import get_client_blacklisted_keys, log_error
+
+try:
+	from frappe.utils import convert_utc_to_user_timezone
+except ImportError:
+	from frappe.utils import (
+		convert_utc_to_system_timezone as convert_utc_to_user_timezone,
+	)
+
+if typing.TYPE_CHECKING:
+	from datetime import datetime
+
+USAGE_FIELDS = ("backups", "database", "database_free", "public", "private")
+SITE_USAGE_COLUMNS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"site",
+	*USAGE_FIELDS,
+	"database_free_tables",
+)
+
+
+def get_usage_values(usage: dict) -> dict:
+	return {
+		"backups": usage["backups"],
+		"database": usage["database"],
+		"database_free": usage.get("database_free", 0),
+		"database_free_tables": json.dumps(usage.get("database_free_tables", []), indent=1),
+		"public": usage["public"],
+		"private": usage["private"],
+	}
+
+
+def get_usage_time(usage: dict) -> datetime | None:
+	"""Time of the usage report in system timezone, if agent sent one"""
+	if not usage.get("timestamp"):
+		return None
+	return convert_utc_to_user_timezone(dateutil.parser.parse(usage["timestamp"])).replace(tzinfo=None)
+
+
+def is_new_usage(last_usage: dict | None, values: dict, usage_time: datetime | None) -> bool:
+	"""Skip usages same as the last one, and reports older than the last one"""
+	if not last_usage:
+		return True
+
+	if all(last_usage[field] == values[field] for field in USAGE_FIELDS):
+		return False
+
+	return not (usage_time and last_usage["creation"] and usage_time <= last_usage["creation"])
+
+
+def get_synced_config(current_config: str | None, fetched_config: dict) -> dict | None:
+	"""Site config merged with the fetched config, None if nothing changed"""
+	blacklisted_keys = get_client_blacklisted_keys()
+	config = {key: value for key, value in fetched_config.items() if key not in blacklisted_keys}
+	new_config = {**json.loads(current_config or "{}"), **config}
+	if current_config == json.dumps(new_config, indent=4):
+		return None
+	return new_config
+
+
+def is_valid_timezone(timezone: str) -> bool:
+	# Empty string is fine, since we default to IST
+	if not timezone:
+		return True
+	try:
+		pytz.timezone(timezone)
+		return True
+	except pytz.exceptions.UnknownTimeZoneError:
+		return False
+
+
+class SiteInfoSync:
+	def __init__(self, bench: str, data: dict[str, dict]):
+		self.bench = bench
+		self.data = data
+		self.now = now_datetime()
+
+		self.usage_rows: list[tuple] = []
+		self.updates: dict[str, dict] = {}
+		self.sites_to_save: list[str] = []
+
+	def run(self):
+		sites = frappe.get_all(
+			"Site",
+			filters={"name": ("in", list(self.data))},
+			fields=["name", "config", "timezone", "database_name"],
+		)
+		if not sites:
+			return
+
+		last_usages = self.get_last_usages([site.name for site in sites])
+		for site in sites:
+			try:
+				self.add_usages(site.name, self.data[site.name]["usage"], last_usages.get(site.name))
+				self.add_updates(site, self.data[site.name])
+			except Exception:
+				self.log_error(site.name)
+
+		self.write()
+		for site in self.sites_to_save:
+			self.save_site(site)
+
+	def get_last_usages(self, sites: list[str]) -> dict[str, dict]:
+		SiteUsage = frappe.qb.DocType("Site Usage")
+		latest = (
+			frappe.qb.from_(SiteUsage)
+			.select(SiteUsage.site, Max(SiteUsage.creation).as_("creation"))
+			.where(SiteUsage.site.isin(sites))
+			.groupby(SiteUsage.site)
+		).as_("latest")
+		usages = (
+			frappe.qb.from_(SiteUsage)
+			.join(latest)
+			.on((SiteUsage.site == latest.site) & (SiteUsage.creation == latest.creation))
+			.select(SiteUsage.site, SiteUsage.creation, *(SiteUsage[field] for field in USAGE_FIELDS))
+			.run(as_dict=True)
+		)
+		return {usage.site: usage for usage in usages}
+
+	def add_usages(self, site: str, usages: dict | list[dict], last_usage: dict | None):
+		if not isinstance(usages, list):
+			usages = [usages]
+
+		for usage in usages:
+			values = get_usage_values(usage)
+			usage_time = get_usage_time(usage)
+			if not is_new_usage(last_usage, values, usage_time):
+				continue
+
+			creation = usage_time or self.now
+			self.usage_rows.append(
+				(
+					frappe.generate_hash(length=10),
+					creation,
+					self.now,
+					frappe.session.user,
+					frappe.session.user,
+					site,
+					*(values[field] for field in USAGE_FIELDS),
+					values["database_free_tables"],
+				)
+			)
+			last_usage = {**values, "creation": creation}
+
+	def add_updates(self, site: frappe._dict, info: dict):
+		if get_synced_config(site.config, info["config"]) is not None:
+			# Config is kept in sync with the configuration table by Site.validate
+			self.sites_to_save.append(site.name)
+			return
+
+		values = {}
+		if is_valid_timezone(info["timezone"]) and site.timezone != info["timezone"]:
+			values["timezone"] = info["timezone"]
+		if site.database_name != info["config"].get("db_name"):
+			values["database_name"] = info["config"].get("db_name")
+		if values:
+			self.updates[site.name] = {**values, "modified": self.now}
+
+	def write(self):
+		try:
+			if self.usage_rows:
+				frappe.db.bulk_insert("Site Usage", SITE_USAGE_COLUMNS, self.usage_rows)
+			if self.updates:
+				frappe.db.bulk_update("Site", self.updates)
+			frappe.db.commit()
+		except Exception:
+			self.log_error()
+			frappe.db.rollback()
+
+	def save_site(self, site: str):
+		info = self.data[site]
+		try:
+			doc = frappe.get_doc("Site", site, for_update=True)
+			doc._sync_config_info(info["config"])
+			doc._sync_timezone_info(info["timezone"])
+			doc._sync_database_name(info["config"])
+			doc.save()
+			frappe.db.commit()
+		except frappe.DoesNotExistError:
+			# Ignore: Site got renamed or deleted
+			frappe.db.rollback()
+		except Exception:
+			self.log_error(site)
+			frappe.db.rollback()
+
+	def log_error(self, site: str | None = None):
+		log_error(
+			"Site Sync Error",
+			site=site,
+			info=self.data.get(site) if site else None,
+			reference_doctype="Bench",
+			reference_name=self.bench,
+		)
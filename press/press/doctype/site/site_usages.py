@@ -3,14 +3,17 @@ from typing import TYPE_CHECKING
 
 import frappe
 import rq
+from frappe.utils import cint, create_batch
 
-from press.api.analytics import get_current_cpu_usage_for_sites_on_server
+from press.api.analytics import get_current_cpu_usage_for_sites
 from press.press.doctype.site_plan.site_plan import get_plan_config
 from press.utils import log_error
 
 if TYPE_CHECKING:
 	from press.press.doctype.site.site import Site
 
+USAGE_UPDATE_BATCH_SIZE = 500
+
 
 @functools.lru_cache(maxsize=128)
 def get_cpu_limit(plan):
@@ -35,24 +38,31 @@ def get_config(plan):
 def update_cpu_usages():
 	"""Update CPU Usages field Site.current_cpu_usage across all Active sites from Site Request Log"""
 	servers = frappe.get_all("Server", filters={"status": "Active", "is_primary": True}, pluck="name")
-	for server in servers:
-		frappe.enqueue(
-			"press.press.doctype.site.site_usages.update_cpu_usage_server",
-			server=server,
-			queue="long",
-			deduplicate=True,
-			job_id=f"update_cpu_usages:{server}",
-		)
+	frappe.enqueue(
+		"press.press.doctype.site.site_usages.update_cpu_usage_servers",
+		servers=servers,
+		queue="long",
+		deduplicate=True,
+		job_id="update_cpu_usages",
+	)
 
 
 def update_cpu_usage_server(server):
-	usage = get_current_cpu_usage_for_sites_on_server(server)
+	update_cpu_usage_servers([server])
+
+
+def update_cpu_usage_servers(servers: list[str]):
+	usage = get_current_cpu_usage_for_sites(servers)
+	if not usage:
+		return
+
 	sites = frappe.get_all(
 		"Site",
-		filters={"status": "Active", "server": server},
+		filters={"status": "Active", "server": ("in", servers)},
 		fields=["name", "plan", "current_cpu_usage"],
 	)
 
+	updates = {}
 	for site in sites:
 		if site.name not in usage:
 			continue
@@ -60,17 +70,27 @@ def update_cpu_usage_server(server):
 			cpu_usage = usage[site.name]
 			cpu_limit = get_cpu_limits(site.plan)
 			latest_cpu_usage = int((cpu_usage / cpu_limit) * 100)
+		except Exception:
+			log_error("Site CPU Usage Update Error", site=site, cpu_usage=cpu_usage)
+			continue
+
+		if site.current_cpu_usage != latest_cpu_usage:
+			updates[site.name] = {"current_cpu_usage": latest_cpu_usage}
 
-			if site.current_cpu_usage != latest_cpu_usage:
-				site_doc = frappe.get_doc("Site", site.name)
-				site_doc.current_cpu_usage = latest_cpu_usage
-				site_doc.save()
-				frappe.db.commit()
+	write_usages(updates)
+
+
+def write_usages(updates: dict[str, dict]):
+	"""Write usage percentages with multi-row updates, without loading or saving sites"""
+	for batch in create_batch(list(updates), USAGE_UPDATE_BATCH_SIZE):
+		try:
+			frappe.db.bulk_update("Site", {site: updates[site] for site in batch})
+			frappe.db.commit()
 		except rq.timeouts.JobTimeoutException:
 			frappe.db.rollback()
 			return
 		except Exception:
-			log_error("Site CPU Usage Update Error", site=site, cpu_usage=cpu_usage, cpu_limit=cpu_limit)
+			log_error("Site Usage Update Error", sites=batch)
 			frappe.db.rollback()
 
 
@@ -94,6 +114,7 @@ def update_disk_usages():
 				u.site,
 				site.current_database_usage,
 				site.current_disk_usage,
+				site.site_usage_exceeded,
 				CAST(u.database / plan.max_database_usage * 100 AS INTEGER) AS latest_database_usage,
 				CAST(u.disk / plan.max_storage_usage * 100 AS INTEGER) AS latest_disk_usage
 			FROM
@@ -118,7 +139,8 @@ def update_disk_usages():
 		SELECT
 			j.site,
 			j.latest_database_usage,
-			j.latest_disk_usage
+			j.latest_disk_usage,
+			j.site_usage_exceeded
 		FROM
 			joined j
 		WHERE
@@ -129,16 +151,31 @@ def update_disk_usages():
 		as_dict=True,
 	)
 
+	updates = {}
 	for usage in latest_disk_usages:
-		try:
-			site: Site = frappe.get_doc("Site", usage.site, for_update=True)
-			site.current_database_usage = usage.latest_database_usage
-			site.current_disk_usage = usage.latest_disk_usage
-			site.check_if_disk_usage_exceeded(save=False)
-			site.save()
-			frappe.db.commit()
-		except frappe.DoesNotExistError:
-			frappe.db.rollback()
-		except Exception:
-			log_error("Site Disk Usage Update Error", usage=usage)
-			frappe.db.rollback()
+		exceeded = cint(usage.latest_database_usage) > 120 or cint(usage.latest_disk_usage) > 120
+		if exceeded or usage.site_usage_exceeded:
+			# Over the limit or coming back under it, flags and suspension depend on the site
+			update_disk_usage_of_site(usage)
+		else:
+			updates[usage.site] = {
+				"current_database_usage": cint(usage.latest_database_usage),
+				"current_disk_usage": cint(usage.latest_disk_usage),
+			}
+
+	write_usages(updates)
+
+
+def update_disk_usage_of_site(usage):
+	try:
+		site: Site = frappe.get_doc("Site", usage.site, for_update=True)
+		site.current_database_usage = usage.latest_database_usage
+		site.current_disk_usage = usage.latest_disk_usage
+		site.check_if_disk_usage_exceeded(save=False)
+		site.save()
+		frappe.db.commit()
+	except frappe.DoesNotExistError:
+		frappe.db.rollback()
+	except Exception:
+		log_error("Site Disk Usage Update Error", usage=usage)
+		frappe.db.rollback()
@@ -6,6 +6,8 @@ from frappe.tests.utils import FrappeTestCase
 
 from press.press.doctype.agent_job.agent_job import AgentJob
 from press.press.doctype.site.backups import (
+	BACKUP_SCHEDULE_BUILT_KEY,
+	BACKUP_SCHEDULE_KEY,
 	ScheduledBackupJob,
 	schedule_logical_backups_for_sites_with_backup_time,
 	schedule_physical_backups_for_sites_with_backup_time,
@@ -119,7 +121,7 @@ class TestScheduledBackupJob(FrappeTestCase):
 
 	def test_sites_considered_for_backup(self):
 		"""Ensure sites with succesful or pending backups in past interval are skipped."""
-		sites = Site.get_sites_for_backup(self.interval)
+		sites = ScheduledBackupJob(backup_type="Logical").sites
 		self.assertEqual(sites, [])
 
 		site_1 = self._create_site_requiring_backup()
@@ -131,12 +133,22 @@ class TestScheduledBackupJob(FrappeTestCase):
 		site_4 = self._create_site_requiring_backup()
 		create_test_site_backup(site_4.name, status="Running")
 
-		sites = Site.get_sites_for_backup(self.interval)
+		sites = ScheduledBackupJob(backup_type="Logical").sites
 		self.assertEqual(len(sites), 1)
 
 		sites_for_backup = [site.name for site in sites]
 		self.assertIn(site_2.name, sites_for_backup)
 
+	def test_backup_schedule_is_rebuilt_from_backups(self):
+		site_1 = self._create_site_requiring_backup()
+		create_test_site_backup(site_1.name, status="Success")
+		site_2 = self._create_site_requiring_backup()
+
+		frappe.cache.delete_value([BACKUP_SCHEDULE_KEY, BACKUP_SCHEDULE_BUILT_KEY])
+		sites = [site.name for site in ScheduledBackupJob(backup_type="Logical").sites]
+		self.assertNotIn(site_1.name, sites)
+		self.assertIn(site_2.name, sites)
+
 	@patch.object(Site, "backup")
 	def test_site_with_logical_backup_time_taken_at_right_time(self, mock_backup):
 		site: Site = self._create_site_requiring_backup()
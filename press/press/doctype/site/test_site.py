@@ -35,6 +35,7 @@ from press.press.doctype.site.site import (
 	process_rename_site_job_update,
 	suspend_sites_exceeding_disk_usage_for_last_7_days,
 )
+from press.press.doctype.site.site_usages import get_cpu_limits, update_cpu_usage_servers
 from press.press.doctype.site_activity.test_site_activity import create_test_site_activity
 from press.press.doctype.site_plan.test_site_plan import create_test_plan
 from press.press.doctype.team.test_team import create_test_team
@@ -715,3 +716,18 @@ class TestSite(FrappeTestCase):
 		suspend_sites_exceeding_disk_usage_for_last_7_days()
 		site.reload()
 		self.assertEqual(site.status, "Suspended")
+
+	def test_cpu_usages_are_written_without_saving_sites(self):
+		site = create_test_site()
+		limit = get_cpu_limits(site.plan)
+		with (
+			patch(
+				"press.press.doctype.site.site_usages.get_current_cpu_usage_for_sites",
+				return_value={site.name: limit // 2},
+			),
+			patch.object(Site, "save") as save,
+		):
+			update_cpu_usage_servers([site.server])
+
+		save.assert_not_called()
+		self.assertEqual(frappe.db.get_value("Site", site.name, "current_cpu_usage"), 50)
@@ -1,10 +1,17 @@
 # Copyright (c) 2022, Frappe and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+from collections import defaultdict
+
 import frappe
+from frappe.model import no_value_fields, table_fields
 from frappe.model.document import Document
-from frappe.query_builder import Interval
-from frappe.query_builder.functions import Now
+from frappe.query_builder.functions import Max
+from frappe.utils import add_days, cint, create_batch, get_datetime, getdate, now_datetime
+
+from press.utils import log_error
 
 
 class SiteAnalytics(Document):
@@ -33,6 +40,7 @@ class SiteAnalytics(Document):
 		activation_level: DF.Int
 		backup_size: DF.Int
 		company: DF.Data | None
+		content_hash: DF.Data | None
 		country: DF.Data | None
 		database_size: DF.Int
 		domain: DF.Data | None
@@ -54,80 +62,192 @@ class SiteAnalytics(Document):
 
 	@staticmethod
 	def clear_old_logs(days=30):
-		tables = [
+		"""Delete whole days of snapshots, oldest first, children by their parent"""
+		cutoff = add_days(getdate(), -days)
+		while names := frappe.get_all(
 			"Site Analytics",
-			"Site Analytics User",
-			"Site Analytics Login",
-			"Site Analytics App",
-			"Site Analytics DocType",
-			"Site Analytics Active",
-		]
-		for table in tables:
-			table = frappe.qb.DocType(table)
-			frappe.db.delete(table, filters=(table.modified < (Now() - Interval(days=days))))
+			filters={"creation": ("<", cutoff)},
+			order_by="creation asc",
+			limit=CLEAR_BATCH_SIZE,
+			pluck="name",
+		):
+			for doctype in CHILD_DOCTYPES.values():
+				frappe.db.delete(doctype, {"parenttype": "Site Analytics", "parent": ("in", names)})
+			frappe.db.delete("Site Analytics", {"name": ("in", names)})
 			frappe.db.commit()
 
 
+def on_doctype_update():
+	frappe.db.add_index("Site Analytics", ["site", "timestamp"])
+
+
+CHILD_DOCTYPES = {
+	"users": "Site Analytics User",
+	"last_logins": "Site Analytics Login",
+	"installed_apps": "Site Analytics App",
+	"last_active": "Site Analytics Active",
+	"sales_data": "Site Analytics DocType",
+}
+SNAPSHOTS_PER_BATCH = 200
+CLEAR_BATCH_SIZE = 5000
+
+
 def create_site_analytics(site, data):
-	def get_last_logins(analytics):
-		last_logins = []
-		for login in analytics.get("last_logins", []):
-			last_logins.append(
-				{
-					"user": login["user"],
-					"full_name": login["full_name"],
-					"timestamp": login["creation"],
-				}
-			)
-		return last_logins
-
-	def get_sales_data(analytics):
+	SiteAnalyticsWriter({site: data}).write()
+
+
+class SiteAnalyticsWriter:
+	"""
+	Writes analytics snapshots of many sites with multi-row inserts.
+
+	A snapshot is skipped if it isn't newer than the latest snapshot of the
+	site, or if its content is the same as the latest snapshot. When writing
+	for a `bench`, a site whose snapshot can't be read is logged and skipped,
+	otherwise the error is raised.
+	"""
+
+	def __init__(self, data: dict[str, dict], bench: str | None = None):
+		self.data = data
+		self.bench = bench
+		self.columns = {
+			doctype: get_columns(doctype) for doctype in ("Site Analytics", *CHILD_DOCTYPES.values())
+		}
+
+	def write(self, commit: bool = False) -> int:
+		written = 0
+		for sites in create_batch(list(self.data), SNAPSHOTS_PER_BATCH):
+			written += self.write_batch(sites)
+			if commit:
+				frappe.db.commit()
+		return written
+
+	def write_batch(self, sites: list[str]) -> int:
+		latest = self.get_latest_snapshots(sites)
+		now = now_datetime()
+		rows = defaultdict(list)
+		for site in sites:
+			try:
+				site_rows = self.get_site_rows(site, latest.get(site), now)
+			except Exception:
+				if not self.bench:
+					raise
+				log_error(
+					"Site Analytics Sync Error",
+					site=site,
+					analytics=self.data[site],
+					reference_doctype="Bench",
+					reference_name=self.bench,
+				)
+				continue
+			for doctype, doctype_rows in site_rows.items():
+				rows[doctype].extend(doctype_rows)
+
+		for doctype, doctype_rows in rows.items():
+			frappe.db.bulk_insert(doctype, self.get_fields(doctype), doctype_rows)
+		return len(rows["Site Analytics"])
+
+	def get_site_rows(self, site: str, snapshot: frappe._dict | None, now) -> dict[str, list[tuple]]:
+		"""Rows of the site's snapshot and its children, none if the snapshot is old or unchanged"""
+		timestamp = get_datetime(self.data[site]["timestamp"])
+		analytics = self.data[site]["analytics"]
+		content_hash = get_content_hash(analytics)
+		if snapshot and (snapshot.timestamp >= timestamp or snapshot.content_hash == content_hash):
+			return {}
+
+		parent = frappe.generate_hash(length=10)
+		values = get_snapshot_values(site, timestamp, analytics) | {"content_hash": content_hash}
+		rows = {"Site Analytics": [self.get_row("Site Analytics", values, parent, now)]}
+		for fieldname, doctype in CHILD_DOCTYPES.items():
+			rows[doctype] = [
+				self.get_row(doctype, child, parent, now, idx=idx, parentfield=fieldname)
+				for idx, child in enumerate(get_child_values(fieldname, analytics), 1)
+			]
+		return rows
+
+	def get_latest_snapshots(self, sites: list[str]) -> dict[str, frappe._dict]:
+		SiteAnalytics = frappe.qb.DocType("Site Analytics")
+		latest = (
+			frappe.qb.from_(SiteAnalytics)
+			.select(SiteAnalytics.site, Max(SiteAnalytics.timestamp).as_("timestamp"))
+			.where(SiteAnalytics.site.isin(sites))
+			.groupby(SiteAnalytics.site)
+		).as_("latest")
+		snapshots = (
+			frappe.qb.from_(SiteAnalytics)
+			.join(latest)
+			.on((SiteAnalytics.site == latest.site) & (SiteAnalytics.timestamp == latest.timestamp))
+			.select(SiteAnalytics.site, SiteAnalytics.timestamp, SiteAnalytics.content_hash)
+			.run(as_dict=True)
+		)
+		return {snapshot.site: snapshot for snapshot in snapshots}
+
+	def get_fields(self, doctype: str) -> list[str]:
+		fields = ["creation", "modified", "owner", "modified_by"]
+		if doctype == "Site Analytics":
+			fields.insert(0, "name")
+		else:
+			# Child rows are named by autoincrement
+			fields.extend(["parent", "parenttype", "parentfield", "idx"])
+		return fields + [df.fieldname for df in self.columns[doctype]]
+
+	def get_row(self, doctype: str, values: dict, parent: str, now, idx=0, parentfield=None) -> tuple:
+		row = [now, now, frappe.session.user, frappe.session.user]
+		if doctype == "Site Analytics":
+			row.insert(0, parent)
+		else:
+			row.extend([parent, "Site Analytics", parentfield, idx])
+		for df in self.columns[doctype]:
+			value = values.get(df.fieldname)
+			row.append(cint(value) if df.fieldtype in ("Int", "Check") else value)
+		return tuple(row)
+
+
+def get_columns(doctype: str) -> list:
+	return [
+		df for df in frappe.get_meta(doctype).fields if df.fieldtype not in table_fields + no_value_fields
+	]
+
+
+def get_content_hash(analytics: dict) -> str:
+	return hashlib.sha256(json.dumps(analytics, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_snapshot_values(site: str, timestamp, analytics: dict) -> dict:
+	return {
+		"site": site,
+		"timestamp": timestamp,
+		"country": analytics.get("country"),
+		"time_zone": analytics.get("time_zone"),
+		"language": analytics.get("language"),
+		"scheduler_enabled": analytics.get("scheduler_enabled"),
+		"setup_complete": analytics.get("setup_complete"),
+		"space_used": analytics.get("space_used"),
+		"backup_size": analytics.get("backup_size"),
+		"database_size": analytics.get("database_size"),
+		"files_size": analytics.get("files_size"),
+		"emails_sent": analytics.get("emails_sent"),
+		"company": analytics.get("company"),
+		"domain": analytics.get("domain"),
+		"activation_level": analytics.get("activation", {}).get("activation_level"),
+	}
+
+
+def get_child_values(fieldname: str, analytics: dict) -> list[dict]:
+	if fieldname == "last_logins":
+		return [
+			{"user": login["user"], "full_name": login["full_name"], "timestamp": login["creation"]}
+			for login in analytics.get("last_logins", [])
+		]
+
+	if fieldname == "last_active":
+		return [user for user in analytics.get("users", []) if user and user.get("enabled") == 1]
+
+	if fieldname == "sales_data":
 		sales_data = []
 		for row in analytics.get("activation", {}).get("sales_data", []):
-			doctype, count = tuple(row.items())[0]
+			doctype, count = next(iter(row.items()))
 			if count:
-				sales_data.append(
-					{
-						"document_type": doctype,
-						"count": count,
-					}
-				)
+				sales_data.append({"document_type": doctype, "count": count})
 		return sales_data
 
-	def get_last_active(analytics):
-		last_active = []
-		for user in analytics.get("users", []):
-			if user and user.get("enabled") == 1:
-				last_active.append(user)
-
-		return last_active
-
-	timestamp = data["timestamp"]
-	analytics = data["analytics"]
-	if not frappe.db.exists("Site Analytics", {"site": site, "timestamp": timestamp}):
-		doc = frappe.get_doc(
-			{
-				"doctype": "Site Analytics",
-				"site": site,
-				"timestamp": timestamp,
-				"country": analytics.get("country"),
-				"time_zone": analytics.get("time_zone"),
-				"language": analytics.get("language"),
-				"scheduler_enabled": analytics.get("scheduler_enabled"),
-				"setup_complete": analytics.get("setup_complete"),
-				"space_used": analytics.get("space_used"),
-				"backup_size": analytics.get("backup_size"),
-				"database_size": analytics.get("database_size"),
-				"files_size": analytics.get("files_size"),
-				"emails_sent": analytics.get("emails_sent"),
-				"installed_apps": analytics.get("installed_apps", []),
-				"users": analytics.get("users", []),
-				"last_logins": get_last_logins(analytics),
-				"last_active": get_last_active(analytics),
-				"company": analytics.get("company"),
-				"domain": analytics.get("domain"),
-				"activation_level": analytics.get("activation", {}).get("activation_level"),
-				"sales_data": get_sales_data(analytics),
-			}
-		)
-		doc.insert()
+	return analytics.get(fieldname, [])
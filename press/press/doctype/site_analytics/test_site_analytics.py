@@ -1,9 +1,67 @@
 # Copyright (c) 2022, Frappe and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from press.press.doctype.site.test_site import create_test_site
+from press.press.doctype.site_analytics.site_analytics import SiteAnalyticsWriter
+
+
+def analytics_data(timestamp: str, emails_sent: int = 1):
+	return {
+		"timestamp": timestamp,
+		"analytics": {
+			"emails_sent": emails_sent,
+			"installed_apps": [{"app_name": "frappe", "version": "15.0.0", "branch": "version-15"}],
+			"users": [
+				{"email": "user@example.com", "enabled": 1},
+				{"email": "old@example.com", "enabled": 0},
+			],
+			"activation": {"activation_level": 2, "sales_data": [{"Sales Invoice": 3}, {"Quotation": 0}]},
+		},
+	}
+
 
 class TestSiteAnalytics(FrappeTestCase):
-	pass
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_snapshots_are_written_with_children(self):
+		site_1, site_2 = create_test_site().name, create_test_site().name
+		written = SiteAnalyticsWriter(
+			{site_1: analytics_data("2025-01-01 00:00:00"), site_2: analytics_data("2025-01-01 00:00:00")}
+		).write()
+		self.assertEqual(written, 2)
+
+		doc = frappe.get_last_doc("Site Analytics", {"site": site_1})
+		self.assertEqual(doc.activation_level, 2)
+		self.assertEqual([app.app_name for app in doc.installed_apps], ["frappe"])
+		self.assertEqual(len(doc.users), 2)
+		self.assertEqual([user.email for user in doc.last_active], ["user@example.com"])
+		self.assertEqual([(row.document_type, row.count) for row in doc.sales_data], [("Sales Invoice", 3)])
+
+	def test_unchanged_and_old_snapshots_are_skipped(self):
+		site = create_test_site().name
+		SiteAnalyticsWriter({site: analytics_data("2025-01-01 00:00:00")}).write()
+
+		self.assertEqual(SiteAnalyticsWriter({site: analytics_data("2025-01-02 00:00:00")}).write(), 0)
+		self.assertEqual(SiteAnalyticsWriter({site: analytics_data("2024-12-31 00:00:00", 2)}).write(), 0)
+		self.assertEqual(SiteAnalyticsWriter({site: analytics_data("2025-01-02 00:00:00", 2)}).write(), 1)
+
+	def test_malformed_snapshot_of_a_bench_site_is_skipped(self):
+		site_1, site_2 = create_test_site().name, create_test_site().name
+		malformed = analytics_data("2025-01-01 00:00:00")
+		malformed["analytics"]["last_logins"] = [{"full_name": "No User"}]
+
+		with patch("press.press.doctype.site_analytics.site_analytics.log_error") as log_error:
+			written = SiteAnalyticsWriter(
+				{site_1: malformed, site_2: analytics_data("2025-01-01 00:00:00")}, bench="Test Bench"
+			).write()
+
+		self.assertEqual(written, 1)
+		self.assertEqual(log_error.call_args.kwargs["site"], site_1)
+		self.assertFalse(frappe.db.exists("Site Analytics", {"site": site_1}))
+		self.assertTrue(frappe.db.exists("Site Analytics", {"site": site_2}))
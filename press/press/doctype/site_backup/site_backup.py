@@ -184,6 +184,10 @@ class SiteBackup(Document):
 			self.snapshot_request_key = frappe.generate_hash(length=32)
 
 	def after_insert(self):
+		from press.press.doctype.site.backups import update_backup_schedule
+
+		update_backup_schedule(self)
+
 		if self.deactivate_site_during_backup:
 			agent = Agent(self.server)
 			agent.deactivate_site(
@@ -206,11 +210,20 @@ class SiteBackup(Document):
 			job = agent.backup_site(site, self)
 			frappe.db.set_value("Site Backup", self.name, "job", job.name)
 
+	def reschedule_failed_backup(self):
+		"""Failed backups don't count towards the backup interval"""
+		if not self.flags.in_insert and self.has_value_changed("status") and self.status == "Failure":
+			from press.press.doctype.site.backups import update_backup_schedule
+
+			update_backup_schedule(self)
+
 	def after_delete(self):
 		if self.job:
 			frappe.delete_doc_if_exists("Agent Job", self.job)
 
 	def on_update(self):
+		self.reschedule_failed_backup()
+
 		if self.physical and self.has_value_changed("status") and self.status in ["Success", "Failure"]:
 			site_update_doc_name = frappe.db.exists("Site Update", {"site_backup": self.name})
 			if site_update_doc_name:
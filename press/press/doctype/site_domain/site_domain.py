@@ -3,22 +3,28 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import ClassVar
 
 import frappe
 import rq
 from frappe.model.document import Document
+from frappe.utils import create_batch
 
 from press.agent import Agent
-from press.api.site import check_dns_cname_a
+from press.api.site import check_dns_cname_a, get_dns_queries, get_domain_head
 from press.exceptions import (
 	DNSValidationError,
 )
 from press.overrides import get_permission_query_conditions_for_doctype
 from press.utils import log_error
 from press.utils.dns import create_dns_record
+from press.utils.dns_resolver import prefetched
 from press.utils.jobs import has_job_timeout_exceeded
 
+DNS_CHECK_BATCH_SIZE = 200
+DNS_CHECK_WORKERS = 16
+
 
 class SiteDomain(Document):
 	# begin: auto-generated types
@@ -261,34 +267,56 @@ def update_dns_type():
 	)
 
 	domains = query.run(as_dict=1)
-	for domain in domains:
+	for batch in create_batch(domains, DNS_CHECK_BATCH_SIZE):
 		if has_job_timeout_exceeded():
 			return
 		try:
-			response = check_dns_cname_a(domain.site, domain.domain, ignore_proxying=True)
-			if response["matched"] and response["type"] != domain.dns_type:
-				frappe.db.set_value(
-					"Site Domain", domain.name, "dns_type", response["type"], update_modified=False
+			update_dns_type_of_domains(batch)
+		except rq.timeouts.JobTimeoutException:
+			frappe.db.rollback()
+			return
+
+
+def update_dns_type_of_domains(domains: list[frappe._dict]):
+	"""Check DNS of domains with lookups and proxy checks made concurrently, and write results together"""
+	with ThreadPoolExecutor(max_workers=DNS_CHECK_WORKERS) as executor:
+		head_responses = list(executor.map(get_domain_head, [domain.domain for domain in domains]))
+
+	domain_updates = {}
+	certificates_to_retry = []
+	with prefetched(query for domain in domains for query in get_dns_queries(domain.site, domain.domain)):
+		for domain, head_response in zip(domains, head_responses, strict=True):
+			try:
+				response = check_dns_cname_a(
+					domain.site, domain.domain, ignore_proxying=True, head_response=head_response
 				)
+			except DNSValidationError:
+				continue
+			except Exception:
+				log_error("DNS Check Failed", domain=domain)
+				continue
+
+			values = {"dns_response": json.dumps(response, indent=4, default=str)}
+			if response["matched"] and response["type"] != domain.dns_type:
+				values["dns_type"] = response["type"]
+			domain_updates[domain.name] = values
+
 			if domain.retry_count > 0 and response["matched"]:
 				# In the past we failed to obtain the certificate (likely because of DNS issues).
 				# Since the DNS is now correct, we can retry obtaining the certificate.
-				frappe.db.set_value(
-					"TLS Certificate", domain.tls_certificate, "retry_count", 0, update_modified=False
-				)
+				certificates_to_retry.append(domain.tls_certificate)
 
-			pretty_response = json.dumps(response, indent=4, default=str)
-			frappe.db.set_value(
-				"Site Domain", domain.name, "dns_response", pretty_response, update_modified=False
-			)
-			frappe.db.commit()
-		except DNSValidationError:
-			pass
-		except rq.timeouts.JobTimeoutException:
-			return
-		except Exception:
-			frappe.db.rollback()
-			log_error("DNS Check Failed", domain=domain)
+	if domain_updates:
+		frappe.db.bulk_update("Site Domain", domain_updates, update_modified=False)
+	if certificates_to_retry:
+		frappe.db.set_value(
+			"TLS Certificate",
+			{"name": ("in", certificates_to_retry)},
+			"retry_count",
+			0,
+			update_modified=False,
+		)
+	frappe.db.commit()
 
 
 get_permission_query_conditions = get_permission_query_conditions_for_doctype("Site Domain")
@@ -244,3 +244,32 @@ class TestSiteDomain(FrappeTestCase):
 
 		self.assertRaises(frappe.exceptions.LinkExistsError, site_domain.delete)
 		self.assertTrue(frappe.db.exists("Site Domain", {"name": site_domain.name}))
+
+	@patch("press.press.doctype.site_domain.site_domain.frappe.db.commit", new=Mock())
+	@patch(
+		"press.press.doctype.site_domain.site_domain.get_domain_head", new=Mock(return_value=Mock(headers={}))
+	)
+	def test_update_dns_type_looks_up_each_record_once_and_resets_certificate_retries(self):
+		from press.press.doctype.site_domain.site_domain import update_dns_type
+		from press.utils.dns_resolver import NEGATIVE_ANSWER_TTL, DNSAnswer
+
+		site = create_test_site(self.site_subdomain)
+		domain = f"{frappe.generate_hash(length=8)}.example.com"
+		site_domain = create_test_site_domain(site.name, domain)
+		frappe.db.set_value("Site Domain", site_domain.name, "dns_type", "CNAME")
+		frappe.db.set_value("TLS Certificate", site_domain.tls_certificate, "retry_count", 2)
+
+		def query(qname, rdtype):
+			if rdtype == "A":
+				return DNSAnswer(("1.1.1.1",), f"{qname}. 300 IN A 1.1.1.1"), 300
+			return DNSAnswer((), "", "no answer", no_answer=True), NEGATIVE_ANSWER_TTL
+
+		with patch("press.utils.dns_resolver.query", side_effect=query) as mock_query:
+			update_dns_type()
+
+		questions = [c.args for c in mock_query.call_args_list if domain in c.args[0]]
+		self.assertEqual(len(questions), len(set(questions)))
+		self.assertEqual(frappe.db.get_value("Site Domain", site_domain.name, "dns_type"), "A")
+		self.assertEqual(
+			frappe.db.get_value("TLS Certificate", site_domain.tls_certificate, "retry_count"), 0
+		)
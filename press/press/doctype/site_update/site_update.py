@@ -14,12 +14,15 @@ import pytz
 from frappe.core.utils import find
 from frappe.model.document import Document
 from frappe.utils import convert_utc_to_system_timezone
-from frappe.utils.caching import site_cache
 from frappe.utils.data import cint
 
 from press.agent import Agent
 from press.api.client import dashboard_whitelist
 from press.exceptions import SiteAlreadyArchived, SiteUnderMaintenance
+from press.press.doctype.available_bench_update.available_bench_update import (
+	get_benches_with_update,
+	get_update_destination,
+)
 from press.press.doctype.logical_replication_backup.logical_replication_backup import (
 	get_logical_replication_backup_restoration_steps,
 )
@@ -747,45 +750,11 @@ def update_status(
 			)
 
 
-@site_cache(ttl=60)
-def benches_with_available_update(site=None, server=None):
-	site_bench = frappe.db.get_value("Site", site, "bench") if site else None
-	values = {}
+def benches_with_available_update(site=None, server=None, benches=None):
+	"""Read from the Available Bench Update index, kept in sync with benches and differences"""
 	if site:
-		values["site_bench"] = site_bench
-	if server:
-		values["server"] = server
-	source_benches_info = frappe.db.sql(
-		f"""
-		SELECT sb.name AS source_bench, sb.candidate AS source_candidate, sb.server AS server, dcd.destination AS destination_candidate
-		FROM `tabBench` sb, `tabDeploy Candidate Difference` dcd
-		WHERE sb.status IN ('Active', 'Broken') AND sb.candidate = dcd.source
-		{"AND sb.name = %(site_bench)s" if site else ""}
-		{"AND sb.server = %(server)s" if server else ""}
-		""",
-		values=values,
-		as_dict=True,
-	)
-
-	destination_candidates = list(set(d["destination_candidate"] for d in source_benches_info))
-
-	destination_benches_info = frappe.get_all(
-		"Bench",
-		filters={"status": "Active", "candidate": ("in", destination_candidates)},
-		fields=["candidate AS destination_candidate", "name AS destination_bench", "server"],
-		ignore_ifnull=True,
-	)
-
-	destinations = set()
-	for bench in destination_benches_info:
-		destinations.add((bench.destination_candidate, bench.server))
-
-	updates_available_for_benches = []
-	for bench in source_benches_info:
-		if (bench.destination_candidate, bench.server) in destinations:
-			updates_available_for_benches.append(bench)
-
-	return list(set([bench.source_bench for bench in updates_available_for_benches]))
+		benches = [frappe.db.get_value("Site", site, "bench")]
+	return get_benches_with_update(benches=benches, server=server)
 
 
 @frappe.whitelist()
@@ -866,30 +835,12 @@ def schedule_updates_server(server):
 
 
 def should_try_update(site):
-	source = frappe.db.get_value("Bench", site.bench, "candidate")
-	candidates = frappe.get_all(
-		"Deploy Candidate Difference", filters={"source": source}, pluck="destination"
-	)
-
-	source_apps = [app.app for app in frappe.get_cached_doc("Site", site.name).apps]
-	dest_apps = []
-	destinations = frappe.get_all(
-		"Bench",
-		["name", "candidate"],
-		{
-			"candidate": ("in", candidates),
-			"status": "Active",
-			"server": site.server,
-		},
-		limit=1,
-		ignore_ifnull=True,
-		order_by="creation DESC",
-	)
-	# Most recent active bench is the destination bench
-	if not destinations:
+	destination = get_update_destination(site.bench)
+	if not destination:
 		return False
 
-	destination_bench = frappe.get_cached_doc("Bench", destinations[0].name)
+	source_apps = [app.app for app in frappe.get_cached_doc("Site", site.name).apps]
+	destination_bench = frappe.get_cached_doc("Bench", destination.name)
 	dest_apps = [app.app for app in destination_bench.apps]
 
 	if set(source_apps) - set(dest_apps):
@@ -899,8 +850,8 @@ def should_try_update(site):
 		"Site Update",
 		{
 			"site": site.name,
-			"source_candidate": source,
-			"destination_candidate": destination_bench.candidate,
+			"source_candidate": destination.source_candidate,
+			"destination_candidate": destination.candidate,
 			"cause_of_failure_is_resolved": False,
 		},
 	)
@@ -13,8 +13,6 @@ from frappe.utils import cint, flt
 
 from press.overrides import get_permission_query_conditions_for_doctype
 from press.press.doctype.site_plan.site_plan import SitePlan
-from press.utils import log_error
-from press.utils.jobs import has_job_timeout_exceeded
 
 if TYPE_CHECKING:
 	from frappe.types import DF
@@ -142,7 +140,7 @@ class Subscription(Document):
 		return False
 
 	@frappe.whitelist()
-	def create_usage_record(self, date: DF.Date | None = None):  # noqa: C901
+	def create_usage_record(self, date: DF.Date | None = None, update_invoice: bool = True):  # noqa: C901
 		cannot_charge = not self.can_charge_for_subscription()
 		if cannot_charge:
 			return None
@@ -202,6 +200,8 @@ class Subscription(Document):
 			else None,
 		)
 		usage_record.insert()
+		# Callers creating many usage records add them to invoices in bulk afterwards
+		usage_record.flags.skip_invoice_update = not update_invoice
 		usage_record.submit()
 		return usage_record
 
@@ -289,38 +289,19 @@ def create_usage_records_of_date(
 	If no date is provided, it defaults to today.
 	If usage_record_creation_batch_size is not provided, it will fetch from `Press Settings` or default to 500.
 	"""
-	free_sites = sites_with_free_hosting()
-	settings = frappe.get_single("Press Settings")
-	subscriptions = frappe.db.get_all(
-		"Subscription",
-		filters={
-			"enabled": True,
-			"plan": ("in", paid_plans()),
-			"name": ("not in", created_usage_records(free_sites, date=date)),
-			"document_name": ("not in", free_sites),
-		},
-		pluck="name",
-		order_by=None,
-		limit=usage_record_creation_batch_size or settings.usage_record_creation_batch_size or 500,
-		ignore_ifnull=True,
-		debug=True,
+	from press.press.doctype.subscription.usage_record_generator import DailyUsageRecordGenerator
+
+	batch_size = (
+		usage_record_creation_batch_size
+		or frappe.db.get_single_value("Press Settings", "usage_record_creation_batch_size")
+		or 500
 	)
-	for name in subscriptions:
-		if has_job_timeout_exceeded():
-			return
-		subscription = frappe.get_cached_doc("Subscription", name)
-		try:
-			subscription.create_usage_record(date=date)
-			frappe.db.commit()
-		except rq.timeouts.JobTimeoutException:
-			# This job took too long to execute
-			# We need to rollback the transaction
-			# Try again in the next job
-			frappe.db.rollback()
-			return
-		except Exception:
-			frappe.db.rollback()
-			log_error(title="Create Usage Record Error", name=name)
+	try:
+		DailyUsageRecordGenerator(date, batch_size=batch_size).run()
+	except rq.timeouts.JobTimeoutException:
+		# Batches are committed as they go, the next job picks up where this one stopped
+		# Records left unlinked are picked up by link_unlinked_usage_records
+		frappe.db.rollback()
 
 
 def paid_plans():
@@ -9,6 +9,7 @@ from frappe.tests.utils import FrappeTestCase
 
 from press.press.doctype.site.test_site import create_test_site
 from press.press.doctype.subscription.subscription import sites_with_free_hosting
+from press.press.doctype.subscription.usage_record_generator import DailyUsageRecordGenerator
 from press.press.doctype.team.test_team import create_test_team
 
 
@@ -185,3 +186,60 @@ class TestSubscription(FrappeTestCase):
 		# test: site owned by free account
 		free_sites = sites_with_free_hosting()
 		self.assertEqual(len(free_sites), 2)
+
+	def test_daily_usage_record_generator_is_idempotent(self):
+		self.team.create_upcoming_invoice()
+		plan = frappe.get_doc(
+			doctype="Site Plan",
+			name="Plan-10",
+			document_type="ToDo",
+			interval="Daily",
+			price_usd=30,
+			price_inr=30,
+		).insert()
+
+		subscriptions = []
+		for _ in range(3):
+			todo = frappe.get_doc(doctype="ToDo", description="Test todo").insert()
+			subscriptions.append(
+				create_test_subscription(todo.name, plan.name, self.team.name, document_type="ToDo")
+			)
+
+		with patch.object(frappe.db, "commit"):
+			self.assertEqual(DailyUsageRecordGenerator(batch_size=2).run(), 3)
+			# running again for the same date shouldn't create duplicates
+			self.assertEqual(DailyUsageRecordGenerator(batch_size=2).run(), 0)
+
+		usage_records = frappe.get_all(
+			"Usage Record",
+			filters={"subscription": ("in", [s.name for s in subscriptions])},
+			fields=["docstatus", "invoice"],
+		)
+		self.assertEqual(len(usage_records), 3)
+		self.assertTrue(all(record.docstatus == 1 and record.invoice for record in usage_records))
+
+		invoice = frappe.get_doc("Invoice", {"team": self.team.name, "status": "Draft"})
+		self.assertEqual(invoice.total, plan.get_price_per_day("INR") * 3)
+
+	def test_monthly_subscription_gets_one_usage_record_a_month(self):
+		plan = frappe.get_doc(
+			doctype="Site Plan",
+			name="Plan-10",
+			document_type="ToDo",
+			interval="Monthly",
+			price_usd=30,
+			price_inr=30,
+		).insert()
+		todo = frappe.get_doc(doctype="ToDo", description="Test todo").insert()
+		subscription = create_test_subscription(todo.name, plan.name, self.team.name, document_type="ToDo")
+		subscription.db_set({"interval": "Monthly", "creation": "2025-01-01 00:00:00"})
+
+		with (
+			patch.object(frappe.db, "commit"),
+			patch("press.press.doctype.subscription.usage_record_generator.link_usage_records_to_invoices"),
+		):
+			self.assertEqual(DailyUsageRecordGenerator("2025-01-10").run(), 1)
+			self.assertEqual(DailyUsageRecordGenerator("2025-01-11").run(), 0)
+			self.assertEqual(DailyUsageRecordGenerator("2025-02-01").run(), 1)
+
+		self.assertEqual(frappe.db.count("Usage Record", {"subscription": subscription.name}), 2)
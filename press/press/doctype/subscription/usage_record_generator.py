@@ -0,0 +1,249 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Set based generation of daily usage records.
+
+Subscriptions that still need a usage record for a date are found with a
+single anti-join against Usage Record, records are inserted (already
+submitted) with multi-row inserts and then added to upcoming invoices
+team by team. Every batch is committed on its own, so a run that stops
+half way is resumed by the next run, and running it twice for a date
+doesn't create duplicates.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import frappe
+from frappe.query_builder import Criterion
+from frappe.utils import cint, flt, get_first_day, get_last_day, getdate, now_datetime
+
+from press.press.doctype.subscription.subscription import paid_plans
+from press.press.doctype.usage_record.usage_record import link_usage_records_to_invoices
+from press.utils import log_error
+from press.utils.jobs import has_job_timeout_exceeded
+
+if TYPE_CHECKING:
+	from datetime import date as Date
+
+USAGE_RECORD_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"team",
+	"currency",
+	"document_type",
+	"document_name",
+	"plan_type",
+	"plan",
+	"amount",
+	"date",
+	"time",
+	"subscription",
+	"interval",
+	"site",
+)
+
+
+class DailyUsageRecordGenerator:
+	def __init__(self, date: Date | str | None = None, batch_size: int = 500):
+		self.date = getdate(date)
+		self.month_start = get_first_day(self.date)
+		self.month_end = get_last_day(self.date)
+		self.batch_size = batch_size
+		self.paid_plans = paid_plans()
+		self._teams = {}
+
+	def run(self) -> int:
+		"""Create usage records batch by batch until none are missing, returns records created"""
+		created = 0
+		last_subscription = ""
+		while not has_job_timeout_exceeded():
+			subscriptions = self.get_pending_subscriptions(after=last_subscription)
+			if not subscriptions:
+				break
+
+			usage_records = self.create_usage_records(subscriptions)
+			frappe.db.commit()
+			link_usage_records_to_invoices(usage_records)
+			created += len(usage_records)
+
+			# Subscriptions that can't be charged don't get a record, page past them
+			last_subscription = subscriptions[-1].name
+		return created
+
+	def get_pending_subscriptions(self, after: str = "") -> list[frappe._dict]:
+		"""Enabled paid subscriptions without a usage record for the period, sites are checked in SQL"""
+		if not self.paid_plans:
+			return []
+
+		Subscription = frappe.qb.DocType("Subscription")
+		UsageRecord = frappe.qb.DocType("Usage Record")
+		Site = frappe.qb.DocType("Site")
+		Team = frappe.qb.DocType("Team")
+
+		# Same as `Site.can_charge_for_subscription` and `sites_with_free_hosting`
+		chargeable_site = Criterion.all(
+			[
+				Site.status.notin(("Archived", "Suspended")),
+				Site.team.notnull(),
+				Site.team != "Administrator",
+				Site.free == 0,
+				Site.trial_end_date.isnull() | (Site.trial_end_date < getdate()),
+				Team.free_account.isnull() | (Team.free_account == 0) | (Team.enabled == 0),
+			]
+		)
+		return (
+			frappe.qb.from_(Subscription)
+			.left_join(UsageRecord)
+			.on(self.get_existing_record_condition(Subscription, UsageRecord))
+			.left_join(Site)
+			.on((Site.name == Subscription.document_name) & (Subscription.document_type == "Site"))
+			.left_join(Team)
+			.on(Team.name == Site.team)
+			.select(
+				Subscription.name,
+				Subscription.team,
+				Subscription.document_type,
+				Subscription.document_name,
+				Subscription.plan_type,
+				Subscription.plan,
+				Subscription.interval,
+				Subscription.additional_storage,
+				Subscription.site,
+				Subscription.marketplace_app_subscription,
+			)
+			.where(UsageRecord.name.isnull())
+			.where(Subscription.enabled == 1)
+			.where(Subscription.plan.isin(self.paid_plans))
+			.where(Subscription.creation < frappe.utils.add_days(self.date, 1))
+			.where((Subscription.document_type != "Site") | chargeable_site)
+			.where(Subscription.name > after)
+			.orderby(Subscription.name)
+			.limit(self.batch_size)
+			.run(as_dict=True)
+		)
+
+	def get_existing_record_condition(self, Subscription, UsageRecord) -> Criterion:
+		"""Same as `Subscription.is_usage_record_created`, monthly subscriptions are charged once a month"""
+		same_period = (
+			(Subscription.interval == "Monthly") & UsageRecord.date.between(self.month_start, self.month_end)
+		) | ((Subscription.interval != "Monthly") & (UsageRecord.date == self.date))
+		return Criterion.all(
+			[
+				UsageRecord.subscription == Subscription.name,
+				UsageRecord.plan == Subscription.plan,
+				UsageRecord.interval == Subscription.interval,
+				same_period,
+			]
+		)
+
+	def create_usage_records(self, subscriptions: list[frappe._dict]) -> list[frappe._dict]:
+		usage_records = []
+		for subscription in subscriptions:
+			try:
+				if self.can_charge(subscription):
+					usage_records.append(self.get_usage_record(subscription))
+			except Exception:
+				log_error("Create Usage Record Error", name=subscription.name)
+
+		if not usage_records:
+			return []
+
+		for usage_record, name in zip(
+			usage_records, reserve_usage_record_names(len(usage_records)), strict=True
+		):
+			usage_record.name = name
+
+		frappe.db.bulk_insert(
+			"Usage Record",
+			fields=USAGE_RECORD_FIELDS,
+			values=[
+				tuple(usage_record[field] for field in USAGE_RECORD_FIELDS) for usage_record in usage_records
+			],
+		)
+		return usage_records
+
+	def can_charge(self, subscription: frappe._dict) -> bool:
+		"""Sites are already filtered in `get_pending_subscriptions`"""
+		if subscription.document_type == "Site":
+			return True
+		return frappe.get_doc("Subscription", subscription.name).can_charge_for_subscription()
+
+	def get_usage_record(self, subscription: frappe._dict) -> frappe._dict:
+		team = self.get_billed_team(subscription.team)
+		plan = frappe.get_cached_doc(subscription.plan_type, subscription.plan)
+		now = now_datetime()
+		return frappe._dict(
+			name=None,
+			creation=now,
+			modified=now,
+			owner=frappe.session.user,
+			modified_by=frappe.session.user,
+			docstatus=1,
+			invoice=None,
+			payout=None,
+			team=team.name,
+			currency=team.currency,
+			document_type=subscription.document_type,
+			document_name=subscription.document_name,
+			plan_type=subscription.plan_type,
+			plan=plan.name,
+			amount=self.get_amount(subscription, plan, team.currency),
+			date=self.date,
+			time=now.time(),
+			subscription=subscription.name,
+			interval=subscription.interval,
+			site=(
+				subscription.site
+				or frappe.db.get_value(
+					"Marketplace App Subscription", subscription.marketplace_app_subscription, "site"
+				)
+			)
+			if subscription.document_type == "Marketplace App"
+			else None,
+		)
+
+	def get_amount(self, subscription: frappe._dict, plan, currency: str) -> float:
+		"""Same as the amount in `Subscription.create_usage_record`"""
+		if subscription.additional_storage:
+			price = plan.price_inr if currency == "INR" else plan.price_usd
+			price_per_day = price / plan.period  # no rounding off to avoid discrepancies
+			return flt((price_per_day * cint(subscription.additional_storage)), 2)
+
+		if subscription.plan_type == "Server Snapshot Plan":
+			price = plan.price_inr if currency == "INR" else plan.price_usd
+			price_per_day = price / plan.period  # no rounding off to avoid discrepancies
+			size = cint(frappe.db.get_value("Server Snapshot", subscription.document_name, "total_size_gb"))
+			return flt(price_per_day * size, 2)
+
+		return plan.get_price_for_interval(subscription.interval, currency)
+
+	def get_billed_team(self, team: str) -> frappe._dict:
+		"""Team usage records of `team` are created for, resolved once per team per run"""
+		if team not in self._teams:
+			fields = ["name", "currency", "parent_team", "billing_team", "payment_mode"]
+			values = frappe.db.get_value("Team", team, fields, as_dict=True)
+			if values.parent_team:
+				values = frappe.db.get_value("Team", values.parent_team, fields, as_dict=True)
+			if values.billing_team and values.payment_mode == "Paid By Partner":
+				values = frappe.db.get_value("Team", values.billing_team, fields, as_dict=True)
+			self._teams[team] = values
+		return self._teams[team]
+
+
+def reserve_usage_record_names(count: int) -> list[str]:
+	"""Reserve `count` names of the `UR-.YYYY.-.######` series with a single series update"""
+	prefix = f"UR-{now_datetime().year}-"
+	current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", prefix)
+	if current:
+		start = cint(current[0][0])
+		frappe.db.sql("UPDATE `tabSeries` SET `current` = `current` + %s WHERE `name` = %s", (count, prefix))
+	else:
+		start = 0
+		frappe.db.sql("INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)", (prefix, count))
+	return [f"{prefix}{number:06d}" for number in range(start + 1, start + count + 1)]
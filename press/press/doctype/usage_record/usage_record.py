@@ -5,6 +5,8 @@ from __future__ import annotations
 import frappe
 from frappe.model.document import Document
 
+from press.utils import log_error
+
 
 class UsageRecord(Document):
 	# begin: auto-generated types
@@ -44,29 +46,14 @@ class UsageRecord(Document):
 		self.validate_duplicate_usage_record()
 
 	def on_submit(self):
-		self.update_usage_in_invoice()
+		if not self.flags.skip_invoice_update:
+			self.update_usage_in_invoice()
 
 	def on_cancel(self):
 		self.remove_usage_from_invoice()
 
 	def update_usage_in_invoice(self):
-		team = frappe.get_doc("Team", self.team)
-
-		if team.parent_team:
-			team = frappe.get_doc("Team", team.parent_team)
-
-		if team.billing_team:
-			team = frappe.get_doc("Team", team.billing_team)
-
-		if team.free_account:
-			return
-		# Get a read lock on this invoice
-		# We're going to update the invoice and we don't want any other process to update it
-		invoice = team.get_upcoming_invoice(for_update=True)
-		if not invoice:
-			invoice = team.create_upcoming_invoice()
-
-		invoice.add_usage_record(self)
+		update_usage_in_invoices([self])
 
 	def remove_usage_from_invoice(self):
 		team = frappe.get_doc("Team", self.team)
@@ -99,6 +86,51 @@ class UsageRecord(Document):
 			)
 
 
+def get_invoicing_teams(teams: set[str]) -> dict[str, str | None]:
+	"""Team billed for usage of each of `teams`, None if usage is not billed"""
+	fields = ["name", "parent_team", "billing_team", "free_account"]
+	values, requested, missing = {}, set(), set(teams)
+	# Parent and billing teams are fetched together, a level at a time
+	while missing:
+		requested |= missing
+		for team in frappe.get_all("Team", filters={"name": ("in", list(missing))}, fields=fields):
+			values[team.name] = team
+		missing = {
+			team[field]
+			for team in values.values()
+			for field in ("parent_team", "billing_team")
+			if team[field]
+		} - requested
+
+	invoicing_teams = {}
+	for team in teams:
+		invoicing_team = team
+		for field in ("parent_team", "billing_team"):
+			if values[invoicing_team][field]:
+				invoicing_team = values[invoicing_team][field]
+		invoicing_teams[team] = None if values[invoicing_team].free_account else invoicing_team
+	return invoicing_teams
+
+
+def update_usage_in_invoices(usage_records: list[UsageRecord]):
+	"""Add usage records to upcoming invoices, saving each invoice once"""
+	invoicing_teams = get_invoicing_teams({usage_record.team for usage_record in usage_records})
+	records_by_team = {}
+	for usage_record in usage_records:
+		if team := invoicing_teams[usage_record.team]:
+			records_by_team.setdefault(team, []).append(usage_record)
+
+	for team, records in records_by_team.items():
+		team = frappe.get_doc("Team", team)
+		# Get a read lock on this invoice
+		# We're going to update the invoice and we don't want any other process to update it
+		invoice = team.get_upcoming_invoice(for_update=True)
+		if not invoice:
+			invoice = team.create_upcoming_invoice()
+
+		invoice.add_usage_records(records)
+
+
 def link_unlinked_usage_records():
 	td = frappe.utils.today()
 	fd = frappe.utils.get_first_day(td)
@@ -117,11 +149,22 @@ def link_unlinked_usage_records():
 		ignore_ifnull=True,
 	)
 
+	link_usage_records_to_invoices([frappe.get_doc("Usage Record", name) for name in usage_records])
+
+
+def link_usage_records_to_invoices(usage_records: list[UsageRecord]):
+	"""Update invoices with usage records team by team, so one failing invoice doesn't block others"""
+	records_by_team = {}
 	for usage_record in usage_records:
+		records_by_team.setdefault(usage_record.team, []).append(usage_record)
+
+	for team, records in records_by_team.items():
 		try:
-			frappe.get_doc("Usage Record", usage_record).update_usage_in_invoice()
+			update_usage_in_invoices(records)
+			frappe.db.commit()
 		except Exception:
-			frappe.log_error("Failed to Link UR to Invoice")
+			frappe.db.rollback()
+			log_error("Failed to Link UR to Invoice", team=team, usage_records=[ur.name for ur in records])
 
 
 def on_doctype_update():
@@ -84,6 +84,13 @@ def get_data(filters):
 @frappe.whitelist()
 def update_agent(filters):
 	frappe.only_for("System Manager")
-	for server in get_servers(frappe._dict(json.loads(filters))):
-		server = frappe.get_doc(server.server_type, server.name)
-		server.update_agent_ansible()
+	servers = [
+		{"server_type": server.server_type, "name": server.name}
+		for server in get_servers(frappe._dict(json.loads(filters)))
+	]
+	frappe.enqueue(
+		"press.press.doctype.server.server.update_agent_on_servers",
+		servers=servers,
+		queue="long",
+		timeout=3600,
+	)
@@ -7,11 +7,11 @@ import re
 from collections import defaultdict
 
 import frappe
-import requests
 import sqlparse
 from frappe.core.doctype.access_log.access_log import make_access_log
 from frappe.utils import convert_utc_to_timezone, get_system_timezone
-from frappe.utils.password import get_decrypted_password
+
+from press.utils.log_server import get_log_server_client
 
 
 def execute(filters=None):
@@ -108,13 +108,10 @@ def get_data(filters):
 
 
 def get_slow_query_logs(database, start_datetime, end_datetime, search_pattern, size):
-	log_server = frappe.db.get_single_value("Press Settings", "log_server")
-	if not log_server:
+	client = get_log_server_client()
+	if not client:
 		return []
 
-	url = f"https://{log_server}/elasticsearch/filebeat-*/_search"
-	password = get_decrypted_password("Log Server", log_server, "kibana_password")
-
 	query = {
 		"query": {
 			"bool": {
@@ -131,7 +128,7 @@ def get_slow_query_logs(database, start_datetime, end_datetime, search_pattern,
 	if search_pattern and search_pattern != ".*":
 		query["query"]["bool"]["filter"].append({"regexp": {"mysql.slowlog.query": search_pattern}})
 
-	response = requests.post(url, json=query, auth=("frappe", password)).json()
+	response = client.search(query, name="slow_query_logs")
 
 	out = []
 	for d in response["hits"]["hits"]:
@@ -1,4 +1,6 @@
 import json
+import time
+from collections import defaultdict
 
 import frappe
 import wrapt
@@ -33,6 +35,33 @@ def reconnect_on_failure():
 	return wrapper
 
 
+def update_public_key(server_type, server, result):
+	server = frappe.get_doc(server_type, server)
+	if result.name == "root":
+		server.root_public_key = result.ssh_public_key
+	elif result.name == "frappe":
+		server.frappe_public_key = result.ssh_public_key
+	server.save()
+
+
+def get_task_result_values(status, result, start):
+	"""Ansible Task fields for a finished task, result is the task's result dict"""
+	end = now()
+	values = {
+		"status": status,
+		"output": result.stdout,
+		"error": result.stderr,
+		"exception": result.msg,
+		"end": end,
+		"duration": end - start,
+	}
+	# Reduce clutter be removing keys already shown elsewhere
+	for key in ("stdout", "stdout_lines", "stderr", "stderr_lines", "msg"):
+		result.pop(key, None)
+	values["result"] = json.dumps(result, indent=4)
+	return values
+
+
 class AnsibleCallback(CallbackBase):
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
@@ -42,12 +71,7 @@ class AnsibleCallback(CallbackBase):
 		result, action = frappe._dict(result._result), result._task.action
 		if action == "user":
 			server_type, server = frappe.db.get_value("Ansible Play", self.play, ["server_type", "server"])
-			server = frappe.get_doc(server_type, server)
-			if result.name == "root":
-				server.root_public_key = result.ssh_public_key
-			elif result.name == "frappe":
-				server.frappe_public_key = result.ssh_public_key
-			server.save()
+			update_public_key(server_type, server, result)
 
 	def v2_runner_on_ok(self, result, *args, **kwargs):
 		self.update_task("Success", result)
@@ -102,18 +126,10 @@ class AnsibleCallback(CallbackBase):
 				return
 			task_name = self.tasks[task._role.get_name()][task.name]
 		task = frappe.get_doc("Ansible Task", task_name)
-		task.status = status
 		if result:
-			task.output = result.stdout
-			task.error = result.stderr
-			task.exception = result.msg
-			# Reduce clutter be removing keys already shown elsewhere
-			for key in ("stdout", "stdout_lines", "stderr", "stderr_lines", "msg"):
-				result.pop(key, None)
-			task.result = json.dumps(result, indent=4)
-			task.end = now()
-			task.duration = task.end - task.start
+			task.update(get_task_result_values(status, result, task.start))
 		else:
+			task.status = status
 			task.start = now()
 		task.save()
 		self.publish_play_progress(task.name)
@@ -260,3 +276,243 @@ class Ansible:
 					).insert()
 					self.tasks.setdefault(role.get_name(), {})[task.name] = task_doc.name
 					self.task_list.append(task_doc.name)
+
+
+class AnsibleFleetCallback(CallbackBase):
+	"""
+	Records a play per host of a fleet run.
+
+	Task and play updates are buffered in memory and written with bulk
+	updates every `FLUSH_INTERVAL` seconds or `FLUSH_SIZE` updates. Progress
+	of each play is published at most once per `PROGRESS_INTERVAL` seconds.
+	"""
+
+	FLUSH_INTERVAL = 5
+	FLUSH_SIZE = 500
+	PROGRESS_INTERVAL = 5
+
+	def __init__(self, fleet: "AnsibleFleet", *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.fleet = fleet
+		self.task_updates: dict[str, dict] = defaultdict(dict)
+		self.play_updates: dict[str, dict] = defaultdict(dict)
+		self.task_starts: dict[str, object] = {}
+		self.finished: dict[str, int] = defaultdict(int)
+		self.changed_plays: set[str] = set()
+		self.last_flush = self.last_progress = time.monotonic()
+
+	def v2_runner_on_ok(self, result, *args, **kwargs):
+		self.update_task("Success", result)
+		if result._task.action == "user":
+			self.process_user_task(result)
+
+	def v2_runner_on_failed(self, result, *args, **kwargs):
+		self.update_task("Failure", result)
+
+	def v2_runner_on_skipped(self, result):
+		self.update_task("Skipped", result)
+
+	def v2_runner_on_unreachable(self, result):
+		self.update_task("Unreachable", result)
+
+	def v2_playbook_on_task_start(self, task, is_conditional):
+		if not task._role:
+			return
+		start = now()
+		for host in self.fleet.get_active_hosts():
+			play = self.fleet.plays[host]
+			task_name = self.fleet.tasks[play][task._role.get_name()][task.name]
+			self.task_starts[task_name] = start
+			self.task_updates[task_name].update(status="Running", start=start)
+		self.flush_if_due()
+
+	def v2_playbook_on_start(self, playbook):
+		for play in self.fleet.plays.values():
+			self.play_updates[play].update(status="Running", start=self.fleet.start)
+		self.flush(force=True)
+
+	def v2_playbook_on_stats(self, stats):
+		end = now()
+		for host, play in self.fleet.plays.items():
+			values = stats.summarize(host)
+			failed = values["failures"] or values["unreachable"] or host not in stats.processed
+			self.play_updates[play].update(
+				values, status="Failure" if failed else "Success", end=end, duration=end - self.fleet.start
+			)
+		self.flush(force=True)
+
+	def update_task(self, status, result):
+		if not result._task._role:
+			return
+		play = self.fleet.plays[result._host.get_name()]
+		task_name = self.fleet.tasks[play][result._task._role.get_name()][result._task.name]
+		start = self.task_starts.get(task_name) or now()
+		self.task_updates[task_name].update(
+			get_task_result_values(status, frappe._dict(result._result), start)
+		)
+		self.finished[play] += 1
+		self.changed_plays.add(play)
+		self.flush_if_due()
+
+	@reconnect_on_failure()
+	def process_user_task(self, result):
+		server = self.fleet.servers[result._host.get_name()]
+		update_public_key(server.doctype, server.name, frappe._dict(result._result))
+		frappe.db.commit()
+
+	def flush_if_due(self):
+		if (
+			len(self.task_updates) >= self.FLUSH_SIZE
+			or time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL
+		):
+			self.flush()
+		if time.monotonic() - self.last_progress >= self.PROGRESS_INTERVAL:
+			self.publish_progress()
+
+	@reconnect_on_failure()
+	def flush(self, force=False):
+		if self.task_updates:
+			frappe.db.bulk_update("Ansible Task", self.task_updates)
+		if self.play_updates:
+			frappe.db.bulk_update("Ansible Play", self.play_updates)
+		frappe.db.commit()
+		self.task_updates.clear()
+		self.play_updates.clear()
+		self.last_flush = time.monotonic()
+		if force:
+			self.publish_progress()
+
+	def publish_progress(self):
+		for play in self.changed_plays:
+			frappe.publish_realtime(
+				"ansible_play_progress",
+				{"progress": self.finished[play], "total": self.fleet.task_count, "play": play},
+				doctype="Ansible Play",
+				docname=play,
+				user=frappe.session.user,
+			)
+		self.changed_plays.clear()
+		self.last_progress = time.monotonic()
+
+
+class AnsibleFleet:
+	"""
+	Runs a playbook on many servers at once, `forks` hosts in parallel.
+
+	Every server gets its own Ansible Play and Ansible Tasks, same as a run of
+	`Ansible`. Async tasks are polled by Ansible but their job ids aren't
+	recorded on the tasks.
+	"""
+
+	def __init__(self, servers, playbook, user="root", variables=None, port=22, forks=20):
+		self.servers = {server.ip: server for server in servers}
+		self.playbook = playbook
+		self.playbook_path = frappe.get_app_path("press", "playbooks", self.playbook)
+		self.variables = variables or {}
+
+		constants.HOST_KEY_CHECKING = False
+		context.CLIARGS = ImmutableDict(
+			become_method="sudo",
+			check=False,
+			connection="ssh",
+			extra_vars=[f"{cstr(key)}='{cstr(value)}'" for key, value in self.variables.items()],
+			forks=forks,
+			remote_user=user,
+			start_at_task=None,
+			syntax=False,
+			verbosity=1,
+		)
+
+		self.loader = DataLoader()
+		self.passwords = dict({})
+
+		self.sources = "".join(f"{ip}:{port}," for ip in self.servers)
+		self.inventory = InventoryManager(loader=self.loader, sources=self.sources)
+		self.variable_manager = VariableManager(loader=self.loader, inventory=self.inventory)
+
+		self.callback = AnsibleFleetCallback(self)
+		self.display = Display()
+		self.display.verbosity = 1
+		self.create_ansible_plays()
+
+	def run(self) -> dict[str, str]:
+		"""Returns Ansible Play of each server"""
+		self.start = now()
+		self.executor = PlaybookExecutor(
+			playbooks=[self.playbook_path],
+			inventory=self.inventory,
+			variable_manager=self.variable_manager,
+			loader=self.loader,
+			passwords=self.passwords,
+		)
+		self.executor._tqm._stdout_callback = self.callback
+		self.executor.run()
+		return {self.servers[host].name: play for host, play in self.plays.items()}
+
+	def get_active_hosts(self) -> list[str]:
+		"""Hosts that haven't failed or become unreachable yet"""
+		failed = self.executor._tqm._failed_hosts.keys() | self.executor._tqm._unreachable_hosts.keys()
+		return [host for host in self.plays if host not in failed]
+
+	def create_ansible_plays(self):
+		# Parse the playbook once, every server gets the same tasks
+		playbook = Playbook.load(
+			self.playbook_path, variable_manager=self.variable_manager, loader=self.loader
+		)
+		# Assume we only have one play per playbook
+		play = playbook.get_plays()[0]
+		tasks = [
+			(role.get_name(), task.name)
+			for role in play.get_roles()
+			for block in role.get_task_blocks()
+			for task in block.block
+		]
+		self.task_count = len(tasks)
+
+		now_ = now()
+		user = frappe.session.user
+		play_rows, task_rows = [], []
+		self.plays, self.tasks = {}, {}
+		for host, server in self.servers.items():
+			play_name = frappe.generate_hash(length=10)
+			self.plays[host] = play_name
+			self.tasks[play_name] = defaultdict(dict)
+			play_rows.append(
+				(
+					play_name,
+					now_,
+					now_,
+					user,
+					user,
+					server.doctype,
+					server.name,
+					json.dumps(self.variables, indent=4),
+					self.playbook,
+					play.get_name(),
+					"Pending",
+				)
+			)
+			for role, task in tasks:
+				task_name = frappe.generate_hash(length=10)
+				self.tasks[play_name][role][task] = task_name
+				task_rows.append((task_name, now_, now_, user, user, play_name, role, task, "Pending"))
+
+		frappe.db.bulk_insert("Ansible Play", PLAY_FIELDS, play_rows)
+		frappe.db.bulk_insert("Ansible Task", TASK_FIELDS, task_rows)
+		frappe.db.commit()
+
+
+PLAY_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"server_type",
+	"server",
+	"variables",
+	"playbook",
+	"play",
+	"status",
+)
+TASK_FIELDS = ("name", "creation", "modified", "owner", "modified_by", "play", "role", "task", "status")
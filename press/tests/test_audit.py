@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 
@@ -92,8 +93,8 @@ class TestOffsiteBackupCheck(FrappeTestCase):
 		frappe.db.set_value("Remote File", site_backup.remote_private_file, "file_path", "remote_file3")
 		with patch.object(
 			OffsiteBackupCheck,
-			"_get_all_files_in_s3",
-			new=lambda x: ["remote_file1", "remote_file2", "remote_file3"],
+			"get_keys",
+			new=lambda self, bucket, prefix: {"remote_file1", "remote_file2", "remote_file3"},
 		):
 			OffsiteBackupCheck()
 		audit_log = frappe.get_last_doc("Audit Log", {"audit_type": OffsiteBackupCheck.audit_type})
@@ -105,7 +106,48 @@ class TestOffsiteBackupCheck(FrappeTestCase):
 		# 3 remote files are created here
 		site_backup = create_test_site_backup(site.name)
 		frappe.db.set_value("Remote File", site_backup.remote_database_file, "file_path", "remote_file1")
-		with patch.object(OffsiteBackupCheck, "_get_all_files_in_s3", new=lambda x: ["remote_file1"]):
+		with patch.object(OffsiteBackupCheck, "get_keys", new=lambda self, bucket, prefix: {"remote_file1"}):
 			OffsiteBackupCheck()
 		audit_log = frappe.get_last_doc("Audit Log", {"audit_type": OffsiteBackupCheck.audit_type})
 		self.assertEqual(audit_log.status, "Failure")
+
+	def test_audit_only_checks_backups_since_last_check(self):
+		create_test_press_settings()
+		site = create_test_site()
+		create_test_site_backup(site.name, creation=datetime.now() - timedelta(days=2))
+		with patch.object(OffsiteBackupCheck, "get_keys", new=lambda self, bucket, prefix: set()):
+			OffsiteBackupCheck()
+		first = frappe.get_last_doc("Audit Log", {"audit_type": OffsiteBackupCheck.audit_type})
+		self.assertEqual(first.status, "Failure")
+		self.assertEqual(len(json.loads(first.log)[OffsiteBackupCheck.list_key]), 3)
+
+		site_backup = create_test_site_backup(site.name)
+		remote_files = [site_backup.remote_database_file, site_backup.remote_public_file]
+		for remote_file in remote_files:
+			frappe.db.set_value("Remote File", remote_file, "file_path", f"{site.name}/{remote_file}")
+
+		with patch.object(
+			OffsiteBackupCheck,
+			"get_keys",
+			new=lambda self, bucket, prefix: {f"{site.name}/{remote_file}" for remote_file in remote_files},
+		):
+			OffsiteBackupCheck()
+		second = frappe.get_last_doc("Audit Log", {"audit_type": OffsiteBackupCheck.audit_type})
+		log = json.loads(second.log)
+		self.assertEqual(log["Summary"]["Checked Remote Files"], 3)
+		self.assertEqual(
+			[remote_file["name"] for remote_file in log[OffsiteBackupCheck.list_key]],
+			[site_backup.remote_private_file],
+		)
+
+	def test_failed_bucket_listing_is_logged(self):
+		create_test_press_settings()
+		site = create_test_site()
+		create_test_site_backup(site.name)
+		with patch.object(OffsiteBackupCheck, "get_keys", side_effect=Exception("Could not connect")):
+			OffsiteBackupCheck(full=True)
+		audit_log = frappe.get_last_doc("Audit Log", {"audit_type": OffsiteBackupCheck.audit_type})
+		log = json.loads(audit_log.log)
+		self.assertEqual(audit_log.status, "Failure")
+		self.assertEqual(log[OffsiteBackupCheck.list_key], [])
+		self.assertEqual(log[OffsiteBackupCheck.errors_key][0]["error"], "Could not connect")
@@ -0,0 +1,32 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from press.utils.log_server import LogServerClient
+
+
+class TestLogServerClient(TestCase):
+	def test_msearch_returns_responses_by_name_in_one_request(self):
+		client = LogServerClient("log.example.com", "password")
+		body = {"responses": [{"took": 3, "hits": {"hits": []}}, {"error": {"type": "parse_exception"}}]}
+		client.es = MagicMock()
+		client.es.msearch.return_value.body = body
+
+		with patch("press.utils.log_server.add_data_to_monitor") as add_data_to_monitor:
+			responses = client.msearch({"first": {"size": 1}, "second": {"size": 0}})
+
+		client.es.msearch.assert_called_once_with(
+			searches=[{"index": "filebeat-*"}, {"size": 1}, {"index": "filebeat-*"}, {"size": 0}]
+		)
+		self.assertEqual(responses["first"]["took"], 3)
+		self.assertIn("error", responses["second"])
+
+		searches = add_data_to_monitor.call_args.kwargs["log_server_searches"]
+		self.assertEqual(searches[-1]["queries"], {"first": 3, "second": "error"})
+		frappe.local.log_server_searches = None
+
+	def test_client_is_shared_per_log_server(self):
+		first = LogServerClient("log.example.com", "password")
+		second = LogServerClient("log.example.com", "password", timeout=5)
+		self.assertIs(first.es.transport, second.es.transport)
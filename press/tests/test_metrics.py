@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from press.metrics import SNAPSHOT_KEY, MetricsRenderer, RedisHistogram, refresh_snapshot
+
+
+class TestMetrics(FrappeTestCase):
+	def tearDown(self):
+		frappe.cache.delete_value(SNAPSHOT_KEY)
+		frappe.cache.delete_value("press_metrics_histogram|press_test_duration_seconds")
+		super().tearDown()
+
+	def test_fresh_snapshot_is_served_without_queries(self):
+		refresh_snapshot()
+		with (
+			patch("press.metrics.frappe.get_all") as get_all,
+			patch("press.metrics.frappe.enqueue") as enqueue,
+		):
+			output = MetricsRenderer("metrics").metrics()
+
+		get_all.assert_not_called()
+		enqueue.assert_not_called()
+		self.assertIn("press_metrics_snapshot_age_seconds", output)
+		self.assertIn("press_site_total", output)
+
+	def test_stale_snapshot_is_refreshed_in_background(self):
+		snapshot = refresh_snapshot()
+		snapshot["generated_at"] -= 60 * 60
+		frappe.cache.set_value(SNAPSHOT_KEY, snapshot)
+
+		with patch("press.metrics.frappe.enqueue") as enqueue:
+			MetricsRenderer("metrics").metrics()
+		self.assertEqual(enqueue.call_args.args[0], "press.metrics.refresh_snapshot")
+
+	def test_redis_histogram_renders_cumulative_buckets(self):
+		histogram = RedisHistogram("press_test_duration_seconds", "Test", buckets=(1, 5, float("inf")))
+		histogram.observe_many([(0.5, ()), (3, ()), (10, ())])
+
+		family = next(histogram.collect())
+		buckets = {sample.labels["le"]: sample.value for sample in family.samples if "le" in sample.labels}
+		self.assertEqual(buckets, {"1.0": 1, "5.0": 2, "+Inf": 3})
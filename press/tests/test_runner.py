@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock, Mock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from press.runner import AnsibleFleet, AnsibleFleetCallback
+
+HOSTS = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+TASKS = ["Ping Server", "Gather Facts"]
+
+
+def fake_task(name: str):
+	role = Mock()
+	role.get_name.return_value = "ping"
+	task = Mock(_role=role, action="command")
+	# `name` is the repr of a Mock when passed to its constructor
+	task.name = name
+	return task
+
+
+def fake_play():
+	play = Mock()
+	play.get_name.return_value = "Ping Server"
+	role = Mock()
+	role.get_name.return_value = "ping"
+	role.get_task_blocks.return_value = [Mock(block=[fake_task(task) for task in TASKS])]
+	play.get_roles.return_value = [role]
+	return play
+
+
+def fake_result(host: str, task: str, result: dict | None = None):
+	_host = Mock()
+	_host.get_name.return_value = host
+	return Mock(_host=_host, _task=fake_task(task), _result=result or {})
+
+
+def fake_stats(failed_hosts: list[str]):
+	stats = Mock(processed={host: 1 for host in HOSTS})
+	stats.summarize = lambda host: {
+		"ok": 1 if host in failed_hosts else 2,
+		"failures": 1 if host in failed_hosts else 0,
+		"unreachable": 0,
+		"changed": 0,
+		"skipped": 0,
+		"rescued": 0,
+		"ignored": 0,
+	}
+	return stats
+
+
+@patch("press.runner.frappe.db.commit", new=MagicMock)
+@patch("press.runner.frappe.publish_realtime", new=Mock())
+class TestAnsibleFleet(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def create_fleet(self) -> AnsibleFleet:
+		fleet = AnsibleFleet.__new__(AnsibleFleet)
+		fleet.servers = {
+			host: frappe._dict(ip=host, doctype="Server", name=f"f{index}-test.frappe.cloud")
+			for index, host in enumerate(HOSTS)
+		}
+		fleet.playbook = "ping.yml"
+		fleet.playbook_path = "ping.yml"
+		fleet.variables = {}
+		fleet.loader = fleet.variable_manager = None
+		with patch("press.runner.Playbook.load", return_value=Mock(get_plays=lambda: [fake_play()])):
+			fleet.create_ansible_plays()
+		fleet.start = now_datetime()
+		fleet.executor = Mock(_tqm=Mock(_failed_hosts={}, _unreachable_hosts={}))
+		return fleet
+
+	def test_plays_and_tasks_are_created_for_every_host(self):
+		fleet = self.create_fleet()
+
+		self.assertEqual(set(fleet.plays), set(HOSTS))
+		for host, play in fleet.plays.items():
+			self.assertEqual(frappe.db.get_value("Ansible Play", play, "server"), fleet.servers[host].name)
+			self.assertEqual(
+				sorted(frappe.get_all("Ansible Task", {"play": play}, pluck="task")), sorted(TASKS)
+			)
+
+	def test_results_are_recorded_per_host_with_few_writes(self):
+		fleet = self.create_fleet()
+		callback = AnsibleFleetCallback(fleet)
+		failed_host = HOSTS[1]
+
+		with (
+			patch.object(AnsibleFleetCallback, "FLUSH_INTERVAL", 3600),
+			patch("press.runner.frappe.db.bulk_update", wraps=frappe.db.bulk_update) as bulk_update,
+		):
+			callback.v2_playbook_on_start(None)
+			callback.v2_playbook_on_task_start(fake_task(TASKS[0]), False)
+			for host in HOSTS:
+				if host == failed_host:
+					callback.v2_runner_on_failed(fake_result(host, TASKS[0], {"msg": "Host down"}))
+				else:
+					callback.v2_runner_on_ok(fake_result(host, TASKS[0], {"stdout": "pong"}))
+
+			fleet.executor._tqm._failed_hosts = {failed_host: True}
+			self.assertEqual(fleet.get_active_hosts(), [host for host in HOSTS if host != failed_host])
+
+			callback.v2_playbook_on_task_start(fake_task(TASKS[1]), False)
+			for host in fleet.get_active_hosts():
+				callback.v2_runner_on_ok(fake_result(host, TASKS[1]))
+			callback.v2_playbook_on_stats(fake_stats([failed_host]))
+
+		# Start of the playbook, then tasks and plays once at the end
+		self.assertLessEqual(bulk_update.call_count, 3)
+
+		for host, play in fleet.plays.items():
+			status = frappe.db.get_value("Ansible Play", play, "status")
+			tasks = dict(frappe.get_all("Ansible Task", {"play": play}, ["task", "status"], as_list=True))
+			if host == failed_host:
+				self.assertEqual(status, "Failure")
+				self.assertEqual(tasks, {TASKS[0]: "Failure", TASKS[1]: "Pending"})
+			else:
+				self.assertEqual(status, "Success")
+				self.assertEqual(tasks, {TASKS[0]: "Success", TASKS[1]: "Success"})
+
+		task = fleet.tasks[fleet.plays[HOSTS[0]]]["ping"][TASKS[0]]
+		self.assertEqual(frappe.db.get_value("Ansible Task", task, "output"), "pong")
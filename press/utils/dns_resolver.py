@@ -0,0 +1,137 @@
+"""
+DNS lookups for domain verification.
+
+Lookups go through one resolver per process and answers are cached in redis
+for the TTL of the records (capped, so corrected records show up soon), so the
+daily sweep of custom domains and checks from the dashboard reuse each other's
+answers.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import dns.exception
+import dns.resolver
+import frappe
+
+if typing.TYPE_CHECKING:
+	from collections.abc import Iterable, Iterator
+
+NAMESERVERS = ["1.1.1.1", "1.0.0.1", "8.8.8.8", "8.8.4.4"]
+
+MAX_ANSWER_TTL = 300
+# Seconds to remember that a name has no records of a type
+NEGATIVE_ANSWER_TTL = 60
+
+PREFETCH_WORKERS = 16
+PREFETCH_QUERIES_PER_SECOND = 50
+
+
+class DNSAnswer(typing.NamedTuple):
+	records: tuple[str, ...]
+	rrset: str
+	error: str | None = None
+	# Name exists, but has no records of the queried type
+	no_answer: bool = False
+
+
+class RateLimiter:
+	"""Spaces out calls from many threads to at most `rate` a second"""
+
+	def __init__(self, rate: float):
+		self.interval = 1 / rate
+		self.next_call = time.monotonic()
+		self.lock = threading.Lock()
+
+	def wait(self):
+		with self.lock:
+			now = time.monotonic()
+			delay = self.next_call - now
+			self.next_call = max(now, self.next_call) + self.interval
+		if delay > 0:
+			time.sleep(delay)
+
+
+@functools.cache
+def get_resolver() -> dns.resolver.Resolver:
+	resolver = dns.resolver.Resolver(configure=False)
+	resolver.nameservers = NAMESERVERS
+	return resolver
+
+
+def query(qname: str, rdtype: str) -> tuple[DNSAnswer, int]:
+	"""Uncached lookup, safe to call from threads. Returns the answer and seconds to cache it for"""
+	try:
+		answer = get_resolver().resolve(qname, rdtype)
+	except dns.resolver.NoAnswer as e:
+		return DNSAnswer((), "", str(e), no_answer=True), NEGATIVE_ANSWER_TTL
+	except dns.resolver.NXDOMAIN as e:
+		return DNSAnswer((), "", str(e)), NEGATIVE_ANSWER_TTL
+	except dns.exception.DNSException as e:
+		# Timeouts and server failures aren't answers, don't cache them
+		return DNSAnswer((), "", str(e)), 0
+
+	records = tuple(rdata.to_text() for rdata in answer)
+	return DNSAnswer(records, answer.rrset.to_text()), min(answer.rrset.ttl, MAX_ANSWER_TTL)
+
+
+def get_cache_key(qname: str, rdtype: str) -> str:
+	return f"dns_answer:{rdtype}:{qname.lower()}"
+
+
+def cache_answer(qname: str, rdtype: str, answer: DNSAnswer, ttl: int):
+	if ttl > 0:
+		frappe.cache.set_value(get_cache_key(qname, rdtype), answer, expires_in_sec=ttl)
+
+
+def resolve(qname: str, rdtype: str) -> DNSAnswer:
+	prefetched_answers = getattr(frappe.local, "dns_answers", None) or {}
+	if answer := prefetched_answers.get((qname, rdtype)):
+		return answer
+
+	if answer := frappe.cache.get_value(get_cache_key(qname, rdtype)):
+		return answer
+
+	answer, ttl = query(qname, rdtype)
+	cache_answer(qname, rdtype, answer, ttl)
+	return answer
+
+
+def prefetch(queries: Iterable[tuple[str, str]]) -> dict[tuple[str, str], DNSAnswer]:
+	"""Answers to all queries, the ones not in the cache are looked up concurrently"""
+	answers = {}
+	missing = []
+	for qname, rdtype in set(queries):
+		if answer := frappe.cache.get_value(get_cache_key(qname, rdtype)):
+			answers[(qname, rdtype)] = answer
+		else:
+			missing.append((qname, rdtype))
+
+	limiter = RateLimiter(PREFETCH_QUERIES_PER_SECOND)
+
+	def limited_query(question: tuple[str, str]) -> tuple[DNSAnswer, int]:
+		limiter.wait()
+		return query(*question)
+
+	# Worker threads only query, cache is written from this thread
+	with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+		for question, (answer, ttl) in zip(missing, executor.map(limited_query, missing), strict=True):
+			cache_answer(*question, answer, ttl)
+			answers[question] = answer
+	return answers
+
+
+@contextmanager
+def prefetched(queries: Iterable[tuple[str, str]]) -> Iterator[None]:
+	"""`resolve` reads answers fetched up front, including ones too short-lived to cache"""
+	frappe.local.dns_answers = prefetch(queries)
+	try:
+		yield
+	finally:
+		frappe.local.dns_answers = None
@@ -0,0 +1,90 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see license.txt
+"""
+Shared client for querying Elasticsearch on the log server.
+
+One Elasticsearch client is kept per log server for the life of the worker, so
+connections are pooled and reused, and the Kibana password is decrypted once
+every few minutes instead of once per query. Queries that don't depend on each
+other should be sent together with `LogServerClient.msearch`, which costs a
+single round trip however many queries are sent.
+"""
+
+from __future__ import annotations
+
+import time
+
+import frappe
+from elasticsearch import Elasticsearch
+from frappe.monitor import add_data_to_monitor
+from frappe.utils.caching import site_cache
+from frappe.utils.password import get_decrypted_password
+
+INDEX = "filebeat-*"
+DEFAULT_TIMEOUT = 30
+
+_clients: dict[tuple[str, str], Elasticsearch] = {}
+
+
+@site_cache(ttl=5 * 60)
+def get_log_server_credentials() -> tuple[str, str] | None:
+	log_server = frappe.db.get_single_value("Press Settings", "log_server")
+	if not log_server:
+		return None
+	return log_server, str(get_decrypted_password("Log Server", log_server, "kibana_password"))
+
+
+def get_log_server_client(timeout: int = DEFAULT_TIMEOUT) -> LogServerClient | None:
+	"""Client for the log server set in Press Settings, None if there isn't one"""
+	if credentials := get_log_server_credentials():
+		return LogServerClient(*credentials, timeout=timeout)
+	return None
+
+
+class LogServerClient:
+	def __init__(self, log_server: str, password: str, timeout: int = DEFAULT_TIMEOUT):
+		self.log_server = log_server
+		self.url = f"https://{log_server}/elasticsearch"
+
+		key = (self.url, password)
+		if key not in _clients:
+			_clients[key] = Elasticsearch(self.url, basic_auth=("frappe", password))
+		self.es = _clients[key].options(request_timeout=timeout)
+
+	def search(self, query: dict, name: str = "search", index: str = INDEX) -> dict:
+		return self.msearch({name: query}, index=index)[name]
+
+	def msearch(self, queries: dict[str, dict], index: str = INDEX) -> dict[str, dict]:
+		"""Run named queries in one `_msearch` request, failed queries have an `error` key in their response"""
+		if not queries:
+			return {}
+
+		searches = []
+		for query in queries.values():
+			searches.extend(({"index": index}, query))
+
+		start = time.monotonic()
+		responses = self.es.msearch(searches=searches).body["responses"]
+		duration = time.monotonic() - start
+
+		responses = dict(zip(queries, responses, strict=True))
+		record_latency(responses, duration)
+		return responses
+
+
+def record_latency(responses: dict[str, dict], duration: float):
+	"""Add round trip time and time spent by Elasticsearch on each query to the request monitor"""
+	searches = getattr(frappe.local, "log_server_searches", None)
+	if searches is None:
+		searches = frappe.local.log_server_searches = []
+
+	searches.append(
+		{
+			"round_trip": round(duration * 1000),
+			"queries": {
+				name: response.get("took") if "error" not in response else "error"
+				for name, response in responses.items()
+			},
+		}
+	)
+	add_data_to_monitor(log_server_searches=searches)